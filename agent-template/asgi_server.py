@@ -0,0 +1,394 @@
+#!/usr/bin/env python3
+"""
+ASGI HTTP Server for OpenFloor Agent
+
+Async alternative to flask_server.py with the same endpoints. Connections are
+handled on an asyncio event loop, so idle or slow clients do not tie up a
+worker thread. Envelope processing (TemplateAgent.process_envelope is
+synchronous) runs on a bounded worker pool; when every worker is busy and the
+wait queue is full, requests are rejected with 429 and a Retry-After header
+instead of piling up.
+
+An envelope holds its worker thread for the whole of its processing,
+outbound LLM or HTTP calls included, so at most MAX_CONCURRENT_ENVELOPES
+envelopes are processed at once. The event loop only makes reading requests,
+prefiltering, queueing and rejecting cheap; agents whose handlers mostly wait
+on I/O should raise MAX_CONCURRENT_ENVELOPES.
+
+Clients that send "Accept: text/event-stream" receive the response as
+server-sent events: partial utterance text while the agent generates it,
+then the complete response envelope.
+
+Usage:
+    uvicorn asgi_server:app --host 0.0.0.0 --port 8080
+    python asgi_server.py
+
+Configure via environment variables:
+    HOST, PORT                  - bind address (python asgi_server.py only)
+    MAX_CONCURRENT_ENVELOPES    - envelopes processed at once (default 32)
+    MAX_QUEUED_ENVELOPES        - envelopes allowed to wait for a worker (default 256)
+    QUEUE_TIMEOUT_SECONDS       - longest wait for a worker before 429 (default 10)
+    RETRY_AFTER_SECONDS         - Retry-After value sent with 429 (default 1)
+"""
+
+import asyncio
+import json
+import logging
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+
+# Import our agent components
+from template_agent import TemplateAgent, load_manifest_from_config
+import envelope_handler
+
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+MAX_CONCURRENT_ENVELOPES = int(os.environ.get('MAX_CONCURRENT_ENVELOPES', 32))
+MAX_QUEUED_ENVELOPES = int(os.environ.get('MAX_QUEUED_ENVELOPES', 256))
+QUEUE_TIMEOUT_SECONDS = float(os.environ.get('QUEUE_TIMEOUT_SECONDS', 10))
+RETRY_AFTER_SECONDS = int(os.environ.get('RETRY_AFTER_SECONDS', 1))
+MAX_BODY_BYTES = 1024 * 1024
+
+
+# Initialize agent at module level (loaded once at startup)
+try:
+    logger.info("Loading agent configuration...")
+    manifest = load_manifest_from_config()
+    agent = TemplateAgent(manifest)
+    logger.info(f"Agent initialized: {manifest.identification.conversationalName}")
+    logger.info(f"Service URL: {manifest.identification.serviceUrl}")
+except Exception as e:
+    logger.error(f"Failed to initialize agent: {e}")
+    sys.exit(1)
+
+
+_executor = ThreadPoolExecutor(
+    max_workers=MAX_CONCURRENT_ENVELOPES,
+    thread_name_prefix='envelope-worker'
+)
+_worker_slots = None
+_admitted = 0
+
+
+def _json_body(payload) -> bytes:
+    return json.dumps(payload).encode('utf-8')
+
+
+def _process_envelope_payload(envelope_dict: dict, events: list):
+    """
+    Build, process and serialize one prefiltered envelope (runs on a worker thread).
+
+    Returns:
+        (status_code, response_body) tuple
+    """
+    try:
+        in_envelope = envelope_handler.build_envelope(envelope_dict, events)
+    except ValueError as e:
+        logger.error(f"Invalid envelope format: {e}")
+        return 400, _json_body({"error": f"Invalid envelope format: {e}"})
+
+    conv_id = envelope_handler.extract_conversation_id(in_envelope)
+    sender = envelope_handler.extract_sender_name(in_envelope)
+    logger.info(f"Processing conversation {conv_id} from {sender}")
+
+    out_envelope = agent.process_envelope(in_envelope)
+    response_json = envelope_handler.serialize_envelope(out_envelope)
+
+    logger.info(f"Returning response for conversation {conv_id}")
+    return 200, response_json.encode('utf-8')
+
+
+def _parse_envelope_payload(envelope_dict: dict, events: list):
+    """Build one prefiltered envelope (runs on a worker thread); returns (envelope, error_body)."""
+    try:
+        return envelope_handler.build_envelope(envelope_dict, events), None
+    except ValueError as e:
+        logger.error(f"Invalid envelope format: {e}")
+        return None, _json_body({"error": f"Invalid envelope format: {e}"})
+
+
+def _sse_error(e: Exception) -> str:
+    return envelope_handler.format_sse("error", json.dumps({"error": "Internal server error", "detail": str(e)}))
+
+
+def _process_envelope_streaming(in_envelope, emit) -> None:
+    """Process one envelope (runs on a worker thread), passing SSE frames to `emit`."""
+    def _on_partial(text: str) -> None:
+        if text:
+            emit(envelope_handler.format_sse(
+                "utterance",
+                json.dumps({"speakerUri": agent.speakerUri, "text": text})
+            ))
+
+    try:
+        conv_id = envelope_handler.extract_conversation_id(in_envelope)
+        logger.info(f"Streaming response for conversation {conv_id}")
+        out_envelope = agent.process_envelope(in_envelope, on_partial=_on_partial)
+        emit(envelope_handler.format_sse("envelope", envelope_handler.serialize_envelope(out_envelope)))
+    except Exception as e:
+        logger.exception(f"Error processing envelope: {e}")
+        emit(_sse_error(e))
+
+
+async def _stream_envelope(send, envelope_dict: dict, events: list) -> None:
+    """
+    Answer one envelope as server-sent events, relaying frames as the worker produces them.
+
+    Once the 200 status line is sent, a failure can only be reported in the
+    stream itself: it ends with an `error` frame, and the body is always closed.
+    """
+    loop = asyncio.get_running_loop()
+    in_envelope, error_body = await loop.run_in_executor(_executor, _parse_envelope_payload, envelope_dict, events)
+    if error_body is not None:
+        await _send_response(send, 400, error_body)
+        return
+
+    frames: asyncio.Queue = asyncio.Queue()
+    done = object()
+
+    def _emit(frame) -> None:
+        loop.call_soon_threadsafe(frames.put_nowait, frame)
+
+    def _run() -> None:
+        try:
+            _process_envelope_streaming(in_envelope, _emit)
+        finally:
+            _emit(done)
+
+    await send({
+        'type': 'http.response.start',
+        'status': 200,
+        'headers': [(b'content-type', b'text/event-stream; charset=utf-8'), (b'cache-control', b'no-cache')],
+    })
+    try:
+        worker = loop.run_in_executor(_executor, _run)
+        while True:
+            frame = await frames.get()
+            if frame is done:
+                break
+            await send({'type': 'http.response.body', 'body': frame.encode('utf-8'), 'more_body': True})
+        await worker
+    except Exception as e:
+        logger.exception(f"Error streaming envelope: {e}")
+        await send({'type': 'http.response.body', 'body': _sse_error(e).encode('utf-8'), 'more_body': True})
+    await send({'type': 'http.response.body', 'body': b''})
+
+
+async def _send_response(send, status: int, body: bytes, extra_headers=None, content_type: bytes = b'application/json') -> None:
+    headers = [
+        (b'content-type', content_type),
+        (b'content-length', str(len(body)).encode('ascii')),
+    ]
+    headers.extend(extra_headers or [])
+    await send({'type': 'http.response.start', 'status': status, 'headers': headers})
+    await send({'type': 'http.response.body', 'body': body})
+
+
+async def _send_busy(send) -> None:
+    await _send_response(
+        send,
+        429,
+        _json_body({"error": "Agent is busy, retry later"}),
+        [(b'retry-after', str(RETRY_AFTER_SECONDS).encode('ascii'))]
+    )
+
+
+async def _read_body(receive):
+    chunks = []
+    size = 0
+    while True:
+        message = await receive()
+        if message['type'] == 'http.disconnect':
+            return None
+        chunk = message.get('body', b'')
+        size += len(chunk)
+        if size > MAX_BODY_BYTES:
+            raise OverflowError("Request body too large")
+        chunks.append(chunk)
+        if not message.get('more_body', False):
+            return b''.join(chunks)
+
+
+async def handle_envelope(receive, send, stream: bool = False) -> None:
+    """
+    Main endpoint for OpenFloor envelope processing.
+
+    Accepts POST requests with JSON OpenFloor envelopes.
+    Returns OpenFloor envelope responses (as server-sent events when `stream`
+    is set), or 429 when the agent is saturated.
+    """
+    global _admitted, _worker_slots
+
+    if _admitted >= MAX_CONCURRENT_ENVELOPES + MAX_QUEUED_ENVELOPES:
+        logger.warning("Rejecting envelope: %d envelopes already admitted", _admitted)
+        await _send_busy(send)
+        return
+
+    try:
+        raw_body = await _read_body(receive)
+    except OverflowError:
+        await _send_response(send, 413, _json_body({"error": "Request body too large"}))
+        return
+    if raw_body is None:
+        return
+
+    if not raw_body:
+        logger.warning("Received empty request body")
+        await _send_response(send, 400, _json_body({"error": "Empty request body"}))
+        return
+
+    # Log incoming request (abbreviated for security)
+    logger.info(f"Received envelope: {raw_body[:100].decode('utf-8', errors='replace')}...")
+
+    # Decoding and the addressing check are cheap enough for the event loop; an
+    # envelope with nothing for this agent is answered without taking a worker.
+    try:
+        envelope_dict, events = envelope_handler.prefilter_envelope(raw_body, agent)
+    except ValueError as e:
+        logger.error(f"Invalid envelope format: {e}")
+        await _send_response(send, 400, _json_body({"error": f"Invalid envelope format: {e}"}))
+        return
+    if events is None:
+        response_json = envelope_handler.skipped_response_json(envelope_dict, agent)
+        if stream:
+            await _send_response(
+                send,
+                200,
+                envelope_handler.format_sse("envelope", response_json).encode('utf-8'),
+                [(b'cache-control', b'no-cache')],
+                content_type=b'text/event-stream; charset=utf-8'
+            )
+        else:
+            await _send_response(send, 200, response_json.encode('utf-8'))
+        return
+
+    if _worker_slots is None:
+        _worker_slots = asyncio.Semaphore(MAX_CONCURRENT_ENVELOPES)
+
+    _admitted += 1
+    try:
+        try:
+            await asyncio.wait_for(_worker_slots.acquire(), timeout=QUEUE_TIMEOUT_SECONDS)
+        except asyncio.TimeoutError:
+            logger.warning("Rejecting envelope: no worker free after %ss", QUEUE_TIMEOUT_SECONDS)
+            await _send_busy(send)
+            return
+
+        try:
+            if stream:
+                await _stream_envelope(send, envelope_dict, events)
+                return
+            loop = asyncio.get_running_loop()
+            status, body = await loop.run_in_executor(_executor, _process_envelope_payload, envelope_dict, events)
+        except Exception as e:
+            logger.exception(f"Error processing envelope: {e}")
+            status, body = 500, _json_body({"error": "Internal server error", "detail": str(e)})
+        finally:
+            _worker_slots.release()
+    finally:
+        _admitted -= 1
+
+    await _send_response(send, status, body)
+
+
+async def health_check(send) -> None:
+    """
+    Health check endpoint.
+
+    Returns agent status, basic information and current load.
+    """
+    await _send_response(send, 200, _json_body({
+        'status': 'healthy',
+        'agent': manifest.identification.conversationalName,
+        'serviceUrl': manifest.identification.serviceUrl,
+        'version': '1.0.0',
+        'openfloor_schema': '1.1',
+        'inFlight': _admitted,
+        'maxConcurrent': MAX_CONCURRENT_ENVELOPES,
+        'maxQueued': MAX_QUEUED_ENVELOPES
+    }))
+
+
+async def get_manifest(send, if_none_match: str = '') -> None:
+    """
+    Return agent manifest (pre-serialized, with an ETag; 304 if unchanged).
+    """
+    try:
+        snapshot = agent.manifest_cache.current()
+    except Exception as e:
+        logger.exception(f"Error returning manifest: {e}")
+        await _send_response(send, 500, _json_body({"error": "Failed to retrieve manifest"}))
+        return
+    headers = [(name.lower().encode('ascii'), value.encode('ascii')) for name, value in snapshot.cache_headers().items()]
+    if snapshot.matches(if_none_match):
+        await send({'type': 'http.response.start', 'status': 304, 'headers': headers})
+        await send({'type': 'http.response.body', 'body': b''})
+        return
+    await _send_response(send, 200, snapshot.body, headers)
+
+
+async def _lifespan(receive, send) -> None:
+    while True:
+        message = await receive()
+        if message['type'] == 'lifespan.startup':
+            await send({'type': 'lifespan.startup.complete'})
+        elif message['type'] == 'lifespan.shutdown':
+            _executor.shutdown(wait=False, cancel_futures=True)
+            await send({'type': 'lifespan.shutdown.complete'})
+            return
+
+
+async def app(scope, receive, send):
+    """ASGI entry point."""
+    if scope['type'] == 'lifespan':
+        await _lifespan(receive, send)
+        return
+    if scope['type'] != 'http':
+        return
+
+    method = scope['method']
+    path = scope['path'].rstrip('/') or '/'
+
+    if path == '/' and method == 'POST':
+        accept = dict(scope.get('headers') or []).get(b'accept', b'').decode('latin-1')
+        await handle_envelope(receive, send, stream=envelope_handler.wants_event_stream(accept))
+    elif path == '/health' and method == 'GET':
+        await health_check(send)
+    elif path == '/manifest' and method in ('GET', 'POST'):
+        if_none_match = dict(scope.get('headers') or []).get(b'if-none-match', b'').decode('latin-1')
+        await get_manifest(send, if_none_match)
+    else:
+        await _send_response(send, 404, _json_body({"error": "Not found"}))
+
+
+# Entry point
+if __name__ == '__main__':
+    import uvicorn
+
+    host = os.environ.get('HOST', '0.0.0.0')
+    port = int(os.environ.get('PORT', 8080))
+
+    logger.info("=" * 60)
+    logger.info("OpenFloor Agent Server (ASGI)")
+    logger.info("=" * 60)
+    logger.info(f"Agent: {manifest.identification.conversationalName}")
+    logger.info(f"Service URL: {manifest.identification.serviceUrl}")
+    logger.info(f"Speaker URI: {manifest.identification.speakerUri}")
+    logger.info(f"Server starting on http://{host}:{port}")
+    logger.info(f"Concurrency: {MAX_CONCURRENT_ENVELOPES} workers, {MAX_QUEUED_ENVELOPES} queued")
+    logger.info("=" * 60)
+    logger.info("Endpoints:")
+    logger.info(f"  POST /        - OpenFloor envelope processing")
+    logger.info(f"  GET  /health  - Health check")
+    logger.info(f"  GET  /manifest - Agent manifest")
+    logger.info("=" * 60)
+
+    uvicorn.run(app, host=host, port=port, log_level='info')
@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Benchmark: decoding incoming envelopes, full openfloor parse vs the prefilter.
+
+"before" is what the servers used to do for every request: build the whole
+openfloor Envelope (every conversant and event) and then drop the events that
+are not addressed to this agent. "after" is envelope_handler.prefilter_envelope()
+(orjson + addressing check on plain dicts) followed by build_envelope() only
+when something is left for the agent. Event handlers are not run in either
+case.
+
+Envelopes are read from a JSON-lines file (one request body per line, e.g.
+captured from a floor session). Without --envelopes, a sample of busy-floor
+traffic is generated: six agents on the floor, most events addressed to
+someone else.
+
+Usage:
+    python benchmark_envelopes.py [--envelopes recorded.jsonl] [--rounds 200]
+"""
+
+import argparse
+import json
+import random
+import time
+
+from openfloor.envelope import Envelope
+
+import envelope_handler
+from template_agent import TemplateAgent, load_manifest_from_config
+
+PEERS = [f"http://localhost:{port}" for port in range(8081, 8086)]
+
+
+def _conversants(me: str) -> list:
+    return [
+        {
+            "identification": {
+                "speakerUri": uri,
+                "serviceUrl": uri,
+                "conversationalName": f"Agent{index}",
+                "organization": "Example",
+                "synopsis": "A participant on the floor " * 4,
+            },
+            "persistentState": {},
+        }
+        for index, uri in enumerate([me, *PEERS])
+    ]
+
+
+def _utterance(text: str, to: str = None) -> dict:
+    event = {
+        "eventType": "utterance",
+        "parameters": {
+            "dialogEvent": {
+                "speakerUri": "tag:user,2025:0001",
+                "features": {"text": {"mimeType": "text/plain", "tokens": [{"value": text}]}},
+            }
+        },
+    }
+    if to:
+        event["to"] = {"speakerUri": to, "private": False}
+    return event
+
+
+def sample_envelopes(me: str, count: int = 200, seed: int = 7) -> list:
+    """Floor traffic where roughly three envelopes in four are for other agents."""
+    rng = random.Random(seed)
+    payloads = []
+    for index in range(count):
+        roll = rng.random()
+        if roll < 0.55:
+            events = [_utterance("What do you think about that?", rng.choice(PEERS))]
+        elif roll < 0.75:
+            events = [{"eventType": "getManifests", "to": {"speakerUri": rng.choice(PEERS)}}]
+        elif roll < 0.90:
+            events = [_utterance("Tell me more about the plan.", me)]
+        else:
+            events = [
+                {"eventType": "invite", "to": {"speakerUri": me}},
+                {"eventType": "joinFloor", "to": {"speakerUri": me}},
+            ]
+        envelope = {
+            "openFloor": {
+                "schema": {"version": "1.1.0"},
+                "conversation": {"id": f"conv-{index % 8}", "conversants": _conversants(me)},
+                "sender": {"speakerUri": "tag:convener", "serviceUrl": "http://localhost:8085"},
+                "events": events,
+            }
+        }
+        payloads.append(json.dumps(envelope).encode("utf-8"))
+    return payloads
+
+
+def decode_before(payload: bytes, agent) -> None:
+    envelope = Envelope.from_json(payload.decode("utf-8"), as_payload=True)
+    [event for event in envelope.events if agent._is_addressed_to_me(event)]
+
+
+def decode_after(payload: bytes, agent) -> None:
+    envelope_dict, events = envelope_handler.prefilter_envelope(payload, agent)
+    if events is not None:
+        envelope_handler.build_envelope(envelope_dict, events)
+
+
+def measure(label, fn, payloads, agent, rounds):
+    started = time.process_time()
+    for _ in range(rounds):
+        for payload in payloads:
+            fn(payload, agent)
+    per_envelope_us = (time.process_time() - started) / (rounds * len(payloads)) * 1e6
+    print(f"{label:<26} {per_envelope_us:9.1f} us CPU / envelope")
+    return per_envelope_us
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--envelopes", help="JSON-lines file of recorded request bodies")
+    parser.add_argument("--rounds", type=int, default=200)
+    args = parser.parse_args()
+
+    agent = TemplateAgent(load_manifest_from_config())
+    if args.envelopes:
+        with open(args.envelopes, "rb") as f:
+            payloads = [line.strip() for line in f if line.strip()]
+    else:
+        payloads = sample_envelopes(agent.speakerUri)
+
+    skipped = sum(envelope_handler.prefilter_envelope(payload, agent)[1] is None for payload in payloads)
+    print(f"{len(payloads)} envelopes, {skipped} with nothing for {agent.speakerUri} "
+          f"(orjson {'on' if envelope_handler.orjson is not None else 'off'})")
+
+    before = measure("full parse + filter", decode_before, payloads, agent, args.rounds)
+    after = measure("prefilter + lazy build", decode_after, payloads, agent, args.rounds)
+    print(f"speed-up: {before / after:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
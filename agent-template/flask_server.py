@@ -4,6 +4,8 @@ Flask HTTP Server for OpenFloor Agent
 
 Provides HTTP endpoint for OpenFloor envelope processing.
 Uses envelope_handler for all JSON parsing and serialization.
+Clients that send "Accept: text/event-stream" receive the response as
+server-sent events, with partial utterance text before the final envelope.
 
 Usage:
     python flask_server.py
@@ -57,9 +59,9 @@ def handle_envelope():
     """
     try:
         # Get JSON payload from request
-        json_payload = request.get_data(as_text=True)
+        payload = request.get_data()
         
-        if not json_payload:
+        if not payload:
             logger.warning("Received empty request body")
             return Response(
                 '{"error": "Empty request body"}',
@@ -68,14 +70,37 @@ def handle_envelope():
             )
         
         # Log incoming request (abbreviated for security)
-        logger.info(f"Received envelope: {json_payload[:100]}...")
+        logger.info(f"Received envelope: {payload[:100].decode('utf-8', errors='replace')}...")
         
-        # Extract conversation ID for logging
+        # Decode once and keep only the events addressed to this agent; skip the full parse if none are handled
         try:
-            in_envelope = envelope_handler.parse_incoming_envelope(json_payload)
+            envelope_dict, events = envelope_handler.prefilter_envelope(payload, agent)
+            if events is None:
+                # Nothing in it is for this agent: answer without building the envelope
+                response_json = envelope_handler.skipped_response_json(envelope_dict, agent)
+                if envelope_handler.wants_event_stream(request.headers.get('Accept')):
+                    return Response(
+                        envelope_handler.format_sse("envelope", response_json),
+                        status=200,
+                        mimetype='text/event-stream',
+                        headers={'Cache-Control': 'no-cache'}
+                    )
+                return Response(response_json, status=200, mimetype='application/json')
+
+            in_envelope = envelope_handler.build_envelope(envelope_dict, events)
             conv_id = envelope_handler.extract_conversation_id(in_envelope)
             sender = envelope_handler.extract_sender_name(in_envelope)
             logger.info(f"Processing conversation {conv_id} from {sender}")
+
+            # Clients that accept text/event-stream get partial utterances as they are generated
+            if envelope_handler.wants_event_stream(request.headers.get('Accept')):
+                logger.info(f"Streaming response for conversation {conv_id}")
+                return Response(
+                    envelope_handler.stream_envelope_events(in_envelope, agent),
+                    status=200,
+                    mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache'}
+                )
             
             # Process envelope
             out_envelope = agent.process_envelope(in_envelope)
@@ -129,38 +154,27 @@ def health_check():
     })
 
 
-@app.route('/manifest', methods=['POST'])
+@app.route('/manifest', methods=['GET', 'POST'])
 def get_manifest():
     """
     Return agent manifest.
     
-    Responds to POST requests (OpenFloor getManifests event pattern).
+    Serves the pre-serialized manifest with an ETag; a request whose
+    If-None-Match names the current version gets 304 Not Modified.
     """
     try:
-        manifest_dict = {
-            'identification': {
-                'conversationalName': manifest.identification.conversationalName,
-                'speakerUri': manifest.identification.speakerUri,
-                'serviceUrl': manifest.identification.serviceUrl,
-                'organization': manifest.identification.organization,
-                'role': manifest.identification.role,
-                'synopsis': manifest.identification.synopsis
-            },
-            'capabilities': {
-                'keyphrases': manifest.capabilities.keyphrases,
-                'languages': manifest.capabilities.languages,
-                'descriptions': manifest.capabilities.descriptions,
-                'supportedLayers': manifest.capabilities.supportedLayers
-            }
-        }
-        return jsonify(manifest_dict)
+        snapshot = agent.manifest_cache.current()
     except Exception as e:
         logger.exception(f"Error returning manifest: {e}")
         return Response(
-            f'{{"error": "Failed to retrieve manifest"}}',
+            '{"error": "Failed to retrieve manifest"}',
             status=500,
             mimetype='application/json'
         )
+    headers = snapshot.cache_headers()
+    if snapshot.matches(request.headers.get('If-None-Match')):
+        return Response(status=304, headers=headers)
+    return Response(snapshot.body, status=200, mimetype='application/json', headers=headers)
 
 
 # Entry point
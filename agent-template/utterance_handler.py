@@ -114,6 +114,10 @@ def _call_your_llm(user_text: str, agent_name: str) -> str:
     #     ]
     # )
     # return response.choices[0].message.content
+    #
+    # Streaming: when the client asked for a streamed response,
+    # globals.partial_sink() returns a callback; call the LLM with stream=True
+    # and pass each text delta to it before returning the full text.
     
     raise NotImplementedError("LLM integration not implemented")
 
@@ -0,0 +1,361 @@
+"""Agent discovery for the Assistant Client.
+
+At startup the manifests of all known agents are fetched concurrently on the
+transport's background pool, each with a short deadline, instead of one
+getManifests round trip per agent when the user first picks it. Results are
+kept in an on-disk cache, so the next start has every conversational name
+before any network traffic: name lookups and the agent combobox only ever
+read memory. A background thread revalidates the cache periodically.
+
+Agents that serve GET /manifest (the template agents) are revalidated with
+If-None-Match, so an unchanged manifest costs a 304 without a body. Other
+agents are asked with a getManifests envelope.
+
+Configuration (environment variables):
+    OFP_CLIENT_MANIFEST_CACHE     - cache file (default ~/.cache/openfloor/assistant_client_manifests.json)
+    OFP_CLIENT_DISCOVERY_TIMEOUT  - per-agent deadline in seconds (default 2.5)
+    OFP_CLIENT_DISCOVERY_REFRESH  - seconds between background revalidations (default 300)
+"""
+
+import json
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import wait
+from dataclasses import dataclass, field
+
+import requests
+import openfloor
+from openfloor import Conversation, Envelope, Sender, To
+
+from transport import get_transport
+
+CACHE_PATH = os.getenv("OFP_CLIENT_MANIFEST_CACHE") or os.path.join(
+    os.path.expanduser("~"), ".cache", "openfloor", "assistant_client_manifests.json"
+)
+DISCOVERY_TIMEOUT_SECONDS = float(os.getenv("OFP_CLIENT_DISCOVERY_TIMEOUT", "2.5"))
+DISCOVERY_REFRESH_SECONDS = float(os.getenv("OFP_CLIENT_DISCOVERY_REFRESH", "300"))
+CACHE_FORMAT_VERSION = 1
+
+
+def normalize_agent_id(value):
+    """Lookup key for an agent URL or speaker URI (same rules as the client's name lookups)."""
+    if not value or not isinstance(value, str):
+        return ""
+    if value.startswith("agent:"):
+        value = value[len("agent:"):]
+    return value.rstrip("/").lower()
+
+
+def manifest_url_for(agent_url):
+    """GET /manifest lives next to the agent's envelope endpoint."""
+    return agent_url.rstrip("/") + "/manifest"
+
+
+@dataclass
+class DiscoveredAgent:
+    """What discovery knows about one agent URL."""
+    url: str
+    manifest: dict = field(default_factory=dict)
+    etag: str = ""
+    fetched_at: float = 0.0
+    supports_get: bool = True  # False once the agent refused GET /manifest
+    error: str = ""
+
+    @property
+    def identification(self):
+        identification = self.manifest.get("identification") if isinstance(self.manifest, dict) else None
+        return identification if isinstance(identification, dict) else {}
+
+    @property
+    def conversational_name(self):
+        return self.identification.get("conversationalName", "") or ""
+
+    @property
+    def speaker_uri(self):
+        return self.identification.get("speakerUri", "") or self.identification.get("uri", "") or ""
+
+    @property
+    def service_url(self):
+        return self.identification.get("serviceUrl", "") or ""
+
+    def to_dict(self):
+        return {
+            "url": self.url,
+            "manifest": self.manifest,
+            "etag": self.etag,
+            "fetched_at": self.fetched_at,
+            "supports_get": self.supports_get,
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(
+            url=data["url"],
+            manifest=data.get("manifest") or {},
+            etag=data.get("etag") or "",
+            fetched_at=float(data.get("fetched_at") or 0.0),
+            supports_get=bool(data.get("supports_get", True)),
+        )
+
+
+def _manifest_from_envelope(response_data):
+    """First servicing manifest in a publishManifests reply, or None."""
+    if not isinstance(response_data, dict):
+        return None
+    envelope = response_data.get("openFloor") or response_data.get("ovon") or response_data.get("openfloor") or response_data
+    events = envelope.get("events") if isinstance(envelope, dict) else None
+    for event in events if isinstance(events, list) else []:
+        if isinstance(event, dict) and event.get("eventType") in ("publishManifests", "publishManifest"):
+            manifests = (event.get("parameters") or {}).get("servicingManifests") or []
+            if manifests and isinstance(manifests[0], dict):
+                return manifests[0]
+    return None
+
+
+class AgentDiscovery:
+    """Concurrent manifest discovery with a persistent, revalidated cache."""
+
+    def __init__(self, urls=(), *, sender_uri="", sender_url="", headers=None, cache_path=CACHE_PATH,
+                 timeout=DISCOVERY_TIMEOUT_SECONDS, refresh_seconds=DISCOVERY_REFRESH_SECONDS, transport=None):
+        self.sender_uri = sender_uri
+        self.sender_url = sender_url
+        self.headers = dict(headers or {})
+        self.cache_path = cache_path
+        self.timeout = timeout
+        self.refresh_seconds = refresh_seconds
+        self._transport = transport
+        self._urls = [url for url in dict.fromkeys(urls) if url]
+        self._agents = {}  # {url: DiscoveredAgent}
+        self._names = {}  # {normalized url or speaker uri: conversational name}
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        # Bumped whenever a name changes, so the UI thread can poll for updates.
+        self.version = 0
+        self.load()
+
+    @property
+    def transport(self):
+        return self._transport or get_transport()
+
+    # ------------------------------------------------------------------
+    # Lookups (memory only, safe on the UI thread)
+    # ------------------------------------------------------------------
+
+    def name_for(self, *keys):
+        """Conversational name for the first key (URL or speaker URI) discovery knows, else None."""
+        names = self._names
+        for key in keys:
+            name = names.get(normalize_agent_id(key))
+            if name:
+                return name
+        return None
+
+    def get(self, url):
+        with self._lock:
+            return self._agents.get(url)
+
+    def agents(self):
+        with self._lock:
+            return list(self._agents.values())
+
+    def add_url(self, url):
+        """Include another agent URL in later discovery rounds."""
+        with self._lock:
+            if url and url not in self._urls:
+                self._urls.append(url)
+
+    def remember(self, url, manifest):
+        """Record a manifest the client received some other way (e.g. a getManifests reply)."""
+        if not url or not isinstance(manifest, dict):
+            return
+        self.add_url(url)
+        with self._lock:
+            entry = self._agents.get(url) or DiscoveredAgent(url=url)
+            if entry.manifest == manifest:
+                entry.fetched_at = time.time()
+                return
+            entry.manifest = manifest
+            entry.etag = ""
+            entry.fetched_at = time.time()
+            entry.error = ""
+            self._agents[url] = entry
+            self._rebuild_names()
+        self.save()
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+
+    def load(self):
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as exc:
+            print(f"[discovery] Ignoring unreadable manifest cache {self.cache_path}: {exc}")
+            return
+        if not isinstance(data, dict) or data.get("version") != CACHE_FORMAT_VERSION:
+            return
+        agents = {}
+        for item in data.get("agents") or []:
+            try:
+                entry = DiscoveredAgent.from_dict(item)
+            except (KeyError, TypeError, ValueError):
+                continue
+            agents[entry.url] = entry
+        with self._lock:
+            self._agents.update(agents)
+            for url in agents:
+                if url not in self._urls:
+                    self._urls.append(url)
+            self._rebuild_names()
+
+    def save(self):
+        with self._lock:
+            data = {
+                "version": CACHE_FORMAT_VERSION,
+                "agents": [entry.to_dict() for entry in self._agents.values() if entry.manifest],
+            }
+        directory = os.path.dirname(self.cache_path) or "."
+        with self._save_lock:
+            try:
+                os.makedirs(directory, exist_ok=True)
+                with tempfile.NamedTemporaryFile("w", dir=directory, suffix=".json", delete=False, encoding="utf-8") as handle:
+                    json.dump(data, handle, indent=1)
+                os.replace(handle.name, self.cache_path)
+            except OSError as exc:
+                print(f"[discovery] Could not save manifest cache {self.cache_path}: {exc}")
+
+    def _rebuild_names(self):
+        # Called with self._lock held; readers see either the old or the new map.
+        names = {}
+        for entry in self._agents.values():
+            name = entry.conversational_name
+            if not name:
+                continue
+            for key in (entry.url, entry.service_url, entry.speaker_uri):
+                normalized = normalize_agent_id(key)
+                if normalized:
+                    names[normalized] = name
+        if names != self._names:
+            self._names = names
+            self.version += 1
+
+    # ------------------------------------------------------------------
+    # Fetching
+    # ------------------------------------------------------------------
+
+    def discover(self, urls=None, *, max_age=None):
+        """Fetch manifests for `urls` (default: all known) concurrently.
+
+        Agents fetched less than `max_age` seconds ago are skipped. Waits at
+        most about one per-agent deadline; slower agents keep going in the
+        background and are stored when they answer. Returns the URLs that
+        finished within the wait.
+        """
+        with self._lock:
+            candidates = list(urls if urls is not None else self._urls)
+            now = time.time()
+            if max_age is not None:
+                candidates = [
+                    url for url in candidates
+                    if url not in self._agents or now - self._agents[url].fetched_at >= max_age
+                ]
+        futures = {self.transport.submit_background(self._fetch, url): url for url in candidates}
+        if not futures:
+            return []
+        done, _pending = wait(futures, timeout=self.timeout + 0.5)
+        return [futures[future] for future in done]
+
+    def start(self):
+        """Run a first discovery round now and revalidate every refresh_seconds, in a daemon thread."""
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="ofp-discovery", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        self.discover()
+        while not self._stop.wait(self.refresh_seconds):
+            self.discover(max_age=self.refresh_seconds)
+
+    def _fetch(self, url):
+        entry = self.get(url)
+        try:
+            if entry is None or entry.supports_get:
+                if self._fetch_manifest_get(url, entry):
+                    return
+            self._fetch_manifest_envelope(url)
+        except (requests.RequestException, ValueError) as exc:
+            self._store_error(url, str(exc))
+
+    def _fetch_manifest_get(self, url, entry):
+        """Revalidate via GET /manifest; False (fall back to getManifests) only when the agent does not serve it."""
+        headers = dict(self.headers)
+        headers["Accept"] = "application/json"
+        if entry is not None and entry.etag and entry.manifest:
+            headers["If-None-Match"] = entry.etag
+        response = self.transport.get(manifest_url_for(url), headers=headers, timeout=(self.timeout, self.timeout))
+        if response.status_code == 304 and entry is not None and entry.manifest:
+            self._store(url, entry.manifest, entry.etag)
+            return True
+        if response.status_code == 200:
+            try:
+                manifest = response.json()
+            except ValueError:
+                manifest = None
+            if isinstance(manifest, dict) and isinstance(manifest.get("identification"), dict):
+                self._store(url, manifest, response.headers.get("ETag", ""))
+                return True
+        elif response.status_code not in (404, 405):
+            # Transient (5xx, 429, ...): keep using GET next round, as the flag is persisted.
+            self._store_error(url, f"HTTP {response.status_code} from GET /manifest")
+            return True
+        with self._lock:
+            self._agents.setdefault(url, DiscoveredAgent(url=url)).supports_get = False
+        return False
+
+    def _fetch_manifest_envelope(self, url):
+        envelope = Envelope(
+            conversation=Conversation(),
+            sender=Sender(speakerUri=self.sender_uri, serviceUrl=self.sender_url),
+        )
+        envelope.events.append(openfloor.events.GetManifestsEvent(to=To(serviceUrl=url)))
+        payload_obj = json.loads(envelope.to_json(as_payload=True))
+        response = self.transport.post(url, payload_obj, headers=self.headers, timeout=(self.timeout, self.timeout))
+        if response.status_code != 200:
+            self._store_error(url, f"HTTP {response.status_code}")
+            return
+        manifest = _manifest_from_envelope(response.json())
+        if manifest is None:
+            self._store_error(url, "no servicing manifest in reply")
+            return
+        self._store(url, manifest, "")
+
+    def _store(self, url, manifest, etag):
+        with self._lock:
+            entry = self._agents.setdefault(url, DiscoveredAgent(url=url))
+            changed = entry.manifest != manifest or entry.etag != etag
+            entry.manifest = manifest
+            entry.etag = etag
+            entry.fetched_at = time.time()
+            entry.error = ""
+            if changed:
+                self._rebuild_names()
+        if changed:
+            self.save()
+
+    def _store_error(self, url, message):
+        with self._lock:
+            entry = self._agents.setdefault(url, DiscoveredAgent(url=url))
+            entry.error = message
+            # Count the attempt so a dead agent waits for the next refresh round.
+            entry.fetched_at = time.time()
@@ -0,0 +1,270 @@
+"""Background agent health probing and adaptive timeouts for the Assistant Client.
+
+A daemon thread GETs every agent's /health on the transport's background
+pool, several agents at once, every OFP_CLIENT_HEALTH_INTERVAL seconds. For each
+agent the monitor keeps an EWMA and recent percentiles of two latencies: the
+probe itself and the real envelope POSTs (recorded by event_handlers). After
+HEALTH_DEAD_AFTER failed probes in a row an agent is marked down, and
+broadcasts skip it until a probe succeeds again.
+
+timeout_for() turns the observed POST latencies into a per-agent timeout:
+HEALTH_TIMEOUT_MULTIPLIER x p95 plus a margin, capped at HEALTH_MAX_TIMEOUT.
+The caller's fixed timeout is always the floor, so an agent that is usually
+fast still gets the full default for an occasional slow reply; until an
+agent has HEALTH_MIN_SAMPLES POSTs on record the fixed timeout is used as is.
+A POST that times out is not fed back as a sample (it would be capped at the
+timeout that cut it off); instead the agent's next timeouts are doubled from
+the one that expired, up to HEALTH_MAX_TIMEOUT, until a POST succeeds.
+
+Any HTTP answer below 500 counts as alive, so agents without a /health
+route (404) are still probed correctly.
+"""
+
+import math
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import wait
+
+import requests
+
+from transport import get_transport
+
+HEALTH_INTERVAL_SECONDS = float(os.getenv("OFP_CLIENT_HEALTH_INTERVAL", "15"))
+HEALTH_PROBE_TIMEOUT = float(os.getenv("OFP_CLIENT_HEALTH_TIMEOUT", "2"))
+HEALTH_DEAD_AFTER = 2
+HEALTH_EWMA_ALPHA = 0.3
+HEALTH_WINDOW = 50
+HEALTH_MIN_SAMPLES = 5
+HEALTH_TIMEOUT_MULTIPLIER = 2.0
+HEALTH_TIMEOUT_MARGIN = 1.0
+HEALTH_MAX_TIMEOUT = 60.0
+
+HEALTH_UNKNOWN = "unknown"
+HEALTH_UP = "up"
+HEALTH_DOWN = "down"
+
+
+def health_url_for(agent_url):
+    return agent_url.rstrip("/") + "/health"
+
+
+def percentile(samples, pct):
+    """Nearest-rank percentile of a non-empty sequence."""
+    ordered = sorted(samples)
+    rank = max(1, min(len(ordered), math.ceil(pct / 100.0 * len(ordered))))
+    return ordered[rank - 1]
+
+
+class LatencySeries:
+    """EWMA plus a window of recent samples, in seconds."""
+
+    def __init__(self, window=HEALTH_WINDOW, alpha=HEALTH_EWMA_ALPHA):
+        self.alpha = alpha
+        self.ewma = None
+        self.samples = deque(maxlen=window)
+
+    def add(self, seconds):
+        self.samples.append(seconds)
+        self.ewma = seconds if self.ewma is None else self.alpha * seconds + (1 - self.alpha) * self.ewma
+
+    def percentile(self, pct):
+        return percentile(self.samples, pct) if self.samples else None
+
+    def to_dict(self):
+        def _ms(value):
+            return None if value is None else round(value * 1000, 1)
+        return {
+            "samples": len(self.samples),
+            "ewma_ms": _ms(self.ewma),
+            "p50_ms": _ms(self.percentile(50)),
+            "p95_ms": _ms(self.percentile(95)),
+        }
+
+
+class AgentHealth:
+    """Probe results and request latencies for one agent URL."""
+
+    def __init__(self):
+        self.state = HEALTH_UNKNOWN
+        self.consecutive_failures = 0
+        self.last_probe_at = 0.0
+        self.last_error = ""
+        self.probe = LatencySeries()
+        self.requests = LatencySeries()
+        # Set after a POST timed out; cleared by the next successful POST.
+        self.widened_timeout = None
+
+    def to_dict(self):
+        return {
+            "state": self.state,
+            "consecutive_failures": self.consecutive_failures,
+            "last_error": self.last_error,
+            "widened_timeout": self.widened_timeout,
+            "probe": self.probe.to_dict(),
+            "requests": self.requests.to_dict(),
+        }
+
+
+class HealthMonitor:
+    """Per-agent health state, fed by background probes and by real requests."""
+
+    def __init__(self, interval=HEALTH_INTERVAL_SECONDS, probe_timeout=HEALTH_PROBE_TIMEOUT, transport=None):
+        self.interval = interval
+        self.probe_timeout = probe_timeout
+        self._transport = transport
+        self._agents = {}  # {agent_url: AgentHealth}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._urls_provider = None
+        # Bumped whenever an agent goes up or down, so the UI thread can poll for changes.
+        self.version = 0
+
+    @property
+    def transport(self):
+        return self._transport or get_transport()
+
+    def _agent(self, url):
+        # Called with self._lock held.
+        agent = self._agents.get(url)
+        if agent is None:
+            agent = self._agents[url] = AgentHealth()
+        return agent
+
+    def _set_state(self, agent, state):
+        # Called with self._lock held.
+        if agent.state != state:
+            agent.state = state
+            self.version += 1
+
+    # ------------------------------------------------------------------
+    # Recording
+    # ------------------------------------------------------------------
+
+    def record_probe(self, url, elapsed, ok, error=""):
+        with self._lock:
+            agent = self._agent(url)
+            agent.last_probe_at = time.time()
+            if ok:
+                agent.probe.add(elapsed)
+                agent.consecutive_failures = 0
+                agent.last_error = ""
+                self._set_state(agent, HEALTH_UP)
+            else:
+                agent.consecutive_failures += 1
+                agent.last_error = error
+                if agent.consecutive_failures >= HEALTH_DEAD_AFTER:
+                    self._set_state(agent, HEALTH_DOWN)
+
+    def record_request(self, url, elapsed, error=None):
+        """Record one envelope POST; a timeout widens the agent's next timeouts instead of adding a sample."""
+        if not url:
+            return
+        with self._lock:
+            agent = self._agent(url)
+            if error is None:
+                agent.requests.add(elapsed)
+                agent.widened_timeout = None
+                agent.consecutive_failures = 0
+                self._set_state(agent, HEALTH_UP)
+            elif isinstance(error, requests.exceptions.Timeout):
+                agent.widened_timeout = min(HEALTH_MAX_TIMEOUT, max(elapsed, agent.widened_timeout or 0.0) * 2)
+            elif isinstance(error, requests.exceptions.ConnectionError):
+                agent.consecutive_failures += 1
+                agent.last_error = str(error)
+                if agent.consecutive_failures >= HEALTH_DEAD_AFTER:
+                    self._set_state(agent, HEALTH_DOWN)
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def state(self, url):
+        with self._lock:
+            agent = self._agents.get(url)
+            return agent.state if agent is not None else HEALTH_UNKNOWN
+
+    def is_down(self, url):
+        return self.state(url) == HEALTH_DOWN
+
+    def states(self):
+        with self._lock:
+            return {url: agent.state for url, agent in self._agents.items()}
+
+    def timeout_for(self, url, default):
+        """Per-agent request timeout from observed POST latencies; never below `default`."""
+        with self._lock:
+            agent = self._agents.get(url)
+            if agent is None:
+                return default
+            timeout = default
+            if len(agent.requests.samples) >= HEALTH_MIN_SAMPLES:
+                adaptive = HEALTH_TIMEOUT_MULTIPLIER * agent.requests.percentile(95) + HEALTH_TIMEOUT_MARGIN
+                timeout = max(timeout, min(HEALTH_MAX_TIMEOUT, adaptive))
+            if agent.widened_timeout is not None:
+                timeout = max(timeout, agent.widened_timeout)
+        return round(timeout, 2)
+
+    def stats(self):
+        """Snapshot of every agent's health as plain dicts (for display or /agent_health)."""
+        with self._lock:
+            return {url: agent.to_dict() for url, agent in self._agents.items()}
+
+    # ------------------------------------------------------------------
+    # Probing
+    # ------------------------------------------------------------------
+
+    def probe(self, url):
+        started = time.monotonic()
+        try:
+            response = self.transport.get(health_url_for(url), timeout=self.probe_timeout)
+        except requests.RequestException as exc:
+            self.record_probe(url, time.monotonic() - started, False, str(exc))
+            return
+        elapsed = time.monotonic() - started
+        if response.status_code >= 500:
+            self.record_probe(url, elapsed, False, f"HTTP {response.status_code}")
+        else:
+            self.record_probe(url, elapsed, True)
+
+    def probe_all(self, urls):
+        """Probe `urls` concurrently; waits about one probe timeout at most."""
+        futures = [self.transport.submit_background(self.probe, url) for url in dict.fromkeys(urls) if url]
+        if futures:
+            wait(futures, timeout=self.probe_timeout + 0.5)
+
+    def start(self, urls_provider):
+        """Probe the URLs returned by `urls_provider()` now and every `interval` seconds, in a daemon thread."""
+        self._urls_provider = urls_provider
+        if self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self._run, name="ofp-health", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _run(self):
+        while True:
+            try:
+                self.probe_all(self._urls_provider())
+            except Exception as exc:
+                print(f"[health] Probe round failed: {exc}")
+            if self._stop.wait(self.interval):
+                return
+
+
+_default_monitor = None
+_default_monitor_lock = threading.Lock()
+
+
+def get_health_monitor():
+    """Return the process-wide health monitor, creating it on first use."""
+    global _default_monitor
+    if _default_monitor is None:
+        with _default_monitor_lock:
+            if _default_monitor is None:
+                _default_monitor = HealthMonitor()
+    return _default_monitor
@@ -5,8 +5,6 @@ import openfloor
 import json
 import requests
 import re
-import threading
-import time
 from datetime import datetime
 import socket
 import traceback
@@ -19,6 +17,9 @@ from openfloor.manifest import Identification
 from known_agents import KNOWN_AGENTS
 import ui_components
 import event_handlers
+from transport import get_transport
+from agent_discovery import AgentDiscovery
+from agent_health import HEALTH_DOWN, HEALTH_UP, get_health_monitor
 
 # -----------------------------------------------------------------------------
 # Networking configuration
@@ -47,6 +48,8 @@ agent_textboxes = []  # List to keep track of individual agent textboxes
 revoked_agents = []  # List to keep track of agents whose floor has been revoked
 agent_checkboxes = {}  # Dictionary to track checkboxes: {agent_url: checkbox_widget}
 manifest_cache = {}  # Dictionary to cache conversational names from manifests: {url: conversational_name}
+streaming_previews = {}  # {agent_url: (speaker_uri, partial utterance text streamed so far)}
+STREAMING_PREVIEW_MARK = "streaming_preview"
 
 ADVISOR_AGENT_NAMES = {"lucky", "prudence"}
 INFORMATION_AGENT_NAMES = {"finn", "financial"}
@@ -59,6 +62,8 @@ AGENT_STATUS_COLORS = {
     AGENT_STATUS_ERROR: "red",
 }
 AGENT_STATUS_PULSE_COLORS = ("#1f9d55", "#3cb371")
+DISCOVERY_POLL_MS = 1000
+HEALTH_POLL_MS = 1000
 
 agent_status_by_url = {}  # {agent_url: idle|working|error}
 agent_status_widgets = {}  # {agent_url: status_dot_widget}
@@ -154,9 +159,19 @@ def refresh_agent_combobox():
 
 KNOWN_AGENT_URLS = _build_known_agent_urls(KNOWN_AGENTS)
 KNOWN_AGENT_NAME_BY_URL = _build_known_agent_name_map(KNOWN_AGENTS)
+KNOWN_AGENT_NAME_BY_ID = {url.rstrip("/").lower(): name for url, name in KNOWN_AGENT_NAME_BY_URL.items()}
 KNOWN_AGENT_DISPLAYS = _build_known_agent_displays(KNOWN_AGENTS)
 KNOWN_AGENT_DISPLAY_TO_URL = _build_display_to_url_map(KNOWN_AGENTS)
 
+# Manifests of known agents, read from the on-disk cache now and refreshed in
+# the background once the UI is up (see _initialize_application_state).
+agent_discovery = AgentDiscovery(
+    KNOWN_AGENT_URLS,
+    sender_uri=client_uri,
+    sender_url=client_url,
+    headers=DEFAULT_REQUEST_HEADERS,
+)
+
 # -----------------------------------------------------------------------------
 # Conversational name and speaker resolution
 # -----------------------------------------------------------------------------
@@ -214,12 +229,11 @@ def _known_name_for_url(target_url):
     if direct_name:
         return direct_name
 
-    normalized_target = _normalize_agent_id(target_url)
-    for known_url, known_name in KNOWN_AGENT_NAME_BY_URL.items():
-        if known_name and _normalize_agent_id(known_url) == normalized_target:
-            return known_name
+    known_name = KNOWN_AGENT_NAME_BY_ID.get(_normalize_agent_id(target_url), "")
+    if known_name:
+        return known_name
 
-    return ""
+    return agent_discovery.name_for(target_url) or ""
 
 
 def _name_from_url_path(url_value):
@@ -266,7 +280,7 @@ def resolve_conversational_name(speaker_uri, target_url=None):
     if normalized_target and normalized_target in manifest_cache:
         return manifest_cache.get(normalized_target)
 
-    return None
+    return agent_discovery.name_for(speaker_uri, target_url)
 
 def resolve_display_name_for_target(target_url, speaker_uri=None):
     target_url = _clean_url_candidate(target_url)
@@ -650,7 +664,7 @@ outgoing_events = []
 print("📱 Creating main window UI...")
 root = ui_components.create_main_window()
 print("✅ Main window created - should be visible now")
-widgets = ui_components.create_ui_elements(root, KNOWN_AGENT_DISPLAYS)
+widgets = ui_components.create_ui_elements(root, [_display_for_url(url) for url in KNOWN_AGENT_URLS])
 print("✅ UI elements created - application ready")
 
 # Extract widget references for easier access
@@ -803,31 +817,13 @@ def _pump_ui_once():
 
 
 def _post_with_ui_pulse(target_url, payload_obj, *, headers=None, timeout=None):
-    result = {}
-
-    def _worker():
-        try:
-            response = requests.post(
-                target_url,
-                json=payload_obj,
-                timeout=timeout,
-                headers=headers,
-            )
-            result["response"] = response
-        except Exception as exc:
-            result["error"] = exc
-
-    worker = threading.Thread(target=_worker, daemon=True)
-    worker.start()
-
-    while worker.is_alive():
-        _pump_ui_once()
-        time.sleep(0.05)
-
-    if "error" in result:
-        raise result["error"]
-
-    return result["response"]
+    return get_transport().post_with_ui_pump(
+        target_url,
+        payload_obj,
+        headers=headers,
+        timeout=timeout,
+        ui_pump_callback=_pump_ui_once,
+    )
 
 
 def update_error_log_visibility():
@@ -883,6 +879,8 @@ def add_invited_agent(agent_url, conversational_name='', update_ui=True):
         conversational_name = manifest_cache[agent_url]
     if not conversational_name:
         conversational_name = KNOWN_AGENT_NAME_BY_URL.get(agent_url, "")
+    if not conversational_name:
+        conversational_name = agent_discovery.name_for(agent_url) or ""
     
     agent_info = {'url': agent_url, 'conversational_name': conversational_name}
     # Check if URL already exists in list
@@ -995,6 +993,48 @@ def update_conversation_history(speaker, text, speaker_uri=None, utterance_id=No
     if line_count >= scroll_threshold_lines:
         conversation_text.see("end")
 
+def _render_streaming_partial(agent_url, text, speaker_uri=None):
+    """Show partial utterance text from a streaming agent below the conversation history.
+
+    The preview is replaced by the numbered utterance once the final envelope
+    has been processed (see _clear_streaming_previews).
+    """
+    if not text:
+        return
+    _previous_uri, streamed_text = streaming_previews.get(agent_url, (None, ""))
+    streaming_previews[agent_url] = (speaker_uri, streamed_text + text)
+    try:
+        conversation_text.configure(state='normal')
+        if STREAMING_PREVIEW_MARK in conversation_text.mark_names():
+            conversation_text.delete(STREAMING_PREVIEW_MARK, "end")
+        else:
+            conversation_text.mark_set(STREAMING_PREVIEW_MARK, "end-1c")
+            conversation_text.mark_gravity(STREAMING_PREVIEW_MARK, "left")
+        for preview_url, (preview_uri, preview_text) in streaming_previews.items():
+            speaker = _resolve_history_speaker_name(resolve_display_name_for_target(preview_url, speaker_uri=preview_uri), preview_uri)
+            separator = "\n\n" if conversation_text.get("1.0", "end-1c") else ""
+            conversation_text.insert("end", f"{separator}... [{speaker.upper()}] {preview_text}")
+        conversation_text.configure(state='disabled')
+        conversation_text.see("end")
+    except Exception:
+        pass
+
+
+def _clear_streaming_previews():
+    """Remove partial utterance previews from the conversation history."""
+    if not streaming_previews:
+        return
+    streaming_previews.clear()
+    try:
+        conversation_text.configure(state='normal')
+        if STREAMING_PREVIEW_MARK in conversation_text.mark_names():
+            conversation_text.delete(STREAMING_PREVIEW_MARK, "end")
+            conversation_text.mark_unset(STREAMING_PREVIEW_MARK)
+        conversation_text.configure(state='disabled')
+    except Exception:
+        pass
+
+
 def grant_floor_to_agent(agent_info, agent_url):
     """Send grant floor message to agent."""
     _set_agent_status(agent_url, AGENT_STATUS_WORKING)
@@ -1441,7 +1481,9 @@ def _send_events_broadcast(event_types, user_input, target_urls, new_invite_urls
             urls_to_send,
             status_callback=_set_agent_status,
             ui_pump_callback=_pump_ui_once,
+            partial_callback=_render_streaming_partial,
         )
+        _clear_streaming_previews()
 
         event_handlers.process_agent_responses(
             root,
@@ -1472,7 +1514,11 @@ def _send_events_broadcast(event_types, user_input, target_urls, new_invite_urls
             build_conversation_callback=build_current_conversation,
         )
 
+        if DEBUG_CONSOLE_HTTP:
+            print("Connection stats:\n" + get_transport().format_connection_stats())
+
     except Exception as e:
+        _clear_streaming_previews()
         _set_status_for_agents(target_urls, AGENT_STATUS_ERROR)
         error_details = traceback.format_exc()
         print(f"Error processing incoming event: {error_details}")
@@ -1509,6 +1555,7 @@ def _process_direct_response_events(response_data, target_url, assistant_url, ad
                 assistant_uri = manifest.get("identification", {}).get("uri", "")
                 manifest_speaker_uri = manifest.get("identification", {}).get("speakerUri", "")
                 manifest_service_url = manifest.get("identification", {}).get("serviceUrl", assistant_url)
+                agent_discovery.remember(target_url, manifest)
 
                 _cache_conversational_name(
                     assistantConversationalName,
@@ -1811,10 +1858,56 @@ def _bind_ui_commands():
         inner_entry.bind("<KP_Enter>", _on_entry_submit, add="+")
 
 
+def _poll_agent_discovery(seen_version=None):
+    """Pick up names found by background discovery on the UI thread."""
+    version = agent_discovery.version
+    if version != seen_version:
+        refresh_agent_combobox()
+        renamed = False
+        for agent_info in invited_agents:
+            if isinstance(agent_info, dict) and not agent_info.get("conversational_name"):
+                name = agent_discovery.name_for(agent_info.get("url"))
+                if name:
+                    agent_info["conversational_name"] = name
+                    renamed = True
+        if renamed:
+            update_agent_textboxes()
+    root.after(DISCOVERY_POLL_MS, _poll_agent_discovery, version)
+
+
+def _health_probe_urls():
+    """Agents the background prober watches: invited agents first, then known ones."""
+    invited_urls = [extract_url_from_agent_info(agent_info) for agent_info in list(invited_agents)]
+    return _build_unique_urls(invited_urls, KNOWN_AGENT_URLS)
+
+
+def _poll_agent_health(seen_version=None, shown_states=None):
+    """Reflect probe results in the agent status dots on the UI thread."""
+    shown_states = {} if shown_states is None else shown_states
+    health = get_health_monitor()
+    version = health.version
+    if version != seen_version:
+        for agent_url, state in health.states().items():
+            if shown_states.get(agent_url) == state:
+                continue
+            shown_states[agent_url] = state
+            if agent_status_by_url.get(agent_url) == AGENT_STATUS_WORKING:
+                continue
+            if state == HEALTH_DOWN:
+                _set_agent_status(agent_url, AGENT_STATUS_ERROR)
+            elif state == HEALTH_UP and agent_status_by_url.get(agent_url) == AGENT_STATUS_ERROR:
+                _set_agent_status(agent_url, AGENT_STATUS_IDLE)
+    root.after(HEALTH_POLL_MS, _poll_agent_health, version, shown_states)
+
+
 def _initialize_application_state():
     """Run one-time startup initialization after UI creation."""
     start_floor_manager()
     update_error_log_visibility()
+    agent_discovery.start()
+    _poll_agent_discovery(agent_discovery.version)
+    get_health_monitor().start(_health_probe_urls)
+    _poll_agent_health()
 
 
 def main():
@@ -4,6 +4,10 @@ import requests
 import socket
 from datetime import date
 import os
+import time
+
+from transport import get_transport
+from agent_health import get_health_monitor
 
 app = Flask(__name__)
 
@@ -17,6 +21,12 @@ authority = socket.getfqdn()
 ip_address = socket.gethostbyname('localhost')  # avoids hostname resolution issues
 client_url = f"http://{ip_address}"
 
+# Agents this client has sent to; the health monitor probes them in the background.
+_probed_urls = set()
+
+def _health_probe_urls():
+    return list(_probed_urls)
+
 def get_current_date_tag_format():
     return date.today().isoformat()
 
@@ -207,12 +217,37 @@ def send_event():
     if not assistant_url or not envelope:
         return jsonify({"error": "assistant_url and envelope are required"}), 400
 
+    health = get_health_monitor()
+    _probed_urls.add(assistant_url)
+    health.start(_health_probe_urls)
+    if health.is_down(assistant_url):
+        return jsonify({"error": f"{assistant_url} is down (health probes failing)"}), 503
+
+    started = time.monotonic()
     try:
-        r = requests.post(assistant_url, json=envelope, timeout=8)
-        r.raise_for_status()
-        return jsonify(r.json())
+        r = get_transport().post(assistant_url, envelope, timeout=health.timeout_for(assistant_url, 8))
     except requests.RequestException as e:
+        health.record_request(assistant_url, time.monotonic() - started, e)
         return jsonify({"error": str(e)}), 502
+    elapsed = time.monotonic() - started
+    if r.status_code >= 400:
+        health.record_request(assistant_url, elapsed)
+        return jsonify({"error": f"{r.status_code} error from {assistant_url}"}), 502
+    try:
+        data = r.json()
+    except ValueError as e:  # requests.JSONDecodeError is also a RequestException
+        health.record_request(assistant_url, elapsed, e)
+        return jsonify({"error": str(e)}), 502
+    health.record_request(assistant_url, elapsed)
+    return jsonify(data)
+
+@app.route("/connection_stats")
+def connection_stats():
+    return jsonify(get_transport().connection_stats())
+
+@app.route("/agent_health")
+def agent_health():
+    return jsonify(get_health_monitor().stats())
 
 if __name__ == "__main__":
     app.run(port=5555)
@@ -1,18 +1,32 @@
 """Event handling and OpenFloor protocol processing for the Assistant Client."""
 
 import json
+import queue
 import requests
-import threading
 import time
 import re
+from concurrent.futures import FIRST_COMPLETED, wait
 from CTkMessagebox import CTkMessagebox
 import ui_components
+from transport import get_transport
+from agent_health import get_health_monitor
 
 DEFAULT_REQUEST_HEADERS = {
     "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64)",
     "Accept": "application/json",
 }
 
+# Phase 1 broadcast tuning: per-request HTTP timeout, overall deadline for a
+# round, and the cap on simultaneous outbound requests.
+BROADCAST_TIMEOUT = 5
+BROADCAST_ROUND_DEADLINE = 8
+BROADCAST_MAX_WORKERS = 16
+
+# Phase 3 forwarding tuning: per-request HTTP timeout and the cap on
+# simultaneous forwarding requests.
+FORWARD_TIMEOUT = 30
+FORWARD_MAX_WORKERS = 8
+
 
 def _normalize_agent_id(value):
     if not value:
@@ -139,41 +153,13 @@ def _prepend_direct_address_context(text, directed_addressee, *, speaker_name=No
 
 
 def _post_with_optional_ui_pump(target_url, payload_obj, *, headers=None, timeout=None, ui_pump_callback=None):
-    if ui_pump_callback is None:
-        return requests.post(
-            target_url,
-            json=payload_obj,
-            timeout=timeout,
-            headers=headers,
-        )
-
-    result = {}
-
-    def _worker():
-        try:
-            result["response"] = requests.post(
-                target_url,
-                json=payload_obj,
-                timeout=timeout,
-                headers=headers,
-            )
-        except Exception as exc:
-            result["error"] = exc
-
-    worker = threading.Thread(target=_worker, daemon=True)
-    worker.start()
-
-    while worker.is_alive():
-        try:
-            ui_pump_callback()
-        except Exception:
-            pass
-        time.sleep(0.05)
-
-    if "error" in result:
-        raise result["error"]
-
-    return result["response"]
+    return get_transport().post_with_ui_pump(
+        target_url,
+        payload_obj,
+        headers=headers,
+        timeout=timeout,
+        ui_pump_callback=ui_pump_callback,
+    )
 
 
 def _extract_response_envelope(response_data):
@@ -202,69 +188,199 @@ def _extract_events_and_sender(response_data):
     return incoming_events, original_sender
 
 
-def send_broadcast_to_agents(payload_obj, urls_to_send, status_callback=None, ui_pump_callback=None):
+def _timed_post(target_url, payload_obj, *, headers=None, timeout=None, on_partial=None):
+    started = time.monotonic()
+    try:
+        if on_partial is not None:
+            response = get_transport().post_stream(
+                target_url,
+                payload_obj,
+                timeout=timeout,
+                headers=headers,
+                on_partial=on_partial,
+            )
+        else:
+            response = get_transport().post(
+                target_url,
+                payload_obj,
+                timeout=timeout,
+                headers=headers,
+            )
+    except Exception as exc:
+        elapsed = time.monotonic() - started
+        get_health_monitor().record_request(target_url, elapsed, exc)
+        return None, exc, elapsed
+    elapsed = time.monotonic() - started
+    get_health_monitor().record_request(target_url, elapsed)
+    return response, None, elapsed
+
+
+def _iter_posts_in_completion_order(posts, *, headers=None, timeout=None, deadline=None, ui_pump_callback=None, max_workers=BROADCAST_MAX_WORKERS, on_partial=None):
+    """POST each (target_url, payload[, tag]) entry concurrently on the shared transport.
+
+    Yields (target_url, response, error, elapsed, tag) tuples as each request
+    finishes (tag is None when the entry had none; it tells apart several
+    envelopes sent to the same URL), so callers can update the UI for fast agents without waiting on
+    slow ones. At most `max_workers` requests are in flight at once. Requests
+    still pending when `deadline` seconds have elapsed are yielded with a
+    `requests.exceptions.Timeout` error and abandoned. When `on_partial` is
+    given, responses are streamed and `on_partial(target_url, partial)` is
+    called from the worker threads for each partial utterance. `timeout` is
+    the fallback; agents with enough history get their adaptive timeout from
+    the health monitor.
+    """
+    posts = [(post[0], post[1], post[2] if len(post) > 2 else None) for post in posts if post[0]]
+    if not posts:
+        return
+
+    transport = get_transport()
+    health = get_health_monitor()
+    queued = list(reversed(posts))
+    pending = {}
+
+    def _submit_next():
+        url, payload, tag = queued.pop()
+        future = transport.submit(
+            _timed_post,
+            url,
+            payload,
+            headers=headers,
+            timeout=timeout if timeout is None else health.timeout_for(url, timeout),
+            on_partial=None if on_partial is None else (lambda partial, url=url: on_partial(url, partial)),
+        )
+        pending[future] = (url, tag)
+
+    try:
+        started = time.monotonic()
+        while queued and len(pending) < max(1, max_workers):
+            _submit_next()
+
+        round_ends_at = None if deadline is None else started + deadline
+        while pending:
+            wait_for = 0.05 if ui_pump_callback is not None else None
+            if round_ends_at is not None:
+                remaining = max(0.0, round_ends_at - time.monotonic())
+                wait_for = remaining if wait_for is None else min(wait_for, remaining)
+
+            done, _ = wait(list(pending), timeout=wait_for, return_when=FIRST_COMPLETED)
+            for future in done:
+                url, tag = pending.pop(future)
+                if queued:
+                    _submit_next()
+                response, error, elapsed = future.result()
+                yield url, response, error, elapsed, tag
+
+            if round_ends_at is not None and (pending or queued) and time.monotonic() >= round_ends_at:
+                abandoned = list(pending.values()) + [(url, tag) for url, _payload, tag in reversed(queued)]
+                for future in pending:
+                    future.cancel()
+                pending.clear()
+                queued.clear()
+                for url, tag in abandoned:
+                    yield url, None, requests.exceptions.Timeout(
+                        f"No response from {url} within the {deadline}s round deadline"
+                    ), time.monotonic() - started, tag
+                break
+
+            if ui_pump_callback is not None:
+                try:
+                    ui_pump_callback()
+                except Exception:
+                    pass
+    finally:
+        for future in pending:
+            future.cancel()
+
+
+def _notify_status(status_callback, target_url, status):
+    if status_callback is None:
+        return
+    try:
+        status_callback(target_url, status)
+    except Exception:
+        pass
+
+
+def send_broadcast_to_agents(payload_obj, urls_to_send, status_callback=None, ui_pump_callback=None, timeout=BROADCAST_TIMEOUT, round_deadline=BROADCAST_ROUND_DEADLINE, partial_callback=None):
     """Phase 1: Send broadcast to all agents and collect their responses.
-    
+
+    All agents are contacted concurrently; responses are collected in the
+    order they arrive. Status callbacks, partial callbacks and error dialogs
+    always run on the calling (UI) thread. Agents the health monitor reports
+    down are skipped, and the round deadline stretches to the longest
+    adaptive per-agent timeout.
+
     Args:
         payload_obj: The JSON payload to send
         urls_to_send: List of URLs to send to
-        
+        timeout: Per-request HTTP timeout in seconds (for agents without latency history)
+        round_deadline: Overall deadline for the whole broadcast in seconds
+        partial_callback: Called as partial_callback(target_url, text, speaker_uri)
+            for each partial utterance when the transport has streaming enabled
+
     Returns:
         list: List of tuples (target_url, response_data, original_sender, incoming_events)
     """
     all_responses = []
-    
+    target_urls = []
+    health = get_health_monitor()
     for target_url in urls_to_send:
-        if status_callback is not None:
-            try:
-                status_callback(target_url, "working")
-            except Exception:
-                pass
-        try:
-            print(f"\nSending broadcast to: {target_url}")
-            response = _post_with_optional_ui_pump(
-                target_url,
-                payload_obj,
-                timeout=5,
-                headers=DEFAULT_REQUEST_HEADERS,
-                ui_pump_callback=ui_pump_callback,
-            )
-            print(f"HTTP status from {target_url}: {response.status_code}")
-            print("Response headers:", dict(response.headers))
-            print("Response text (first 500 chars):", response.text[:500])
-            
-            # Check if response is actually JSON
-            if response.status_code != 200:
-                if status_callback is not None:
-                    try:
-                        status_callback(target_url, "error")
-                    except Exception:
-                        pass
-                CTkMessagebox(
-                    title="Error",
-                    message=f"Server {target_url} returned status {response.status_code}\n\nResponse: {response.text[:200]}",
-                    icon="cancel"
-                )
-                continue
-        except requests.exceptions.ConnectionError as e:
-            if status_callback is not None:
+        if not target_url or target_url in target_urls:
+            continue
+        if health.is_down(target_url):
+            _notify_status(status_callback, target_url, "error")
+            print(f"\nSkipping {target_url}: health probes report it down")
+            continue
+        target_urls.append(target_url)
+
+    if round_deadline is not None and target_urls:
+        round_deadline = max(round_deadline, max(health.timeout_for(url, timeout) for url in target_urls))
+
+    for target_url in target_urls:
+        _notify_status(status_callback, target_url, "working")
+        print(f"\nSending broadcast to: {target_url}")
+
+    on_partial = None
+    pump_callback = ui_pump_callback
+    if partial_callback is not None and get_transport().streaming:
+        # Partials arrive on worker threads; hand them to the UI thread through a queue.
+        partials = queue.Queue()
+
+        def on_partial(target_url, partial):
+            partials.put((target_url, partial))
+
+        def pump_callback():
+            while True:
+                try:
+                    target_url, partial = partials.get_nowait()
+                except queue.Empty:
+                    break
                 try:
-                    status_callback(target_url, "error")
+                    partial_callback(target_url, partial.get("text", ""), partial.get("speakerUri"))
                 except Exception:
                     pass
-            print(f"Connection error for {target_url}: {e}")
+            if ui_pump_callback is not None:
+                ui_pump_callback()
+
+    for target_url, response, error, _elapsed, _tag in _iter_posts_in_completion_order(
+        [(target_url, payload_obj) for target_url in target_urls],
+        headers=DEFAULT_REQUEST_HEADERS,
+        timeout=timeout,
+        deadline=round_deadline,
+        ui_pump_callback=pump_callback,
+        on_partial=on_partial,
+    ):
+        if isinstance(error, requests.exceptions.ConnectionError):
+            _notify_status(status_callback, target_url, "error")
+            print(f"Connection error for {target_url}: {error}")
             CTkMessagebox(
                 title="Connection Error",
                 message=f"Cannot connect to {target_url}\n\nIs the server running?",
                 icon="cancel"
             )
             continue
-        except requests.exceptions.Timeout:
-            if status_callback is not None:
-                try:
-                    status_callback(target_url, "error")
-                except Exception:
-                    pass
+        if isinstance(error, requests.exceptions.Timeout):
+            _notify_status(status_callback, target_url, "error")
             print(f"Timeout connecting to {target_url}")
             CTkMessagebox(
                 title="Timeout Error",
@@ -272,28 +388,34 @@ def send_broadcast_to_agents(payload_obj, urls_to_send, status_callback=None, ui
                 icon="cancel"
             )
             continue
-        except Exception as e:
-            if status_callback is not None:
-                try:
-                    status_callback(target_url, "error")
-                except Exception:
-                    pass
-            print(f"Error sending to {target_url}: {e}")
+        if error is not None:
+            _notify_status(status_callback, target_url, "error")
+            print(f"Error sending to {target_url}: {error}")
             CTkMessagebox(
                 title="Error",
-                message=f"Error sending to {target_url}: {str(e)}",
+                message=f"Error sending to {target_url}: {str(error)}",
                 icon="cancel"
             )
             continue
-            
+
+        print(f"HTTP status from {target_url}: {response.status_code}")
+        print("Response headers:", dict(response.headers))
+        print("Response text (first 500 chars):", response.text[:500])
+
+        # Check if response is actually JSON
+        if response.status_code != 200:
+            _notify_status(status_callback, target_url, "error")
+            CTkMessagebox(
+                title="Error",
+                message=f"Server {target_url} returned status {response.status_code}\n\nResponse: {response.text[:200]}",
+                icon="cancel"
+            )
+            continue
+
         try:
             response_data = response.json()
         except json.JSONDecodeError as e:
-            if status_callback is not None:
-                try:
-                    status_callback(target_url, "error")
-                except Exception:
-                    pass
+            _notify_status(status_callback, target_url, "error")
             print(f"JSON decode error for {target_url}: {e}")
             CTkMessagebox(
                 title="Error",
@@ -303,18 +425,14 @@ def send_broadcast_to_agents(payload_obj, urls_to_send, status_callback=None, ui
             print(f"Full response text: {response.text}")
             continue
 
-        if status_callback is not None:
-            try:
-                status_callback(target_url, "idle")
-            except Exception:
-                pass
-            
+        _notify_status(status_callback, target_url, "idle")
+
         print("Response JSON:", json.dumps(response_data, indent=2))
         incoming_events, original_sender = _extract_events_and_sender(response_data)
-        
+
         # Store response for Phase 2 processing
         all_responses.append((target_url, response_data, original_sender, incoming_events))
-    
+
     return all_responses
 
 
@@ -531,14 +649,45 @@ def process_agent_responses(root, all_responses, floor_manager, update_conversat
             )
 
 
-def forward_responses_to_agents(all_responses, urls_to_send, global_conversation, update_conversation_history_callback, status_callback=None, ui_pump_callback=None, directed_addressee=None, display_name_resolver=None, build_conversation_callback=None):
+def _add_to_forward_batch(batches, peer_url, sender, events, origin):
+    """Queue events for one peer, merging duplicates into a single envelope.
+
+    An envelope has a single sender, so batches are keyed by (peer_url,
+    sender): events from different agents reach the same peer in separate
+    envelopes, each under its original sender.
+    """
+    key = (peer_url, json.dumps(sender, sort_keys=True, default=str))
+    batch = batches.get(key)
+    if batch is None:
+        batch = {"peer_url": peer_url, "sender": sender, "events": [], "seen": set(), "origins": []}
+        batches[key] = batch
+    for event in events:
+        key = json.dumps(event, sort_keys=True, default=str)
+        if key in batch["seen"]:
+            continue
+        batch["seen"].add(key)
+        batch["events"].append(event)
+    batch["origins"].append(origin)
+
+
+def forward_responses_to_agents(all_responses, urls_to_send, global_conversation, update_conversation_history_callback, status_callback=None, ui_pump_callback=None, directed_addressee=None, display_name_resolver=None, build_conversation_callback=None, timeout=FORWARD_TIMEOUT, max_workers=FORWARD_MAX_WORKERS):
     """Phase 3: Forward all responses to all other agents (after processing all initial responses).
-    
+
+    Events bound for the same peer from the same sender are merged into one
+    envelope per (peer, sender) per round, and each round's envelopes are
+    sent concurrently. Replies from the
+    first round are forwarded once more (recursive forwarding) the same way.
+
     Args:
         all_responses: List of response tuples from Phase 1
         urls_to_send: List of all agent URLs
         global_conversation: The global conversation object
         update_conversation_history_callback: Function to update conversation history
+        timeout: Per-request HTTP timeout in seconds
+        max_workers: Maximum number of simultaneous forwarding requests
+
+    Returns:
+        dict: Per-peer request latencies in seconds, in send order
     """
     def _url_from_speaker_uri(speaker_uri):
         if not speaker_uri:
@@ -569,227 +718,236 @@ def forward_responses_to_agents(all_responses, urls_to_send, global_conversation
             for c in getattr(conversation_obj, "conversants", []) or []
         ]
 
+    def _build_payloads(batches):
+        conversation_obj = _current_conversation_state()
+        conversation_payload = {
+            "id": conversation_obj.id,
+            "conversants": _serialize_conversants(conversation_obj)
+        }
+        return [
+            (
+                batch["peer_url"],
+                {
+                    "openFloor": {
+                        "conversation": conversation_payload,
+                        "sender": batch["sender"],  # Preserve original sender, not client
+                        "events": batch["events"]
+                    }
+                },
+                batch_key,
+            )
+            for batch_key, batch in batches.items()
+        ]
+
+    def _send_round(batches, label):
+        health = get_health_monitor()
+        down_peers = {batch["peer_url"] for batch in batches.values() if health.is_down(batch["peer_url"])}
+        for peer_url in down_peers:
+            _notify_status(status_callback, peer_url, "error")
+            print(f"\n=== {label}: skipping {peer_url}, health probes report it down ===")
+        for batch_key in [batch_key for batch_key, batch in batches.items() if batch["peer_url"] in down_peers]:
+            del batches[batch_key]
+
+        for batch in batches.values():
+            peer_url = batch["peer_url"]
+            _notify_status(status_callback, peer_url, "working")
+            print(f"\n=== {label} TO {peer_url} ===")
+            print(f"Number of merged events: {len(batch['events'])}")
+            print(f"Events: {json.dumps(batch['events'], indent=2)}")
+
+        for peer_url, response, error, elapsed, batch_key in _iter_posts_in_completion_order(
+            _build_payloads(batches),
+            headers=DEFAULT_REQUEST_HEADERS,
+            timeout=timeout,
+            ui_pump_callback=ui_pump_callback,
+            max_workers=max_workers,
+        ):
+            latencies.setdefault(peer_url, []).append(elapsed)
+            if error is not None:
+                _notify_status(status_callback, peer_url, "error")
+                print(f"Failed to forward to {peer_url} after {elapsed:.2f}s: {error}")
+                continue
+            print(f"{label} status from {peer_url}: {response.status_code} in {elapsed:.2f}s")
+            _notify_status(status_callback, peer_url, "idle" if response.status_code == 200 else "error")
+            yield peer_url, batches[batch_key], response
+
+    def _record_forwarded_utterances(forward_events, peer_url, current_conversation):
+        for evt in forward_events:
+            if evt.get("eventType") != "utterance":
+                continue
+            # Try both locations for dialogEvent
+            dialog = evt.get("parameters", {}).get("dialogEvent") or evt.get("dialogEvent", {})
+            speaker_uri = dialog.get("speakerUri", "Unknown")
+
+            # Extract text from tokens or values
+            text = None
+            text_feature = dialog.get("features", {}).get("text", {})
+
+            # Try tokens first
+            tokens = text_feature.get("tokens", [])
+            if tokens and isinstance(tokens, list):
+                text = tokens[0].get("value")
+
+            # Fallback to values if tokens not found
+            if not text:
+                values = text_feature.get("values", [])
+                if values and isinstance(values, list):
+                    text = values[0] if isinstance(values[0], str) else values[0].get("value")
+
+            if not text:
+                continue
+
+            # Find speaker name by matching serviceUrl
+            speaker_name = None
+            speaker_service_url = _url_from_speaker_uri(speaker_uri)
+            for c in getattr(current_conversation, "conversants", []) or []:
+                if c.identification.speakerUri == speaker_uri:
+                    speaker_name = c.identification.conversationalName
+                    speaker_service_url = c.identification.serviceUrl or speaker_service_url
+                    break
+
+            # If not found by speakerUri, try by serviceUrl
+            if not speaker_name:
+                for c in getattr(current_conversation, "conversants", []) or []:
+                    if c.identification.serviceUrl == peer_url:
+                        speaker_name = c.identification.conversationalName
+                        speaker_service_url = c.identification.serviceUrl or speaker_service_url
+                        break
+
+            if not speaker_service_url:
+                speaker_service_url = peer_url
+
+            # Update conversation history with utterance ID
+            utterance_id = dialog.get("id")
+            text = _prepend_direct_address_context(
+                text,
+                directed_addressee,
+                speaker_name=speaker_name,
+                speaker_uri=speaker_uri,
+                speaker_service_url=speaker_service_url,
+                display_name_resolver=display_name_resolver,
+            )
+            speaker_display = speaker_name or speaker_service_url or speaker_uri
+            update_conversation_history_callback(
+                speaker_display,
+                text,
+                speaker_uri,
+                utterance_id
+            )
+
+    latencies = {}
+
+    # Round 1: forward every response to all other agents on the floor (OFP requirement)
+    forward_batches = {}
     for target_url, response_data, original_sender, incoming_events in all_responses:
-        current_conversation = _current_conversation_state()
         print(f"\n=== FORWARDING CHECK ===")
         print(f"incoming_events count: {len(incoming_events)}")
         print(f"urls_to_send: {urls_to_send}")
         print(f"target_url: {target_url}")
-        
-        # Forward response to all other agents on the floor (OFP requirement)
-        if incoming_events:
-            other_agents = [url for url in urls_to_send if url != target_url]
-            print(f"other_agents: {other_agents}")
-            if other_agents:
-                # Preserve directed utterances; only strip `to` when events are not directed.
-                forward_was_directed = any(
-                    isinstance(event, dict)
-                    and event.get("eventType") == "utterance"
-                    and isinstance(event.get("to"), dict)
-                    and (event.get("to", {}).get("speakerUri") or event.get("to", {}).get("serviceUrl"))
-                    for event in incoming_events
-                )
+        if not incoming_events:
+            continue
+
+        other_agents = [url for url in urls_to_send if url != target_url]
+        print(f"other_agents: {other_agents}")
+        if not other_agents:
+            continue
+
+        # Preserve directed utterances; only strip `to` when events are not directed.
+        forward_was_directed = any(
+            isinstance(event, dict)
+            and event.get("eventType") == "utterance"
+            and isinstance(event.get("to"), dict)
+            and (event.get("to", {}).get("speakerUri") or event.get("to", {}).get("serviceUrl"))
+            for event in incoming_events
+        )
+
+        broadcast_events = []
+        for event in incoming_events:
+            event_copy = event.copy() if isinstance(event, dict) else event
+            if (
+                isinstance(event_copy, dict)
+                and not forward_was_directed
+                and event_copy.get("eventType") == "utterance"
+                and 'to' in event_copy
+            ):
+                del event_copy['to']
+            broadcast_events.append(event_copy)
+
+        for other_agent_url in other_agents:
+            _add_to_forward_batch(
+                forward_batches,
+                other_agent_url,
+                original_sender,
+                broadcast_events,
+                (target_url, original_sender, forward_was_directed),
+            )
+
+    # Round 2: forward the replies from round 1 (recursive forwarding)
+    recursive_batches = {}
+    current_conversation = _current_conversation_state()
+    for other_agent_url, forwarded_batch, forward_response in _send_round(forward_batches, "FORWARDING"):
+        # Check what the agent returned
+        try:
+            forward_response_data = forward_response.json()
+        except ValueError:
+            print(f"Forward response text: {forward_response.text[:500]}")
+            continue
+        if not isinstance(forward_response_data, dict):
+            continue
+
+        forward_events = forward_response_data.get("openFloor", {}).get("events", [])
+        print(f"Agent returned {len(forward_events)} events: {json.dumps(forward_events, indent=2)}")
+
+        # If agent responded with new utterances, update conversation history
+        _record_forwarded_utterances(forward_events, other_agent_url, current_conversation)
+        if not forward_events:
+            continue
 
-                broadcast_events = []
-                for event in incoming_events:
-                    event_copy = event.copy() if isinstance(event, dict) else event
-                    if (
-                        isinstance(event_copy, dict)
-                        and not forward_was_directed
-                        and event_copy.get("eventType") == "utterance"
-                        and 'to' in event_copy
+        responding_agent_sender = forward_response_data.get("openFloor", {}).get("sender", {})
+        for source_url, source_sender, forward_was_directed in forwarded_batch["origins"]:
+            # For directed utterances, route replies back to the original sender.
+            if forward_was_directed:
+                other_recipients = [source_url] if source_url != other_agent_url else []
+            else:
+                other_recipients = [url for url in urls_to_send if url != other_agent_url and url != source_url]
+            if not other_recipients:
+                continue
+
+            reply_to_sender = {}
+            if isinstance(source_sender, dict):
+                if source_sender.get("speakerUri"):
+                    reply_to_sender["speakerUri"] = source_sender.get("speakerUri")
+                if source_sender.get("serviceUrl"):
+                    reply_to_sender["serviceUrl"] = source_sender.get("serviceUrl")
+
+            response_broadcast_events = []
+            for evt in forward_events:
+                evt_copy = evt.copy() if isinstance(evt, dict) else evt
+                if isinstance(evt_copy, dict):
+                    if forward_was_directed and evt_copy.get("eventType") == "utterance" and reply_to_sender:
+                        evt_copy["to"] = dict(reply_to_sender)
+                    elif (
+                        not forward_was_directed
+                        and evt_copy.get("eventType") == "utterance"
+                        and 'to' in evt_copy
                     ):
-                        del event_copy['to']
-                    broadcast_events.append(event_copy)
-                
-                # Create the forward payload preserving the original sender
-                forward_payload = {
-                    "openFloor": {
-                        "conversation": {
-                            "id": current_conversation.id,
-                            "conversants": _serialize_conversants(current_conversation)
-                        },
-                        "sender": original_sender,  # Preserve original sender, not client
-                        "events": broadcast_events  # Forward events as broadcasts
-                    }
-                }
-                
-                # Send to all other agents
-                for other_agent_url in other_agents:
-                    try:
-                        if status_callback is not None:
-                            try:
-                                status_callback(other_agent_url, "working")
-                            except Exception:
-                                pass
-                        print(f"\n=== FORWARDING TO {other_agent_url} ===")
-                        print(f"Conversation ID: {current_conversation.id}")
-                        print(f"Number of broadcast events: {len(broadcast_events)}")
-                        print(f"Broadcast events: {json.dumps(broadcast_events, indent=2)}")
-                        forward_response = _post_with_optional_ui_pump(
-                            other_agent_url,
-                            forward_payload,
-                            headers=DEFAULT_REQUEST_HEADERS,
-                            ui_pump_callback=ui_pump_callback,
-                        )
-                        print(f"Forward response status: {forward_response.status_code}")
-                        if status_callback is not None:
-                            try:
-                                if forward_response.status_code == 200:
-                                    status_callback(other_agent_url, "idle")
-                                else:
-                                    status_callback(other_agent_url, "error")
-                            except Exception:
-                                pass
-                        
-                        # Check what the agent returned
-                        try:
-                            forward_response_data = forward_response.json()
-                            forward_events = forward_response_data.get("openFloor", {}).get("events", [])
-                            print(f"Agent returned {len(forward_events)} events: {json.dumps(forward_events, indent=2)}")
-                            
-                            # If agent responded with new utterances, update conversation history
-                            for evt in forward_events:
-                                if evt.get("eventType") == "utterance":
-                                    # Try both locations for dialogEvent
-                                    dialog = evt.get("parameters", {}).get("dialogEvent") or evt.get("dialogEvent", {})
-                                    speaker_uri = dialog.get("speakerUri", "Unknown")
-                                    
-                                    # Extract text from tokens or values
-                                    text = None
-                                    text_feature = dialog.get("features", {}).get("text", {})
-                                    
-                                    # Try tokens first
-                                    tokens = text_feature.get("tokens", [])
-                                    if tokens and isinstance(tokens, list):
-                                        text = tokens[0].get("value")
-                                    
-                                    # Fallback to values if tokens not found
-                                    if not text:
-                                        values = text_feature.get("values", [])
-                                        if values and isinstance(values, list):
-                                            text = values[0] if isinstance(values[0], str) else values[0].get("value")
-                                    
-                                    if text:
-                                        # Find speaker name by matching serviceUrl
-                                        speaker_name = None
-                                        speaker_service_url = _url_from_speaker_uri(speaker_uri)
-                                        for c in getattr(current_conversation, "conversants", []) or []:
-                                            if c.identification.speakerUri == speaker_uri:
-                                                speaker_name = c.identification.conversationalName
-                                                speaker_service_url = c.identification.serviceUrl or speaker_service_url
-                                                break
-                                        
-                                        # If not found by speakerUri, try by serviceUrl
-                                        if not speaker_name:
-                                            for c in getattr(current_conversation, "conversants", []) or []:
-                                                if c.identification.serviceUrl == other_agent_url:
-                                                    speaker_name = c.identification.conversationalName
-                                                    speaker_service_url = c.identification.serviceUrl or speaker_service_url
-                                                    break
-
-                                        if not speaker_service_url:
-                                            speaker_service_url = other_agent_url
-                                        
-                                        # Update conversation history with utterance ID
-                                        utterance_id = dialog.get("id")
-                                        text = _prepend_direct_address_context(
-                                            text,
-                                            directed_addressee,
-                                            speaker_name=speaker_name,
-                                            speaker_uri=speaker_uri,
-                                            speaker_service_url=speaker_service_url,
-                                            display_name_resolver=display_name_resolver,
-                                        )
-                                        speaker_display = speaker_name or speaker_service_url or speaker_uri
-                                        update_conversation_history_callback(
-                                            speaker_display,
-                                            text,
-                                            speaker_uri,
-                                            utterance_id
-                                        )
-                            
-                            # If the agent responded, forward those responses to all other agents (recursive forwarding)
-                            if forward_events:
-                                responding_agent_sender = forward_response_data.get("openFloor", {}).get("sender", {})
-                                # For directed utterances, route replies back to the original sender.
-                                if forward_was_directed:
-                                    other_recipients = [target_url] if target_url != other_agent_url else []
-                                else:
-                                    other_recipients = [url for url in urls_to_send if url != other_agent_url and url != target_url]
-                                
-                                if other_recipients:
-                                    reply_to_sender = {}
-                                    if isinstance(original_sender, dict):
-                                        if original_sender.get("speakerUri"):
-                                            reply_to_sender["speakerUri"] = original_sender.get("speakerUri")
-                                        if original_sender.get("serviceUrl"):
-                                            reply_to_sender["serviceUrl"] = original_sender.get("serviceUrl")
-
-                                    response_broadcast_events = []
-                                    for evt in forward_events:
-                                        evt_copy = evt.copy() if isinstance(evt, dict) else evt
-                                        if isinstance(evt_copy, dict):
-                                            if forward_was_directed and evt_copy.get("eventType") == "utterance" and reply_to_sender:
-                                                evt_copy["to"] = dict(reply_to_sender)
-                                            elif (
-                                                not forward_was_directed
-                                                and evt_copy.get("eventType") == "utterance"
-                                                and 'to' in evt_copy
-                                            ):
-                                                del evt_copy['to']
-                                        response_broadcast_events.append(evt_copy)
-                                    
-                                    # Create payload for recursive forwarding
-                                    recursive_conversation = _current_conversation_state()
-                                    recursive_payload = {
-                                        "openFloor": {
-                                            "conversation": {
-                                                "id": recursive_conversation.id,
-                                                "conversants": _serialize_conversants(recursive_conversation)
-                                            },
-                                            "sender": responding_agent_sender,
-                                            "events": response_broadcast_events
-                                        }
-                                    }
-                                    
-                                    # Forward to all other agents
-                                    for recipient_url in other_recipients:
-                                        try:
-                                            if status_callback is not None:
-                                                try:
-                                                    status_callback(recipient_url, "working")
-                                                except Exception:
-                                                    pass
-                                            print(f"  → Recursive forward from {other_agent_url} to {recipient_url}")
-                                            recursive_response = _post_with_optional_ui_pump(
-                                                recipient_url,
-                                                recursive_payload,
-                                                headers=DEFAULT_REQUEST_HEADERS,
-                                                ui_pump_callback=ui_pump_callback,
-                                            )
-                                            print(f"  → Recursive forward status: {recursive_response.status_code}")
-                                            if status_callback is not None:
-                                                try:
-                                                    if recursive_response.status_code == 200:
-                                                        status_callback(recipient_url, "idle")
-                                                    else:
-                                                        status_callback(recipient_url, "error")
-                                                except Exception:
-                                                    pass
-                                        except Exception as e:
-                                            if status_callback is not None:
-                                                try:
-                                                    status_callback(recipient_url, "error")
-                                                except Exception:
-                                                    pass
-                                            print(f"  → Failed recursive forward to {recipient_url}: {e}")
-                        except:
-                            print(f"Forward response text: {forward_response.text[:500]}")
-                    except Exception as e:
-                        if status_callback is not None:
-                            try:
-                                status_callback(other_agent_url, "error")
-                            except Exception:
-                                pass
-                        print(f"Failed to forward response to {other_agent_url}: {e}")
+                        del evt_copy['to']
+                response_broadcast_events.append(evt_copy)
+
+            for recipient_url in other_recipients:
+                print(f"  → Recursive forward from {other_agent_url} to {recipient_url}")
+                _add_to_forward_batch(
+                    recursive_batches,
+                    recipient_url,
+                    responding_agent_sender,
+                    response_broadcast_events,
+                    (other_agent_url, responding_agent_sender, forward_was_directed),
+                )
+
+    for _recipient_url, _batch, _response in _send_round(recursive_batches, "RECURSIVE FORWARDING"):
+        pass
+
+    for peer_url, peer_latencies in latencies.items():
+        print(f"[forward] {peer_url}: {len(peer_latencies)} request(s), " + ", ".join(f"{value:.2f}s" for value in peer_latencies))
+
+    return latencies
@@ -0,0 +1,52 @@
+"""
+Unit tests for the adaptive request timeouts in agent_health.py.
+
+Run with: python -m pytest -q test_agent_health.py
+"""
+
+import requests
+
+from agent_health import HEALTH_MAX_TIMEOUT, HEALTH_MIN_SAMPLES, HealthMonitor
+
+URL = "http://agent.example/openfloor"
+
+
+def _monitor_with_fast_samples(seconds=0.4, count=HEALTH_MIN_SAMPLES * 2):
+    monitor = HealthMonitor(transport=object())
+    for _ in range(count):
+        monitor.record_request(URL, seconds)
+    return monitor
+
+
+def test_default_without_enough_samples():
+    monitor = HealthMonitor(transport=object())
+    assert monitor.timeout_for(URL, 8) == 8
+    for _ in range(HEALTH_MIN_SAMPLES - 1):
+        monitor.record_request(URL, 0.1)
+    assert monitor.timeout_for(URL, 8) == 8
+
+
+def test_fast_agent_keeps_default_for_one_slow_request():
+    monitor = _monitor_with_fast_samples()
+    # 2 x 0.4s + 1s is below the caller's default, so the default stands.
+    assert monitor.timeout_for(URL, 5) == 5
+    monitor.record_request(URL, 4.5)
+    assert monitor.timeout_for(URL, 5) >= 5
+
+
+def test_slow_samples_raise_timeout_above_default():
+    monitor = _monitor_with_fast_samples(seconds=4.0)
+    assert monitor.timeout_for(URL, 5) == 9.0
+
+
+def test_timeout_widens_until_next_success():
+    monitor = _monitor_with_fast_samples()
+    monitor.record_request(URL, 5.0, requests.exceptions.ReadTimeout("read timed out"))
+    assert monitor.timeout_for(URL, 5) == 10.0
+    assert monitor.stats()[URL]["requests"]["samples"] == HEALTH_MIN_SAMPLES * 2
+    monitor.record_request(URL, 10.0, requests.exceptions.ReadTimeout("read timed out"))
+    monitor.record_request(URL, 20.0, requests.exceptions.ReadTimeout("read timed out"))
+    monitor.record_request(URL, 40.0, requests.exceptions.ReadTimeout("read timed out"))
+    assert monitor.timeout_for(URL, 5) == HEALTH_MAX_TIMEOUT
+    monitor.record_request(URL, 0.4)
+    assert monitor.timeout_for(URL, 5) == 5
@@ -0,0 +1,382 @@
+"""Shared HTTP transport for the Assistant Client's OpenFloor POSTs.
+
+Every envelope the client sends goes through one pooled, keep-alive session
+(one connection pool per agent host) and one shared worker pool, instead of a
+fresh TCP+TLS connection and a fresh thread per request. The transport also
+keeps per-agent connection statistics so the handshake time saved by
+connection reuse can be inspected.
+
+Background work (health probes, manifest discovery) runs on a second, small
+worker pool via submit_background(), so it never holds the workers that
+broadcasts and forwards need: a POST waiting for a worker would spend its
+round deadline in the queue.
+
+HTTP/2 is optional: set OFP_CLIENT_HTTP2=1 and install `httpx[http2]`.
+
+Streaming is optional too: with OFP_CLIENT_STREAMING=1 broadcasts ask agents
+for a server-sent event stream (Accept: text/event-stream) so partial
+utterances can be shown before the final envelope arrives. Agents that do not
+stream simply answer with JSON.
+"""
+
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+try:
+    import httpx
+except ImportError:  # optional dependency, only needed for HTTP/2
+    httpx = None
+
+TRANSPORT_MAX_WORKERS = 16
+TRANSPORT_BACKGROUND_WORKERS = 4
+POOL_MAX_HOSTS = 32
+POOL_MAXSIZE_PER_HOST = 8
+HTTP2_ENABLED = os.getenv("OFP_CLIENT_HTTP2", "").strip().lower() in ("1", "true", "yes")
+STREAMING_ENABLED = os.getenv("OFP_CLIENT_STREAMING", "").strip().lower() in ("1", "true", "yes")
+STREAM_ACCEPT = "text/event-stream, application/json"
+
+_request_trace = threading.local()
+
+
+def _record_handshake(seconds):
+    handshakes = getattr(_request_trace, "handshakes", None)
+    if handshakes is not None:
+        handshakes.append(seconds)
+
+
+class _TimedHTTPConnection(HTTPConnection):
+    def connect(self):
+        started = time.perf_counter()
+        super().connect()
+        _record_handshake(time.perf_counter() - started)
+
+
+class _TimedHTTPSConnection(HTTPSConnection):
+    def connect(self):
+        started = time.perf_counter()
+        super().connect()
+        _record_handshake(time.perf_counter() - started)
+
+
+class _TimedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _TimedHTTPConnection
+
+
+class _TimedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _TimedHTTPSConnection
+
+
+class _TimedHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter whose pools report how long each new connection took to open."""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _TimedHTTPConnectionPool,
+            "https": _TimedHTTPSConnectionPool,
+        }
+
+
+def iter_sse(lines):
+    """Yield (event, data) pairs from an iterable of server-sent event lines."""
+    event, data = "message", []
+    for line in lines:
+        if not line:
+            if data:
+                yield event, "\n".join(data)
+            event, data = "message", []
+            continue
+        if line.startswith(":"):
+            continue
+        field, _, value = line.partition(":")
+        if value.startswith(" "):
+            value = value[1:]
+        if field == "event":
+            event = value
+        elif field == "data":
+            data.append(value)
+    if data:
+        yield event, "\n".join(data)
+
+
+class StreamedResponse:
+    """Final envelope of a streamed POST, usable where a requests.Response is expected."""
+
+    def __init__(self, status_code, headers, text):
+        self.status_code = status_code
+        self.headers = headers
+        self.text = text
+
+    def json(self):
+        return json.loads(self.text)
+
+
+@dataclass
+class AgentConnectionStats:
+    """Connection usage for a single agent URL."""
+    requests: int = 0
+    errors: int = 0
+    new_connections: int = 0
+    reused_connections: int = 0
+    handshake_seconds: float = 0.0
+    request_seconds: float = 0.0
+
+    @property
+    def average_handshake_seconds(self):
+        if not self.new_connections:
+            return 0.0
+        return self.handshake_seconds / self.new_connections
+
+    @property
+    def estimated_seconds_saved(self):
+        """Handshake time avoided by requests that reused a pooled connection."""
+        return self.reused_connections * self.average_handshake_seconds
+
+    def to_dict(self):
+        return {
+            "requests": self.requests,
+            "errors": self.errors,
+            "new_connections": self.new_connections,
+            "reused_connections": self.reused_connections,
+            "average_handshake_seconds": round(self.average_handshake_seconds, 4),
+            "estimated_seconds_saved": round(self.estimated_seconds_saved, 4),
+            "average_request_seconds": round(self.request_seconds / self.requests, 4) if self.requests else 0.0,
+        }
+
+
+class OpenFloorTransport:
+    """Pooled keep-alive HTTP client plus a reusable worker pool."""
+
+    def __init__(self, max_workers=TRANSPORT_MAX_WORKERS, http2=HTTP2_ENABLED, streaming=STREAMING_ENABLED,
+                 background_workers=TRANSPORT_BACKGROUND_WORKERS):
+        self.streaming = streaming
+        self._session = requests.Session()
+        adapter = _TimedHTTPAdapter(pool_connections=POOL_MAX_HOSTS, pool_maxsize=POOL_MAXSIZE_PER_HOST)
+        self._session.mount("http://", adapter)
+        self._session.mount("https://", adapter)
+
+        self._http2_client = None
+        if http2 and httpx is not None:
+            try:
+                self._http2_client = httpx.Client(
+                    http2=True,
+                    limits=httpx.Limits(
+                        max_connections=POOL_MAX_HOSTS * POOL_MAXSIZE_PER_HOST,
+                        max_keepalive_connections=POOL_MAX_HOSTS,
+                    ),
+                )
+            except ImportError:
+                print("[transport] HTTP/2 requested but the 'h2' package is missing; using HTTP/1.1")
+        elif http2:
+            print("[transport] HTTP/2 requested but httpx is not installed; using HTTP/1.1")
+
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="ofp-transport")
+        self._background_executor = ThreadPoolExecutor(max_workers=background_workers, thread_name_prefix="ofp-background")
+        self._stats = {}
+        self._stats_lock = threading.Lock()
+
+    @property
+    def http2(self):
+        return self._http2_client is not None
+
+    def post(self, target_url, payload_obj, *, headers=None, timeout=None):
+        """POST a JSON payload on a pooled connection; raises requests exceptions."""
+        _request_trace.handshakes = []
+        started = time.perf_counter()
+        try:
+            if self._http2_client is not None:
+                response = self._post_http2(target_url, payload_obj, headers=headers, timeout=timeout)
+            else:
+                response = self._session.post(target_url, json=payload_obj, headers=headers, timeout=timeout)
+        except Exception:
+            self._record(target_url, _request_trace.handshakes, time.perf_counter() - started, failed=True)
+            raise
+        finally:
+            handshakes = _request_trace.handshakes
+            _request_trace.handshakes = None
+        self._record(target_url, handshakes, time.perf_counter() - started, failed=False)
+        return response
+
+    def get(self, target_url, *, headers=None, timeout=None):
+        """GET on a pooled HTTP/1.1 connection (e.g. an agent's /manifest); raises requests exceptions."""
+        _request_trace.handshakes = []
+        started = time.perf_counter()
+        try:
+            response = self._session.get(target_url, headers=headers, timeout=timeout)
+        except Exception:
+            self._record(target_url, _request_trace.handshakes, time.perf_counter() - started, failed=True)
+            raise
+        finally:
+            handshakes = _request_trace.handshakes
+            _request_trace.handshakes = None
+        self._record(target_url, handshakes, time.perf_counter() - started, failed=False)
+        return response
+
+    def post_stream(self, target_url, payload_obj, *, headers=None, timeout=None, on_partial=None):
+        """POST asking for a server-sent event stream.
+
+        Each partial utterance ({"speakerUri": ..., "text": ...}) is passed to
+        `on_partial` on the calling thread as it arrives. Returns the final
+        envelope as a StreamedResponse; agents that answer with plain JSON get
+        their response returned unchanged. Streams always use the HTTP/1.1
+        session.
+        """
+        stream_headers = dict(headers or {})
+        stream_headers["Accept"] = STREAM_ACCEPT
+        _request_trace.handshakes = []
+        started = time.perf_counter()
+        try:
+            response = self._session.post(target_url, json=payload_obj, headers=stream_headers, timeout=timeout, stream=True)
+            if "text/event-stream" in response.headers.get("Content-Type", "").lower():
+                response = self._read_event_stream(response, on_partial)
+            else:
+                response.content  # read the whole body before the connection goes back to the pool
+        except Exception:
+            self._record(target_url, _request_trace.handshakes, time.perf_counter() - started, failed=True)
+            raise
+        finally:
+            handshakes = _request_trace.handshakes
+            _request_trace.handshakes = None
+        self._record(target_url, handshakes, time.perf_counter() - started, failed=False)
+        return response
+
+    @staticmethod
+    def _read_event_stream(response, on_partial):
+        final_text = None
+        error_text = None
+        response.encoding = "utf-8"
+        try:
+            for event, data in iter_sse(response.iter_lines(decode_unicode=True)):
+                if event == "utterance" and on_partial is not None:
+                    try:
+                        on_partial(json.loads(data))
+                    except ValueError:
+                        continue
+                elif event == "envelope":
+                    final_text = data
+                elif event == "error":
+                    error_text = data
+        finally:
+            response.close()
+
+        if final_text is not None:
+            return StreamedResponse(response.status_code, response.headers, final_text)
+        if error_text is not None:
+            return StreamedResponse(500, response.headers, error_text)
+        raise requests.exceptions.ChunkedEncodingError(
+            f"Stream from {response.url} ended before the final envelope"
+        )
+
+    def _post_http2(self, target_url, payload_obj, *, headers=None, timeout=None):
+        connect_started = {}
+
+        def _trace(event_name, info):
+            if event_name == "connection.connect_tcp.started":
+                connect_started["at"] = time.perf_counter()
+            elif event_name in ("connection.start_tls.complete", "connection.connect_tcp.complete"):
+                if event_name == "connection.connect_tcp.complete" and target_url.lower().startswith("https://"):
+                    return
+                if "at" in connect_started:
+                    _record_handshake(time.perf_counter() - connect_started.pop("at"))
+
+        try:
+            return self._http2_client.post(
+                target_url,
+                json=payload_obj,
+                headers=headers,
+                timeout=timeout,
+                extensions={"trace": _trace},
+            )
+        except httpx.ConnectTimeout as exc:
+            raise requests.exceptions.ConnectTimeout(str(exc)) from exc
+        except httpx.TimeoutException as exc:
+            raise requests.exceptions.Timeout(str(exc)) from exc
+        except httpx.ConnectError as exc:
+            raise requests.exceptions.ConnectionError(str(exc)) from exc
+        except httpx.HTTPError as exc:
+            raise requests.exceptions.RequestException(str(exc)) from exc
+
+    def submit(self, fn, *args, **kwargs):
+        """Run `fn` on the shared worker pool and return its Future."""
+        return self._executor.submit(fn, *args, **kwargs)
+
+    def submit_background(self, fn, *args, **kwargs):
+        """Run `fn` on the background pool (probes, discovery), leaving the shared pool to envelope POSTs."""
+        return self._background_executor.submit(fn, *args, **kwargs)
+
+    def submit_post(self, target_url, payload_obj, *, headers=None, timeout=None):
+        return self.submit(self.post, target_url, payload_obj, headers=headers, timeout=timeout)
+
+    def post_with_ui_pump(self, target_url, payload_obj, *, headers=None, timeout=None, ui_pump_callback=None):
+        """POST on the worker pool while keeping the UI responsive."""
+        if ui_pump_callback is None:
+            return self.post(target_url, payload_obj, headers=headers, timeout=timeout)
+
+        future = self.submit_post(target_url, payload_obj, headers=headers, timeout=timeout)
+        while not future.done():
+            try:
+                ui_pump_callback()
+            except Exception:
+                pass
+            time.sleep(0.05)
+        return future.result()
+
+    def _record(self, target_url, handshakes, elapsed, *, failed):
+        handshakes = handshakes or []
+        with self._stats_lock:
+            stats = self._stats.setdefault(target_url, AgentConnectionStats())
+            stats.requests += 1
+            stats.request_seconds += elapsed
+            if failed:
+                stats.errors += 1
+            if handshakes:
+                stats.new_connections += len(handshakes)
+                stats.handshake_seconds += sum(handshakes)
+            elif not failed:
+                stats.reused_connections += 1
+
+    def connection_stats(self):
+        """Return a snapshot of per-agent connection statistics as plain dicts."""
+        with self._stats_lock:
+            return {url: stats.to_dict() for url, stats in self._stats.items()}
+
+    def format_connection_stats(self):
+        lines = []
+        for url, stats in sorted(self.connection_stats().items()):
+            lines.append(
+                f"{url}: {stats['requests']} req, {stats['new_connections']} new / "
+                f"{stats['reused_connections']} reused conn, "
+                f"avg handshake {stats['average_handshake_seconds'] * 1000:.0f} ms, "
+                f"saved ~{stats['estimated_seconds_saved']:.2f}s"
+            )
+        return "\n".join(lines)
+
+    def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        self._background_executor.shutdown(wait=False, cancel_futures=True)
+        self._session.close()
+        if self._http2_client is not None:
+            self._http2_client.close()
+
+
+_default_transport = None
+_default_transport_lock = threading.Lock()
+
+
+def get_transport():
+    """Return the process-wide transport, creating it on first use."""
+    global _default_transport
+    if _default_transport is None:
+        with _default_transport_lock:
+            if _default_transport is None:
+                _default_transport = OpenFloorTransport()
+    return _default_transport
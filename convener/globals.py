@@ -1 +1,128 @@
-number_conversants = 1
+"""
+Per-conversation state shared by the envelope, agent and utterance handlers.
+
+One agent process can serve several floors at once, so anything that depends
+on the conversation (number of conversants, turn-taking counters, ...) lives in
+a ConversationContext keyed by conversation id instead of a module global.
+
+- envelope_handler records facts about the incoming envelope with
+  conversations.get(conversation_id)
+- TemplateAgent.process_envelope activates that context with
+  conversation_scope(conversation_id) while the envelope is handled
+- utterance_handler reads it with current_conversation()
+
+Idle conversations expire after CONVERSATION_TTL_SECONDS and the store never
+holds more than MAX_CONVERSATIONS entries (least recently used are dropped).
+
+When the client asked for a streamed response, the server installs a partial
+sink with streaming_partials(callback) and utterance_handler forwards generated
+text to partial_sink() as it arrives.
+"""
+
+import contextvars
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, Optional
+
+CONVERSATION_TTL_SECONDS = 60 * 60
+MAX_CONVERSATIONS = 1000
+
+
+class ConversationContext:
+    """State for a single conversation (floor)."""
+
+    def __init__(self, conversation_id: Optional[str]):
+        self.conversation_id = conversation_id
+        self.number_conversants = 1
+        self.state: Dict[str, Any] = {}
+        self.lock = threading.RLock()
+        self.last_seen = time.monotonic()
+
+
+class ConversationStore:
+    """Thread-safe map of conversation id -> ConversationContext with TTL and LRU eviction."""
+
+    def __init__(self, ttl_seconds: float = CONVERSATION_TTL_SECONDS, max_conversations: int = MAX_CONVERSATIONS):
+        self.ttl_seconds = ttl_seconds
+        self.max_conversations = max_conversations
+        self._contexts: "OrderedDict[Optional[str], ConversationContext]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, conversation_id: Optional[str]) -> ConversationContext:
+        """Return the context for a conversation, creating it if needed."""
+        now = time.monotonic()
+        with self._lock:
+            self._evict_expired(now)
+            context = self._contexts.get(conversation_id)
+            if context is None:
+                context = ConversationContext(conversation_id)
+                self._contexts[conversation_id] = context
+                while len(self._contexts) > self.max_conversations:
+                    self._contexts.popitem(last=False)
+            else:
+                self._contexts.move_to_end(conversation_id)
+            context.last_seen = now
+            return context
+
+    def discard(self, conversation_id: Optional[str]) -> None:
+        with self._lock:
+            self._contexts.pop(conversation_id, None)
+
+    def _evict_expired(self, now: float) -> None:
+        while self._contexts:
+            oldest_id, oldest = next(iter(self._contexts.items()))
+            if now - oldest.last_seen < self.ttl_seconds:
+                break
+            del self._contexts[oldest_id]
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._contexts)
+
+
+conversations = ConversationStore()
+
+# Used when no envelope is being processed (local tests, scripts).
+_default_context = ConversationContext(None)
+_current_context: "contextvars.ContextVar[Optional[ConversationContext]]" = contextvars.ContextVar(
+    "current_conversation", default=None
+)
+
+
+def current_conversation() -> ConversationContext:
+    """Return the context of the conversation currently being handled."""
+    context = _current_context.get()
+    return context if context is not None else _default_context
+
+
+@contextmanager
+def conversation_scope(conversation_id: Optional[str]) -> Iterator[ConversationContext]:
+    """Make a conversation's context current for the duration of the block."""
+    context = conversations.get(conversation_id)
+    token = _current_context.set(context)
+    try:
+        yield context
+    finally:
+        _current_context.reset(token)
+
+
+_partial_sink: "contextvars.ContextVar[Optional[Callable[[str], None]]]" = contextvars.ContextVar(
+    "partial_sink", default=None
+)
+
+
+def partial_sink() -> Optional[Callable[[str], None]]:
+    """Return the callback for partial utterance text, or None if the response is not streamed."""
+    return _partial_sink.get()
+
+
+@contextmanager
+def streaming_partials(callback: Optional[Callable[[str], None]]) -> Iterator[None]:
+    """Send partial utterance text produced inside the block to `callback`."""
+    token = _partial_sink.set(callback)
+    try:
+        yield
+    finally:
+        _partial_sink.reset(token)
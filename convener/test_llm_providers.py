@@ -0,0 +1,68 @@
+"""
+Unit tests for the LLM provider breaker and its fallback in utterance_handler.py.
+
+Run with: python -m pytest -q test_llm_providers.py
+"""
+
+from types import SimpleNamespace
+
+import httpx
+import openai
+
+import llm_providers
+import utterance_handler
+
+
+def _status_error(cls, status_code):
+    request = httpx.Request("POST", "http://localhost:11434/v1/chat/completions")
+    response = httpx.Response(status_code, request=request)
+    return cls(f"HTTP {status_code}", response=response, body=None)
+
+
+class _FakeClient:
+    def __init__(self, result):
+        self.calls = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+        self._result = result
+
+    def _create(self, **kwargs):
+        self.calls += 1
+        if isinstance(self._result, Exception):
+            raise self._result
+        return self._result
+
+
+def _registry():
+    return llm_providers.ProviderRegistry("auto", "http://localhost:11434/v1", "llama3", "gpt-4o-mini")
+
+
+def test_client_error_is_recorded_without_opening_breaker():
+    registry = _registry()
+    registry.record_failure("ollama", 0.1, _status_error(openai.NotFoundError, 404))
+    health = registry.stats()["ollama"]
+    assert health["failures"] == 1
+    assert health["consecutive_failures"] == 0
+    assert health["available"]
+
+
+def test_provider_failure_opens_breaker():
+    registry = _registry()
+    registry.record_failure("ollama", 0.1, _status_error(openai.InternalServerError, 503))
+    assert not registry.stats()["ollama"]["available"]
+
+
+def test_ollama_404_falls_back_to_openai(monkeypatch):
+    completion = SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content="hello"))])
+    ollama = _FakeClient(_status_error(openai.NotFoundError, 404))
+    openai_client = _FakeClient(completion)
+    monkeypatch.setattr(utterance_handler, "_llm_providers", _registry())
+    monkeypatch.setattr(
+        utterance_handler,
+        "_llm_targets",
+        lambda: [("ollama", ollama, "llama3"), ("openai", openai_client, "gpt-4o-mini")],
+    )
+
+    response = utterance_handler._create_chat_completion([{"role": "user", "content": "hi"}], cache=False)
+
+    assert response is completion
+    assert ollama.calls == 1 and openai_client.calls == 1
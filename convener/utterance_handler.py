@@ -1,9 +1,13 @@
 #!/usr/bin/env python3
 """Utterance handler for Convener."""
 
+import json
 import logging
 import os
+import re
+import time
 from pathlib import Path
+from typing import Callable
 
 from dotenv import load_dotenv
 from openai import OpenAI
@@ -15,7 +19,10 @@ if _preexisting_openai_api_key is None:
 else:
     os.environ["OPENAI_API_KEY"] = _preexisting_openai_api_key
 
+import conversation_memory
 import globals
+import llm_cache
+import llm_providers
 
 logger = logging.getLogger(__name__)
 
@@ -327,27 +334,19 @@ def _ollama_base_url() -> str:
     return base_url
 
 
-def _llm_targets() -> list[tuple[str, OpenAI, str]]:
-    targets: list[tuple[str, OpenAI, str]] = []
-    api_key = (os.environ.get("OPENAI_API_KEY") or "").strip()
-
-    if LLM_PROVIDER in {"auto", "ollama"}:
-        targets.append((
-            "ollama",
-            OpenAI(
-                base_url=_ollama_base_url(),
-                api_key=(os.environ.get("OLLAMA_API_KEY") or "ollama"),
-            ),
-            OLLAMA_MODEL,
-        ))
+_llm_providers = llm_providers.ProviderRegistry(LLM_PROVIDER, _ollama_base_url(), OLLAMA_MODEL, OPENAI_MODEL)
 
-    if api_key and LLM_PROVIDER in {"auto", "openai", "ollama"}:
-        targets.append(("openai", OpenAI(api_key=api_key), OPENAI_MODEL))
 
-    return targets
+def _llm_targets() -> list[tuple[str, OpenAI, str]]:
+    return _llm_providers.targets()
 
 
-def _create_chat_completion(messages: list[dict[str, str]], **kwargs):
+def _create_chat_completion(
+    messages: list[dict[str, str]],
+    cache: bool | None = None,
+    on_delta: Callable[[str], None] | None = None,
+    **kwargs,
+):
     global _last_llm_provider, _last_llm_model
     last_error = None
     query_text = ""
@@ -356,13 +355,38 @@ def _create_chat_completion(messages: list[dict[str, str]], **kwargs):
             query_text = (message.get("content") or "").replace("\n", " ").strip()
             break
 
+    cache_key = None
+    if llm_cache.should_cache(kwargs, cache):
+        cache_key = llm_cache.cache_key(messages, f"{LLM_PROVIDER}:{OLLAMA_MODEL}|{OPENAI_MODEL}", kwargs)
+        cached_text = llm_cache.response_cache.get(cache_key)
+        if cached_text is not None:
+            logger.info("LLM cache hit query=%s", query_text[:120])
+            return llm_cache.cached_completion(cached_text)
+
     for provider, llm_client, model in _llm_targets():
+        started = time.perf_counter()
         try:
-            response = llm_client.chat.completions.create(
-                model=model,
-                messages=messages,
-                **kwargs,
-            )
+            if on_delta is not None:
+                response = llm_providers.collect_stream(
+                    llm_client.chat.completions.create(
+                        model=model,
+                        messages=messages,
+                        stream=True,
+                        **kwargs,
+                    ),
+                    on_delta,
+                )
+            else:
+                response = llm_client.chat.completions.create(
+                    model=model,
+                    messages=messages,
+                    **kwargs,
+                )
+            _llm_providers.record_success(provider, time.perf_counter() - started)
+            if cache_key is not None:
+                response_text = llm_cache.completion_text(response)
+                if response_text:
+                    llm_cache.response_cache.set(cache_key, response_text)
             _last_llm_provider = provider
             _last_llm_model = model
             logger.info(
@@ -373,6 +397,7 @@ def _create_chat_completion(messages: list[dict[str, str]], **kwargs):
             )
             return response
         except Exception as exc:
+            _llm_providers.record_failure(provider, time.perf_counter() - started, exc)
             last_error = exc
             logger.warning("%s request failed: %s", provider, exc)
 
@@ -381,6 +406,64 @@ def _create_chat_completion(messages: list[dict[str, str]], **kwargs):
     return None
 
 
+_UTTERANCE_FIELD_RE = re.compile(r'"utterance"\s*:\s*"')
+
+
+def _decode_partial_json_string(body: str) -> str:
+    """Decode the body of a JSON string literal that may end mid-escape."""
+    for trim in range(0, 7):
+        candidate = body[:len(body) - trim] if trim else body
+        try:
+            return json.loads(f'"{candidate}"')
+        except ValueError:
+            continue
+    return ""
+
+
+class _UtteranceFieldStream:
+    """Forward only the "utterance" value of a streamed JSON reply to `sink`."""
+
+    def __init__(self, sink: Callable[[str], None]):
+        self._sink = sink
+        self._raw = ""
+        self._sent = 0
+        self._closed = False
+
+    def __call__(self, delta: str) -> None:
+        if self._closed:
+            return
+        self._raw += delta
+        match = _UTTERANCE_FIELD_RE.search(self._raw)
+        if match is None:
+            return
+
+        body = self._raw[match.end():]
+        index = 0
+        while index < len(body):
+            if body[index] == "\\":
+                index += 2
+                continue
+            if body[index] == '"':
+                body = body[:index]
+                self._closed = True
+                break
+            index += 1
+
+        text = _decode_partial_json_string(body)
+        if len(text) > self._sent:
+            self._sink(text[self._sent:])
+            self._sent = len(text)
+
+
+def _summarize_turns(previous_summary: str, dropped: list[dict[str, str]]) -> str | None:
+    response = _create_chat_completion(
+        messages=conversation_memory.summary_prompt(previous_summary, dropped),
+        max_tokens=150,
+        temperature=0.0,
+    )
+    return llm_cache.completion_text(response) if response is not None else None
+
+
 def process_utterance(user_text: str, agent_name: str = "Convener", speaker_name: str = "") -> dict:
     """
     Process user input and return a response.
@@ -395,16 +478,26 @@ def process_utterance(user_text: str, agent_name: str = "Convener", speaker_name
         Returns {"utterance": "", "next_action": "none", "target": None, "confidence": 0.0} on failure.
     """
     import json as _json
+    memory = conversation_memory.memory_for(globals.current_conversation(), summarizer=_summarize_turns)
     messages = [
         {"role": "system", "content": SYSTEM_PROMPT},
+        *memory.messages(),
         {"role": "user", "content": user_text},
     ]
 
-    response = _create_chat_completion(messages, temperature=0.7, max_tokens=200)
+    sink = globals.partial_sink()
+    response = _create_chat_completion(
+        messages,
+        on_delta=_UtteranceFieldStream(sink) if sink is not None else None,
+        temperature=0.7,
+        max_tokens=200,
+    )
     if response is None:
         return {"utterance": "I'm sorry, I'm unable to respond right now.", "next_action": "none", "target": None, "confidence": 0.0}
 
     raw = response.choices[0].message.content.strip()
+    # Keep the reply as the model wrote it (JSON), so later turns see the same format.
+    memory.add_exchange(user_text, raw)
     try:
         # Strip markdown code fences if present
         if raw.startswith("```"):
@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+Conversation Memory
+
+Rolling, token-budgeted chat history for LLM prompts. Each conversation keeps
+its own ConversationMemory in its globals.ConversationContext, so memories are
+keyed by conversation id and disappear with the context when the conversation
+goes idle (CONVERSATION_TTL_SECONDS / MAX_CONVERSATIONS in globals.py).
+
+The window holds the most recent turns that fit in the token budget; older
+turns are dropped from the front, never leaving an assistant reply without its
+question. When a summarizer is given (and CONVERSATION_SUMMARY_ENABLED is on),
+dropped turns are folded into a running summary that is sent ahead of the
+window as a system message. The summary is only recomputed when turns are
+dropped, not on every prompt, and the summarizer runs outside the memory's
+lock, so a slow summary never blocks reads or new turns; one summary runs at
+a time, and turns dropped meanwhile are folded in by the next one.
+
+Token counts are estimated (about four characters per token plus a small
+per-message overhead), which is close enough for budgeting prompts.
+
+Usage:
+    memory = conversation_memory.memory_for(globals.current_conversation())
+    messages = [system_prompt, *memory.messages(), {"role": "user", "content": text}]
+    ...
+    memory.add_exchange(text, reply)
+
+Configuration (environment variables):
+    CONVERSATION_HISTORY_MAX_TOKENS    - token budget for history in a prompt (default 1500)
+    CONVERSATION_HISTORY_MAX_MESSAGES  - hard cap on kept messages (default 20)
+    CONVERSATION_SUMMARY_ENABLED       - "true" folds dropped turns into a summary (default "false")
+    CONVERSATION_SUMMARY_MAX_TOKENS    - budget for the summary itself (default 200)
+"""
+
+import logging
+import os
+import threading
+from collections import deque
+from typing import Any, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+CONVERSATION_HISTORY_MAX_TOKENS = int(os.environ.get("CONVERSATION_HISTORY_MAX_TOKENS", 1500))
+CONVERSATION_HISTORY_MAX_MESSAGES = int(os.environ.get("CONVERSATION_HISTORY_MAX_MESSAGES", 20))
+CONVERSATION_SUMMARY_ENABLED = os.environ.get("CONVERSATION_SUMMARY_ENABLED", "false").strip().lower() in {"1", "true", "yes", "on"}
+CONVERSATION_SUMMARY_MAX_TOKENS = int(os.environ.get("CONVERSATION_SUMMARY_MAX_TOKENS", 200))
+
+# Roughly what the chat format adds around each message.
+_MESSAGE_OVERHEAD_TOKENS = 4
+
+# summarizer(previous_summary, dropped_messages) -> new summary text
+Summarizer = Callable[[str, List[Dict[str, str]]], Optional[str]]
+
+
+def estimate_tokens(text: Any) -> int:
+    """Cheap token estimate for one message's content."""
+    return _MESSAGE_OVERHEAD_TOKENS + (len(str(text or "")) + 3) // 4
+
+
+def _truncate_to_tokens(text: str, max_tokens: int) -> str:
+    max_chars = max(0, (max_tokens - _MESSAGE_OVERHEAD_TOKENS) * 4)
+    return text if len(text) <= max_chars else text[:max_chars].rstrip() + "..."
+
+
+class ConversationMemory:
+    """History of one conversation, trimmed to a token budget."""
+
+    def __init__(
+        self,
+        max_tokens: int = CONVERSATION_HISTORY_MAX_TOKENS,
+        max_messages: int = CONVERSATION_HISTORY_MAX_MESSAGES,
+        summarizer: Optional[Summarizer] = None,
+        summary_max_tokens: int = CONVERSATION_SUMMARY_MAX_TOKENS,
+    ):
+        self.max_tokens = max_tokens
+        self.max_messages = max_messages
+        self.summarizer = summarizer if CONVERSATION_SUMMARY_ENABLED else None
+        self.summary_max_tokens = summary_max_tokens
+        self.summary = ""
+        self._window: "deque[tuple[Dict[str, str], int]]" = deque()
+        self._window_tokens = 0
+        # Dropped turns not yet folded into the summary.
+        self._unsummarized: List[Dict[str, str]] = []
+        # Bumped by clear(), so a summary started before it is discarded.
+        self._generation = 0
+        self._lock = threading.Lock()
+        self._summary_lock = threading.Lock()
+
+    def add(self, role: str, content: str) -> None:
+        with self._lock:
+            self._append(role, content)
+            self._trim()
+        self._summarize_pending()
+
+    def add_exchange(self, user_text: str, assistant_text: str) -> None:
+        """Record a user turn and the reply to it."""
+        with self._lock:
+            self._append("user", user_text)
+            self._append("assistant", assistant_text)
+            self._trim()
+        self._summarize_pending()
+
+    def messages(self) -> List[Dict[str, str]]:
+        """History to place between the system prompt and the new user message."""
+        with self._lock:
+            history = [dict(message) for message, _tokens in self._window]
+            if self.summary:
+                history.insert(0, {"role": "system", "content": f"Summary of the earlier conversation: {self.summary}"})
+            return history
+
+    def token_count(self) -> int:
+        with self._lock:
+            return self._window_tokens + (estimate_tokens(self.summary) if self.summary else 0)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._window.clear()
+            self._window_tokens = 0
+            self._unsummarized = []
+            self._generation += 1
+            self.summary = ""
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._window)
+
+    def _append(self, role: str, content: str) -> None:
+        message = {"role": role, "content": str(content or "")}
+        tokens = estimate_tokens(message["content"])
+        self._window.append((message, tokens))
+        self._window_tokens += tokens
+
+    def _trim(self) -> None:
+        budget = self.max_tokens - (estimate_tokens(self.summary) if self.summary else 0)
+        dropped: List[Dict[str, str]] = []
+        while self._window and (self._window_tokens > budget or len(self._window) > self.max_messages):
+            dropped.append(self._pop_oldest())
+        # Do not start the window with a reply whose question was dropped.
+        while self._window and self._window[0][0]["role"] == "assistant":
+            dropped.append(self._pop_oldest())
+        if dropped and self.summarizer is not None:
+            self._unsummarized.extend(dropped)
+
+    def _pop_oldest(self) -> Dict[str, str]:
+        message, tokens = self._window.popleft()
+        self._window_tokens -= tokens
+        return message
+
+    def _summarize_pending(self) -> None:
+        """Fold dropped turns into the summary; called without self._lock held."""
+        if self.summarizer is None or not self._summary_lock.acquire(blocking=False):
+            return
+        try:
+            with self._lock:
+                dropped, self._unsummarized = self._unsummarized, []
+                previous, generation = self.summary, self._generation
+            if not dropped:
+                return
+            try:
+                summary = self.summarizer(previous, dropped)
+            except Exception as exc:
+                logger.warning("Conversation summary failed, keeping the previous one: %s", exc)
+                return
+            if not summary:
+                return
+            # The summary never takes more than half of the history budget.
+            summary = _truncate_to_tokens(summary.strip(), min(self.summary_max_tokens, self.max_tokens // 2))
+            with self._lock:
+                if self._generation == generation:
+                    self.summary = summary
+        finally:
+            self._summary_lock.release()
+
+
+def memory_for(context: Any, summarizer: Optional[Summarizer] = None) -> ConversationMemory:
+    """The ConversationMemory stored in a globals.ConversationContext, created on first use."""
+    with context.lock:
+        memory = context.state.get("memory")
+        if memory is None:
+            memory = ConversationMemory(summarizer=summarizer)
+            context.state["memory"] = memory
+        return memory
+
+
+def summary_prompt(previous_summary: str, dropped: List[Dict[str, str]]) -> List[Dict[str, str]]:
+    """Chat messages asking an LLM to fold dropped turns into the running summary."""
+    transcript = "\n".join(f"{message['role']}: {message['content']}" for message in dropped)
+    return [
+        {
+            "role": "system",
+            "content": (
+                "Summarize the conversation so far in at most three sentences. Keep names, facts, "
+                "requests and decisions a later reply might need; drop pleasantries."
+            ),
+        },
+        {
+            "role": "user",
+            "content": f"Earlier summary: {previous_summary or '(none)'}\n\nNew turns:\n{transcript}",
+        },
+    ]
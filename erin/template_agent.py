@@ -39,6 +39,7 @@ from openfloor.dialog_event import DialogEvent, TextFeature
 
 # Import envelope handling (separated from event handling)
 import envelope_handler
+import globals
 
 # Import the utterance handler (custom logic)
 import utterance_handler
@@ -111,7 +112,8 @@ class BotAgent:
             conversation=Conversation(id=conversation_id),
             sender=Sender(speakerUri=self.speakerUri, serviceUrl=self.serviceUrl),
         )
-        self.on_envelope(in_envelope, out_envelope)
+        with globals.conversation_scope(conversation_id):
+            self.on_envelope(in_envelope, out_envelope)
         return out_envelope
 
     def _is_addressed_to_me(self, event: Any) -> bool:
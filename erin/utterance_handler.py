@@ -17,8 +17,12 @@ And returns:
 All OpenFloor event parsing and envelope construction is handled by template_agent.py.
 """
 
+import conversation_memory
 import globals
+import llm_cache
+import llm_providers
 import os
+import time
 import logging
 from pathlib import Path
 from dotenv import load_dotenv
@@ -48,18 +52,11 @@ def _ollama_base_url() -> str:
     return base_url
 
 
+_llm_providers = llm_providers.ProviderRegistry(LLM_PROVIDER, _ollama_base_url(), OLLAMA_MODEL, OPENAI_MODEL)
+
+
 def _llm_targets() -> list[tuple[str, OpenAI, str]]:
-    targets: list[tuple[str, OpenAI, str]] = []
-    api_key = (os.environ.get("OPENAI_API_KEY") or "").strip()
-    if LLM_PROVIDER in {"auto", "ollama"}:
-        targets.append((
-            "ollama",
-            OpenAI(base_url=_ollama_base_url(), api_key=(os.environ.get("OLLAMA_API_KEY") or "ollama")),
-            OLLAMA_MODEL,
-        ))
-    if api_key and LLM_PROVIDER in {"auto", "openai", "ollama"}:
-        targets.append(("openai", OpenAI(api_key=api_key), OPENAI_MODEL))
-    return targets
+    return _llm_providers.targets()
 
 def process_utterance(user_text: str, agent_name: str = "Agent") -> str:
     """
@@ -134,6 +131,7 @@ def _generate_echo_response(user_text: str, agent_name: str) -> str:
 
 def _call_your_llm(user_text: str, agent_name: str) -> str:
     """Call LLM for responses, trying Ollama first then OpenAI."""
+    memory = conversation_memory.memory_for(globals.current_conversation())
     messages = [
         {
             "role": "system",
@@ -152,19 +150,37 @@ def _call_your_llm(user_text: str, agent_name: str) -> str:
                 "Keep response length to no more than 30 words."
             ),
         },
+        *memory.messages(),
         {"role": "user", "content": user_text},
     ]
+    params = {"temperature": 0.2}
+    cache_key = None
+    if llm_cache.should_cache(params):
+        cache_key = llm_cache.cache_key(messages, f"{LLM_PROVIDER}:{OLLAMA_MODEL}|{OPENAI_MODEL}", params)
+        cached_text = llm_cache.response_cache.get(cache_key)
+        if cached_text is not None:
+            logger.info("LLM cache hit query=%s", user_text[:80])
+            memory.add_exchange(user_text, cached_text.strip())
+            return cached_text.strip()
+
     last_error = None
     for provider, llm_client, model in _llm_targets():
+        started = time.perf_counter()
         try:
             response = llm_client.chat.completions.create(
                 model=model,
                 messages=messages,
-                temperature=0.2,
+                **params,
             )
+            _llm_providers.record_success(provider, time.perf_counter() - started)
             logger.info("LLM provider=%s model=%s query=%s", provider, model, user_text[:80])
-            return response.choices[0].message.content.strip()
+            response_text = response.choices[0].message.content
+            if cache_key is not None and response_text:
+                llm_cache.response_cache.set(cache_key, response_text)
+            memory.add_exchange(user_text, response_text.strip())
+            return response_text.strip()
         except Exception as e:
+            _llm_providers.record_failure(provider, time.perf_counter() - started, e)
             last_error = e
             logger.warning("%s request failed: %s", provider, e)
     logger.error("No LLM provider succeeded: %s", last_error)
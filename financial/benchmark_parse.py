@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Benchmark: per-utterance parsing CPU, before and after the parse-once pipeline.
+
+"before" replays what one Finn utterance used to cost: parse_query() in the
+template agent, again in process_utterance() and again in mcp_server, plus the
+repeated time-phrase and keyword intent checks. "after" is one
+analyze_query() call, measured cold (first sight of the text) and warm
+(memoized, e.g. a repeated question).
+
+Usage:
+    python benchmark_parse.py [--rounds 200]
+"""
+
+import argparse
+import time
+
+import utterance_handler
+from utterance_handler import _resolve_intent, _spacy_parse_query, analyze_query, extract_time_text
+
+UTTERANCES = [
+    "What is the price of Apple?",
+    "Show me Microsoft earnings history",
+    "What is Coca-Cola's latest dividend?",
+    "What are analyst recommendations for NVDA?",
+    "Tell me about Amazon",
+    "What was the price of Tesla on March 3 2024?",
+    "recent news on Alphabet",
+    "What's the level of the Dow?",
+]
+
+
+def parse_before(text):
+    _spacy_parse_query(text)  # template_agent._handle_utterance
+    parsed = _spacy_parse_query(text)  # process_utterance
+    _resolve_intent(text, parsed.get("intent"))
+    extract_time_text(text)
+    extract_time_text(text)  # mcp_server.handler
+    _spacy_parse_query(text)
+
+
+def parse_after_cold(text):
+    utterance_handler._analyze_normalized.cache_clear()
+    analyze_query(text)
+
+
+def parse_after_warm(text):
+    analyze_query(text)
+
+
+def measure(label, fn, rounds):
+    started = time.process_time()
+    for _ in range(rounds):
+        for text in UTTERANCES:
+            fn(text)
+    per_utterance_us = (time.process_time() - started) / (rounds * len(UTTERANCES)) * 1e6
+    print(f"{label:<22} {per_utterance_us:9.1f} us CPU / utterance")
+    return per_utterance_us
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--rounds", type=int, default=200)
+    args = parser.parse_args()
+
+    # Build the spaCy pipeline before timing anything.
+    utterance_handler.warm_up_nlp()
+
+    before = measure("before (3x parse)", parse_before, args.rounds)
+    cold = measure("after, cold", parse_after_cold, args.rounds)
+    warm = measure("after, memoized", parse_after_warm, args.rounds)
+    print(f"saved per utterance: {before - cold:.1f} us cold ({before / cold:.1f}x), "
+          f"{before - warm:.1f} us memoized ({before / warm:.0f}x)")
+
+
+if __name__ == "__main__":
+    main()
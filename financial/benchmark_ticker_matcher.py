@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark: Aho-Corasick fast path vs the spaCy parse_query.
+
+Times symbol/intent extraction per utterance three ways: the spaCy entity
+ruler + Matcher alone, the TickerMatcher scan alone, and parse_query (fast
+path, falling back to spaCy when the intent is ambiguous). Also reports how
+often the fast path had to defer to spaCy.
+
+Usage:
+    python benchmark_ticker_matcher.py [--rounds 200]
+"""
+
+import argparse
+import time
+
+import utterance_handler
+from utterance_handler import _fast_parse, _spacy_parse_query, extract_symbols, parse_query
+
+UTTERANCES = [
+    "What is the price of Apple?",
+    "AAPL quote",
+    "Show me Microsoft earnings history",
+    "What is Coca-Cola's latest dividend?",
+    "What are analyst recommendations for NVDA?",
+    "Tell me about Amazon",
+    "What was the price of Tesla on March 3 2024?",
+    "recent news on Alphabet",
+    "What's the level of the Dow?",
+    "how are JPMorgan Chase and Bank of America trading today",
+    "what's the weather like in Paris",
+    "thanks, that's all",
+]
+
+
+def measure(label, fn, rounds):
+    started = time.process_time()
+    for _ in range(rounds):
+        for text in UTTERANCES:
+            fn(text)
+    per_utterance_us = (time.process_time() - started) / (rounds * len(UTTERANCES)) * 1e6
+    print(f"{label:<28} {per_utterance_us:9.1f} us CPU / utterance")
+    return per_utterance_us
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--rounds", type=int, default=200)
+    args = parser.parse_args()
+
+    # Build both matchers before timing anything.
+    utterance_handler.warm_up_nlp()
+    extract_symbols(UTTERANCES[0])
+
+    spacy_us = measure("spaCy parse_query", _spacy_parse_query, args.rounds)
+    scan_us = measure("TickerMatcher symbols only", extract_symbols, args.rounds)
+    fast_us = measure("parse_query (fast path)", parse_query, args.rounds)
+
+    deferred = sum(_fast_parse(text) is None for text in UTTERANCES)
+    print(f"deferred to spaCy: {deferred}/{len(UTTERANCES)} utterances")
+    print(f"speed-up: {spacy_us / scan_us:.1f}x symbol scan, {spacy_us / fast_us:.1f}x parse_query")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+"""
+Candle Store - local daily candles for HISTORY_QUERY
+
+Keeps each symbol's daily candles as NumPy arrays (one .npz file per symbol)
+together with the time ranges already fetched from Finnhub. A history
+question then only needs the parts of its range that are not on disk yet;
+repeated questions about the same ticker and period are answered locally.
+The current (still trading) day is never marked as fetched, so it is
+refreshed on every request that reaches it.
+
+compute_analytics() derives period return, annualized volatility, moving
+averages and max drawdown from the closes with vectorized NumPy.
+
+Usage:
+    store = CandleStore("candles")
+    gaps = store.missing_ranges("AAPL", from_ts, to_ts)
+    store.merge("AAPL", finnhub_candle_json, gap_from, gap_to)   # for each gap
+    result = store.get("AAPL", from_ts, to_ts)                    # Finnhub-shaped + "stats"
+
+Configuration (environment variables):
+    FINNHUB_CANDLE_DIR  - where the .npz files live (default ./candles next to this file)
+"""
+
+import logging
+import os
+import re
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+FINNHUB_CANDLE_DIR = Path(os.environ.get("FINNHUB_CANDLE_DIR") or Path(__file__).parent / "candles")
+
+FIELDS = ("t", "o", "h", "l", "c", "v")
+TRADING_DAYS_PER_YEAR = 252
+MOVING_AVERAGE_WINDOWS = (20, 50, 200)
+_DAY_SECONDS = 86400
+
+
+def _start_of_today() -> int:
+    now = int(time.time())
+    return now - now % _DAY_SECONDS
+
+
+def _merge_intervals(intervals: np.ndarray) -> np.ndarray:
+    """Union of closed [start, end] second intervals; touching intervals are joined."""
+    if len(intervals) == 0:
+        return intervals.reshape(0, 2)
+    intervals = intervals[np.argsort(intervals[:, 0])]
+    merged = [intervals[0].tolist()]
+    for start, end in intervals[1:].tolist():
+        if start <= merged[-1][1] + 1:
+            merged[-1][1] = max(merged[-1][1], end)
+        else:
+            merged.append([start, end])
+    return np.asarray(merged, dtype=np.int64)
+
+
+def compute_analytics(closes: np.ndarray) -> Dict[str, Any]:
+    """Return, volatility, moving averages and max drawdown of a close series."""
+    closes = np.asarray(closes, dtype=np.float64)
+    stats: Dict[str, Any] = {"days": int(closes.size)}
+    if closes.size < 2:
+        return stats
+
+    daily_returns = np.diff(closes) / closes[:-1]
+    running_peak = np.maximum.accumulate(closes)
+    drawdowns = closes / running_peak - 1.0
+
+    stats["return_pct"] = float((closes[-1] / closes[0] - 1.0) * 100)
+    stats["volatility_pct"] = float(daily_returns.std(ddof=1) * np.sqrt(TRADING_DAYS_PER_YEAR) * 100) if daily_returns.size > 1 else None
+    stats["max_drawdown_pct"] = float(drawdowns.min() * 100)
+    stats["high"] = float(closes.max())
+    stats["low"] = float(closes.min())
+
+    cumulative = np.concatenate(([0.0], np.cumsum(closes)))
+    for window in MOVING_AVERAGE_WINDOWS:
+        if closes.size >= window:
+            stats[f"ma{window}"] = float((cumulative[-1] - cumulative[-1 - window]) / window)
+    return stats
+
+
+class _Series:
+    """One symbol's candles (sorted by time) and the second ranges already fetched."""
+
+    def __init__(self, arrays: Optional[Dict[str, np.ndarray]] = None, covered: Optional[np.ndarray] = None):
+        self.arrays = arrays or {field: np.empty(0, dtype=np.int64 if field == "t" else np.float64) for field in FIELDS}
+        self.covered = covered if covered is not None else np.empty((0, 2), dtype=np.int64)
+
+
+class CandleStore:
+    """Per-symbol daily candle cache backed by .npz files."""
+
+    def __init__(self, directory: Path | str = FINNHUB_CANDLE_DIR):
+        self.directory = Path(directory)
+        self._series: Dict[str, _Series] = {}
+        self._lock = threading.Lock()
+
+    def _path(self, symbol: str) -> Path:
+        return self.directory / f"{re.sub(r'[^A-Za-z0-9]+', '_', symbol.upper())}_D.npz"
+
+    def _load(self, symbol: str) -> _Series:
+        key = symbol.upper()
+        series = self._series.get(key)
+        if series is not None:
+            return series
+        series = _Series()
+        path = self._path(key)
+        if path.exists():
+            try:
+                with np.load(path) as data:
+                    series = _Series({field: data[field] for field in FIELDS}, data["covered"])
+            except (OSError, KeyError, ValueError) as exc:
+                logger.warning("Ignoring unreadable candle file %s: %s", path, exc)
+        self._series[key] = series
+        return series
+
+    def missing_ranges(self, symbol: str, from_ts: int, to_ts: int) -> List[Tuple[int, int]]:
+        """Parts of [from_ts, to_ts] that still have to be fetched."""
+        with self._lock:
+            covered = self._load(symbol).covered
+        gaps = []
+        cursor = from_ts
+        for start, end in covered.tolist():
+            if end < cursor or start > to_ts:
+                continue
+            if start > cursor:
+                gaps.append((cursor, start - 1))
+            cursor = max(cursor, end + 1)
+            if cursor > to_ts:
+                break
+        if cursor <= to_ts:
+            gaps.append((cursor, to_ts))
+        return gaps
+
+    def merge(self, symbol: str, candles: Dict[str, Any], from_ts: int, to_ts: int) -> None:
+        """Add a Finnhub /stock/candle reply covering [from_ts, to_ts] and persist it."""
+        fetched = {field: np.asarray(candles.get(field) or [], dtype=np.int64 if field == "t" else np.float64) for field in FIELDS}
+        if candles.get("s") == "ok" and len({array.size for array in fetched.values()}) != 1:
+            raise ValueError(f"Candle arrays for {symbol} have different lengths")
+
+        with self._lock:
+            series = self._load(symbol)
+            if candles.get("s") == "ok" and fetched["t"].size:
+                combined = {field: np.concatenate((series.arrays[field], fetched[field])) for field in FIELDS}
+                # Sorted by time; the newest copy of a timestamp wins (a refetched day replaces its partial candle).
+                _unique, first_in_reversed = np.unique(combined["t"][::-1], return_index=True)
+                keep = combined["t"].size - 1 - first_in_reversed
+                series.arrays = {field: combined[field][keep] for field in FIELDS}
+
+            # Today's candle is still moving; only mark whole past days as fetched.
+            covered_to = min(to_ts, _start_of_today() - 1)
+            if covered_to >= from_ts:
+                series.covered = _merge_intervals(
+                    np.vstack((series.covered, np.asarray([[from_ts, covered_to]], dtype=np.int64)))
+                )
+            self._save(symbol, series)
+
+    def _save(self, symbol: str, series: _Series) -> None:
+        path = self._path(symbol)
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            with tempfile.NamedTemporaryFile(dir=path.parent, suffix=".npz", delete=False) as handle:
+                np.savez(handle, covered=series.covered, **series.arrays)
+            os.replace(handle.name, path)
+        except OSError as exc:
+            logger.warning("Could not save candles for %s: %s", symbol, exc)
+
+    def get(self, symbol: str, from_ts: int, to_ts: int) -> Dict[str, Any]:
+        """Candles in [from_ts, to_ts] shaped like Finnhub's reply, plus "stats" from compute_analytics()."""
+        with self._lock:
+            arrays = self._load(symbol).arrays
+        start = np.searchsorted(arrays["t"], from_ts, side="left")
+        end = np.searchsorted(arrays["t"], to_ts, side="right")
+        window = {field: arrays[field][start:end] for field in FIELDS}
+        if window["t"].size == 0:
+            return {"s": "no_data"}
+        result: Dict[str, Any] = {field: window[field].tolist() for field in FIELDS}
+        result["s"] = "ok"
+        result["stats"] = compute_analytics(window["c"])
+        return result
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""
+Finnhub Response Cache
+
+Sits in front of the Finnhub REST API in mcp_server.py so repeated questions
+about the same symbol do not each spend a request from the per-minute quota.
+
+- Every intent has its own freshness window: quotes go stale in seconds,
+  company profiles, earnings and dividends in hours, reported financials in a
+  day.
+- Concurrent identical requests are coalesced: the first one calls Finnhub
+  and the others await the same result.
+- A token bucket guards the quota. When it is empty, an expired entry is
+  served (stale) instead of failing, provided it is not older than its TTL
+  plus FINNHUB_CACHE_STALE_SECONDS. Stale entries are also served when
+  Finnhub itself returns an error.
+- Hit, miss, stale, coalesced and throttled counters are kept for stats().
+
+Configuration (environment variables):
+    FINNHUB_CACHE_ENABLED         - "false" disables caching (default "true")
+    FINNHUB_CACHE_MAX_ENTRIES     - max cached responses (default 2048)
+    FINNHUB_CACHE_STALE_SECONDS   - how long past its TTL an entry may be served stale (default 600)
+    FINNHUB_RATE_PER_MINUTE       - upstream requests allowed per minute (default 60)
+    FINNHUB_RATE_BURST            - requests allowed back to back (default 30)
+"""
+
+import asyncio
+import logging
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+logger = logging.getLogger(__name__)
+
+FINNHUB_CACHE_ENABLED = os.environ.get("FINNHUB_CACHE_ENABLED", "true").strip().lower() not in {"0", "false", "no", "off"}
+FINNHUB_CACHE_MAX_ENTRIES = int(os.environ.get("FINNHUB_CACHE_MAX_ENTRIES", 2048))
+FINNHUB_CACHE_STALE_SECONDS = float(os.environ.get("FINNHUB_CACHE_STALE_SECONDS", 600))
+FINNHUB_RATE_PER_MINUTE = float(os.environ.get("FINNHUB_RATE_PER_MINUTE", 60))
+FINNHUB_RATE_BURST = float(os.environ.get("FINNHUB_RATE_BURST", 30))
+
+# Seconds a response stays fresh, per intent.
+INTENT_TTL_SECONDS = {
+    "PRICE_QUERY": 15,
+    "NEWS_QUERY": 300,
+    "RECOMMENDATIONS_QUERY": 3600,
+    "HISTORY_QUERY": 3600,
+    "PROFILE_QUERY": 6 * 3600,
+    "EARNINGS_QUERY": 6 * 3600,
+    "DIVIDEND_QUERY": 6 * 3600,
+    "FINANCIAL_QUERY": 24 * 3600,
+}
+DEFAULT_TTL_SECONDS = 60
+
+QUOTA_EXHAUSTED_ERROR = "Finnhub request budget exhausted. Please try again in a few seconds."
+
+
+def is_error(result: Any) -> bool:
+    return isinstance(result, dict) and "error" in result
+
+
+class TokenBucket:
+    """Non-blocking token bucket: rate tokens per second, at most capacity banked."""
+
+    def __init__(self, rate_per_second: float, capacity: float):
+        self.rate = rate_per_second
+        self.capacity = max(1.0, capacity)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+
+    def try_acquire(self) -> bool:
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+        if self._tokens >= 1:
+            self._tokens -= 1
+            return True
+        return False
+
+
+class FinnhubCache:
+    """Per-intent TTL cache with single-flight loads and a quota guard (event-loop only, not thread-safe)."""
+
+    def __init__(
+        self,
+        max_entries: int = FINNHUB_CACHE_MAX_ENTRIES,
+        stale_seconds: float = FINNHUB_CACHE_STALE_SECONDS,
+        rate_per_minute: float = FINNHUB_RATE_PER_MINUTE,
+        burst: float = FINNHUB_RATE_BURST,
+        enabled: bool = FINNHUB_CACHE_ENABLED,
+    ):
+        self.max_entries = max_entries
+        self.stale_seconds = stale_seconds
+        self.enabled = enabled
+        self._bucket = TokenBucket(rate_per_minute / 60.0, burst)
+        # key -> (value, fresh_until, usable_until)
+        self._entries: "OrderedDict[Hashable, tuple[Any, float, float]]" = OrderedDict()
+        self._in_flight: Dict[Hashable, asyncio.Task] = {}
+        self._counters = {"hits": 0, "misses": 0, "stale": 0, "coalesced": 0, "throttled": 0, "errors": 0}
+
+    async def fetch(self, key: Hashable, intent: str, load: Callable[[], Awaitable[Any]]) -> Any:
+        """Return the cached response for key, calling load() (one caller at a time) when needed."""
+        now = time.monotonic()
+        entry = self._lookup(key, now)
+        if entry is not None and self.enabled and entry[1] > now:
+            self._entries.move_to_end(key)
+            self._counters["hits"] += 1
+            return entry[0]
+
+        task = self._in_flight.get(key)
+        if task is not None:
+            self._counters["coalesced"] += 1
+            return await asyncio.shield(task)
+
+        if not self._bucket.try_acquire():
+            if entry is not None:
+                self._counters["stale"] += 1
+                return entry[0]
+            self._counters["throttled"] += 1
+            logger.warning("Finnhub request budget exhausted; rejecting %s", key)
+            return {"error": QUOTA_EXHAUSTED_ERROR}
+
+        self._counters["misses"] += 1
+        task = asyncio.ensure_future(self._load(key, intent, load))
+        self._in_flight[key] = task
+        task.add_done_callback(lambda _task: self._in_flight.pop(key, None))
+        return await asyncio.shield(task)
+
+    async def _load(self, key: Hashable, intent: str, load: Callable[[], Awaitable[Any]]) -> Any:
+        result = await load()
+        if is_error(result):
+            self._counters["errors"] += 1
+            entry = self._lookup(key, time.monotonic())
+            if entry is not None:
+                self._counters["stale"] += 1
+                return entry[0]
+            return result
+        if self.enabled:
+            self._store(key, result, INTENT_TTL_SECONDS.get(intent, DEFAULT_TTL_SECONDS))
+        return result
+
+    def _lookup(self, key: Hashable, now: float) -> Optional[tuple]:
+        entry = self._entries.get(key)
+        if entry is not None and entry[2] <= now:
+            del self._entries[key]
+            return None
+        return entry
+
+    def _store(self, key: Hashable, value: Any, ttl: float) -> None:
+        now = time.monotonic()
+        self._entries[key] = (value, now + ttl, now + ttl + self.stale_seconds)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self._counters["hits"] + self._counters["misses"] + self._counters["stale"] + self._counters["coalesced"]
+        served = lookups - self._counters["misses"]
+        return dict(
+            self._counters,
+            entries=len(self._entries),
+            in_flight=len(self._in_flight),
+            hit_rate=round(served / lookups, 3) if lookups else 0.0,
+        )
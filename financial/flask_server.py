@@ -19,6 +19,7 @@ Requires the MCP server to be running on port 8000:
 import os
 import sys
 import logging
+import threading
 from flask import Flask, request, Response, jsonify
 
 from pathlib import Path
@@ -28,6 +29,7 @@ load_dotenv(dotenv_path=Path(__file__).parent / ".env", override=False)
 # Import our agent components
 from template_agent import TemplateAgent, load_manifest_from_config
 import envelope_handler
+import utterance_handler
 
 
 # Configure logging
@@ -76,6 +78,9 @@ except Exception as e:
     logger.error(f"Failed to initialize agent: {e}")
     sys.exit(1)
 
+# Load the spaCy pipeline in the background so the first query does not pay for it.
+threading.Thread(target=utterance_handler.warm_up_nlp, name="nlp-warm-up", daemon=True).start()
+
 
 @app.route('/', methods=['POST'])
 def handle_envelope():
@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+MCP Client - persistent websocket connection to mcp_server.py
+
+Keeps a small pool of long-lived websocket connections on a background event
+loop, so utterance handling does not pay for a new event loop and a new
+websocket handshake on every query. Each request carries an "id" that the
+server echoes back, which lets many in-flight queries from concurrent Flask
+requests share one connection. Dropped connections are re-opened on demand
+with exponential backoff.
+
+Usage:
+    client = MCPClient("ws://127.0.0.1:8765")
+    result = client.call({"intent": "PRICE_QUERY", "stock": "AAPL"})
+
+Configuration (environment variables):
+    MCP_POOL_SIZE               - websocket connections kept open (default 2)
+    MCP_REQUEST_TIMEOUT         - seconds to wait for a reply (default 30)
+    MCP_CONNECT_TIMEOUT         - seconds to wait for a handshake (default 5)
+    MCP_RECONNECT_MAX_BACKOFF   - longest wait between reconnect attempts (default 10)
+"""
+
+import asyncio
+import itertools
+import json
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, Optional
+
+import websockets
+
+logger = logging.getLogger(__name__)
+
+MCP_POOL_SIZE = int(os.environ.get("MCP_POOL_SIZE", 2))
+MCP_REQUEST_TIMEOUT = float(os.environ.get("MCP_REQUEST_TIMEOUT", 30))
+MCP_CONNECT_TIMEOUT = float(os.environ.get("MCP_CONNECT_TIMEOUT", 5))
+MCP_RECONNECT_MIN_BACKOFF = 0.5
+MCP_RECONNECT_MAX_BACKOFF = float(os.environ.get("MCP_RECONNECT_MAX_BACKOFF", 10))
+
+SERVER_UNAVAILABLE_ERROR = "MCP server is not running. Please start mcp_server.py first."
+
+
+class _Connection:
+    """One websocket plus the requests waiting for a reply on it."""
+
+    def __init__(self, client: "MCPClient"):
+        self._client = client
+        self._websocket = None
+        self._reader: Optional[asyncio.Task] = None
+        self._connect_lock = asyncio.Lock()
+        self._backoff = 0.0
+        self._retry_at = 0.0
+        self.pending: Dict[int, asyncio.Future] = {}
+
+    @property
+    def is_open(self) -> bool:
+        return self._websocket is not None
+
+    async def ensure_open(self) -> None:
+        if self._websocket is not None:
+            return
+        async with self._connect_lock:
+            if self._websocket is not None:
+                return
+            if time.monotonic() < self._retry_at:
+                raise ConnectionRefusedError("Waiting before reconnecting to the MCP server")
+            try:
+                self._websocket = await websockets.connect(
+                    self._client.url,
+                    open_timeout=self._client.connect_timeout,
+                )
+            except (OSError, asyncio.TimeoutError, websockets.exceptions.WebSocketException):
+                self._backoff = min(
+                    MCP_RECONNECT_MAX_BACKOFF,
+                    max(MCP_RECONNECT_MIN_BACKOFF, self._backoff * 2),
+                )
+                self._retry_at = time.monotonic() + self._backoff
+                raise
+            self._backoff = 0.0
+            self._retry_at = 0.0
+            self._reader = asyncio.ensure_future(self._read_replies(self._websocket))
+            logger.info("Connected to MCP server at %s", self._client.url)
+
+    async def send(self, message: str) -> None:
+        try:
+            await self._websocket.send(message)
+        except websockets.exceptions.ConnectionClosed:
+            self._closed(self._websocket)
+            raise
+
+    async def _read_replies(self, websocket) -> None:
+        try:
+            async for message in websocket:
+                try:
+                    reply = json.loads(message)
+                except ValueError:
+                    logger.warning("Ignoring non-JSON message from MCP server")
+                    continue
+                request_id = reply.pop("id", None) if isinstance(reply, dict) else None
+                future = self.pending.pop(request_id, None)
+                if future is None and request_id is None and self.pending:
+                    # Server that does not echo ids: replies arrive in request order.
+                    future = self.pending.pop(next(iter(self.pending)))
+                if future is not None and not future.done():
+                    future.set_result(reply)
+        except websockets.exceptions.ConnectionClosed:
+            pass
+        finally:
+            self._closed(websocket)
+
+    def _closed(self, websocket) -> None:
+        if self._websocket is not websocket:
+            return
+        self._websocket = None
+        logger.warning("Connection to MCP server at %s closed", self._client.url)
+        pending, self.pending = self.pending, {}
+        for future in pending.values():
+            if not future.done():
+                future.set_exception(ConnectionError("MCP server closed the connection"))
+
+    async def close(self) -> None:
+        if self._websocket is not None:
+            await self._websocket.close()
+        if self._reader is not None:
+            await asyncio.gather(self._reader, return_exceptions=True)
+
+
+class MCPClient:
+    """Thread-safe, multiplexed client for the MCP websocket server."""
+
+    def __init__(
+        self,
+        url: str,
+        pool_size: int = MCP_POOL_SIZE,
+        request_timeout: float = MCP_REQUEST_TIMEOUT,
+        connect_timeout: float = MCP_CONNECT_TIMEOUT,
+    ):
+        self.url = url
+        self.pool_size = max(1, pool_size)
+        self.request_timeout = request_timeout
+        self.connect_timeout = connect_timeout
+        self._ids = itertools.count(1)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._connections = []
+        self._start_lock = threading.Lock()
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        if self._loop is not None:
+            return self._loop
+        with self._start_lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                thread = threading.Thread(target=loop.run_forever, name="mcp-client", daemon=True)
+                thread.start()
+                self._connections = [_Connection(self) for _ in range(self.pool_size)]
+                self._loop = loop
+        return self._loop
+
+    def call(self, payload: Dict[str, Any], timeout: Optional[float] = None) -> Dict[str, Any]:
+        """Send one request and wait for its reply; errors come back as {"error": ...}."""
+        timeout = self.request_timeout if timeout is None else timeout
+        future = asyncio.run_coroutine_threadsafe(self._request(payload, timeout), self._ensure_loop())
+        try:
+            return future.result(timeout + self.connect_timeout + 1)
+        except Exception as e:
+            future.cancel()
+            logger.exception("Unexpected error calling MCP websocket server")
+            return {"error": str(e)}
+
+    def _pick_connection(self) -> _Connection:
+        # Fewest requests in flight first; among those, reuse an open connection.
+        return min(self._connections, key=lambda connection: (len(connection.pending), not connection.is_open))
+
+    async def _request(self, payload: Dict[str, Any], timeout: float) -> Dict[str, Any]:
+        connection = self._pick_connection()
+        request_id = next(self._ids)
+        try:
+            await connection.ensure_open()
+            reply = asyncio.get_running_loop().create_future()
+            connection.pending[request_id] = reply
+            await connection.send(json.dumps(dict(payload, id=request_id)))
+            return await asyncio.wait_for(reply, timeout)
+        except asyncio.TimeoutError:
+            logger.error("MCP server at %s did not answer within %ss", self.url, timeout)
+            return {"error": f"MCP server did not respond within {timeout:g} seconds."}
+        except (OSError, websockets.exceptions.WebSocketException):
+            logger.error("Cannot reach MCP websocket server at %s", self.url)
+            return {"error": SERVER_UNAVAILABLE_ERROR}
+        finally:
+            connection.pending.pop(request_id, None)
+
+    async def _close_connections(self) -> None:
+        await asyncio.gather(*(connection.close() for connection in self._connections), return_exceptions=True)
+
+    def close(self) -> None:
+        """Close every connection and stop the background loop."""
+        if self._loop is None:
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(self._close_connections(), self._loop).result(self.connect_timeout)
+        finally:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._loop = None
@@ -1,19 +1,43 @@
 # complete_mcp_stock_server.py
+#
+# Async MCP stock server. Finnhub calls go through one pooled async HTTP
+# client, query parsing (spaCy/dateparser) runs on a worker pool, and each
+# connection handles several messages at once, so a slow upstream call never
+# stalls other clients. Responses are cached per intent, identical
+# concurrent queries share one upstream call and a token bucket keeps us
+# inside the Finnhub quota (see finnhub_cache.py). Daily candles are kept
+# on disk per symbol and only missing date ranges are fetched (candle_store.py).
+#
+# Configuration (environment variables):
+#     FINNHUB_MAX_IN_FLIGHT        - concurrent Finnhub requests (default 8)
+#     FINNHUB_TIMEOUT_SECONDS      - Finnhub request timeout (default 20)
+#     MCP_PARSE_WORKERS            - threads for query parsing (default 4)
+#     MCP_MAX_MESSAGES_PER_CLIENT  - messages handled at once per connection (default 16)
+#     MCP_MAX_BATCH_TASKS          - (intent, stock) tasks accepted in one message (default 10)
+#
+# A message is either one query ({"intent", "stock", ...} or {"text"}) or a
+# batch ({"tasks": [{"intent", "stock"}, ...], "time_text"}) whose tasks are
+# fetched concurrently and answered as {"results": [{"intent", "stock", "data"}, ...]}.
 
 import asyncio
 import json
 import os
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from datetime import datetime
-import requests
+import httpx
 import websockets
 from dotenv import load_dotenv
-from utterance_handler import parse_query, parse_time_range, extract_time_text
+from candle_store import CandleStore
+from finnhub_cache import FinnhubCache
+from utterance_handler import parse_query, parse_time_range, extract_time_text, warm_up_nlp
 
 
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
+# httpx logs every request URL at INFO, and Finnhub URLs carry the API token.
+logging.getLogger("httpx").setLevel(logging.WARNING)
 
 env_path = Path(__file__).parent / ".env"
 load_dotenv(dotenv_path=env_path, override=True)
@@ -22,117 +46,258 @@ load_dotenv(dotenv_path=env_path, override=True)
 # 1. Finnhub API token
 # ---------------------------
 FINNHUB_API_KEY = os.environ.get("FINNHUB_API_KEY")
+FINNHUB_BASE_URL = "https://finnhub.io/api/v1"
+
+FINNHUB_MAX_IN_FLIGHT = int(os.environ.get("FINNHUB_MAX_IN_FLIGHT", 8))
+FINNHUB_TIMEOUT_SECONDS = float(os.environ.get("FINNHUB_TIMEOUT_SECONDS", 20))
+MCP_PARSE_WORKERS = int(os.environ.get("MCP_PARSE_WORKERS", 4))
+MCP_MAX_MESSAGES_PER_CLIENT = int(os.environ.get("MCP_MAX_MESSAGES_PER_CLIENT", 16))
+MCP_MAX_BATCH_TASKS = int(os.environ.get("MCP_MAX_BATCH_TASKS", 10))
+
+RECOMMENDATION_KEYWORDS = ("recommendation", "recommendations", "rating", "ratings", "analyst", "analysts", "sentiment")
+
+# Created in main(): shared HTTP connection pool, upstream bound and parse workers.
+_http_client = None
+_upstream_slots = None
+_parse_executor = ThreadPoolExecutor(max_workers=MCP_PARSE_WORKERS, thread_name_prefix="mcp-parse")
+_finnhub_cache = FinnhubCache()
+_candle_store = CandleStore()
+
 
 # ---------------------------
 # 6. Finnhub API routing
 # ---------------------------
-def query_finnhub(intent, stock, time_text=None):
-    if not FINNHUB_API_KEY:
-        return {"error": "FINNHUB_API_KEY is not set. Add it to financial/.env."}
+def resolve_time_range(time_text=None):
+    """Return (from_ts, to_ts) for a time phrase (CPU-bound: parses dates)."""
+    if time_text:
+        return parse_time_range(time_text)
+    return 1679635200, 1701177600  # fallback 1 year
 
-    base_url = "https://finnhub.io/api/v1"
-    url = None
 
-    if time_text:
-        from_ts, to_ts = parse_time_range(time_text)
-    else:
-        from_ts, to_ts = 1679635200, 1701177600  # fallback 1 year
+def candle_url(stock, from_ts, to_ts):
+    return f"{FINNHUB_BASE_URL}/stock/candle?symbol={stock}&resolution=D&from={from_ts}&to={to_ts}&token={FINNHUB_API_KEY}"
+
+
+def build_finnhub_url(intent, stock, time_text=None):
+    """Return the Finnhub URL for an intent (CPU-bound: may parse dates)."""
+    from_ts, to_ts = resolve_time_range(time_text)
 
     if intent == "PRICE_QUERY":
-        url = f"{base_url}/quote?symbol={stock}&token={FINNHUB_API_KEY}"
-    elif intent == "PROFILE_QUERY":
-        url = f"{base_url}/stock/profile2?symbol={stock}&token={FINNHUB_API_KEY}"
-    elif intent == "FINANCIAL_QUERY":
-        url = f"{base_url}/stock/financials-reported?symbol={stock}&token={FINNHUB_API_KEY}"
-    elif intent == "NEWS_QUERY":
-        url = f"{base_url}/company-news?symbol={stock}&from={datetime.utcfromtimestamp(from_ts).strftime('%Y-%m-%d')}&to={datetime.utcfromtimestamp(to_ts).strftime('%Y-%m-%d')}&token={FINNHUB_API_KEY}"
-    elif intent == "EARNINGS_QUERY":
-        url = f"{base_url}/stock/earnings?symbol={stock}&token={FINNHUB_API_KEY}"
-    elif intent == "DIVIDEND_QUERY":
-        url = f"{base_url}/stock/dividend?symbol={stock}&token={FINNHUB_API_KEY}"
-    elif intent == "RECOMMENDATIONS_QUERY":
-        url = f"{base_url}/stock/recommendation?symbol={stock}&token={FINNHUB_API_KEY}"
-    elif intent == "HISTORY_QUERY":
-        url = f"{base_url}/stock/candle?symbol={stock}&resolution=D&from={from_ts}&to={to_ts}&token={FINNHUB_API_KEY}"
-
-    if url:
-        response = requests.get(url, timeout=20)
-        if response.status_code == 200:
-            return response.json()
-
-        details = ""
-        try:
-            payload = response.json()
-            if isinstance(payload, dict):
-                details = payload.get("error") or payload.get("message") or str(payload)
-            else:
-                details = str(payload)
-        except Exception:
-            details = (response.text or "").strip()
-
-        endpoint = url.split("?")[0]
-
-        if response.status_code in (401, 403):
-            detail_suffix = f" Details: {details}" if details else ""
-            return {
-                "error": (
-                    f"Finnhub access denied ({response.status_code}) for endpoint {endpoint}. "
-                    f"Check FINNHUB_API_KEY and plan permissions.{detail_suffix}"
-                )
-            }
+        return f"{FINNHUB_BASE_URL}/quote?symbol={stock}&token={FINNHUB_API_KEY}"
+    if intent == "PROFILE_QUERY":
+        return f"{FINNHUB_BASE_URL}/stock/profile2?symbol={stock}&token={FINNHUB_API_KEY}"
+    if intent == "FINANCIAL_QUERY":
+        return f"{FINNHUB_BASE_URL}/stock/financials-reported?symbol={stock}&token={FINNHUB_API_KEY}"
+    if intent == "NEWS_QUERY":
+        return f"{FINNHUB_BASE_URL}/company-news?symbol={stock}&from={datetime.utcfromtimestamp(from_ts).strftime('%Y-%m-%d')}&to={datetime.utcfromtimestamp(to_ts).strftime('%Y-%m-%d')}&token={FINNHUB_API_KEY}"
+    if intent == "EARNINGS_QUERY":
+        return f"{FINNHUB_BASE_URL}/stock/earnings?symbol={stock}&token={FINNHUB_API_KEY}"
+    if intent == "DIVIDEND_QUERY":
+        return f"{FINNHUB_BASE_URL}/stock/dividend?symbol={stock}&token={FINNHUB_API_KEY}"
+    if intent == "RECOMMENDATIONS_QUERY":
+        return f"{FINNHUB_BASE_URL}/stock/recommendation?symbol={stock}&token={FINNHUB_API_KEY}"
+    if intent == "HISTORY_QUERY":
+        return candle_url(stock, from_ts, to_ts)
+    return None
+
 
+def _finnhub_error(response, url):
+    details = ""
+    try:
+        payload = response.json()
+        if isinstance(payload, dict):
+            details = payload.get("error") or payload.get("message") or str(payload)
+        else:
+            details = str(payload)
+    except Exception:
+        details = (response.text or "").strip()
+
+    endpoint = url.split("?")[0]
+
+    if response.status_code in (401, 403):
         detail_suffix = f" Details: {details}" if details else ""
-        return {"error": f"Finnhub API error: {response.status_code} ({endpoint}).{detail_suffix}"}
-    return {"error": "No URL for intent"}
+        return {
+            "error": (
+                f"Finnhub access denied ({response.status_code}) for endpoint {endpoint}. "
+                f"Check FINNHUB_API_KEY and plan permissions.{detail_suffix}"
+            )
+        }
+
+    detail_suffix = f" Details: {details}" if details else ""
+    return {"error": f"Finnhub API error: {response.status_code} ({endpoint}).{detail_suffix}"}
+
+
+async def query_finnhub(intent, stock, time_text=None):
+    if not FINNHUB_API_KEY:
+        return {"error": "FINNHUB_API_KEY is not set. Add it to financial/.env."}
+
+    # Keyed on the phrase rather than the URL so cache hits skip date parsing too.
+    key = (intent, stock.upper(), " ".join((time_text or "").split()).lower())
+    return await _finnhub_cache.fetch(key, intent, lambda: _fetch_finnhub(intent, stock, time_text))
+
+
+async def _fetch_finnhub(intent, stock, time_text):
+    loop = asyncio.get_running_loop()
+    if intent == "HISTORY_QUERY":
+        from_ts, to_ts = await loop.run_in_executor(_parse_executor, resolve_time_range, time_text)
+        return await _fetch_history(stock, from_ts, to_ts)
+
+    url = await loop.run_in_executor(_parse_executor, build_finnhub_url, intent, stock, time_text)
+    if not url:
+        return {"error": "No URL for intent"}
+    return await _get_json(url)
+
+
+async def _fetch_history(stock, from_ts, to_ts):
+    """Daily candles for the range, fetching only what the local candle store lacks."""
+    loop = asyncio.get_running_loop()
+    gaps = _candle_store.missing_ranges(stock, from_ts, to_ts)
+    replies = await asyncio.gather(*(_get_json(candle_url(stock, gap_from, gap_to)) for gap_from, gap_to in gaps))
+    for (gap_from, gap_to), reply in zip(gaps, replies):
+        if isinstance(reply, dict) and "error" in reply:
+            return reply
+        await loop.run_in_executor(_parse_executor, _candle_store.merge, stock, reply, gap_from, gap_to)
+    return await loop.run_in_executor(_parse_executor, _candle_store.get, stock, from_ts, to_ts)
+
+
+async def _get_json(url):
+    endpoint = url.split("?")[0]
+    try:
+        async with _upstream_slots:
+            response = await _http_client.get(url)
+    except httpx.TimeoutException:
+        return {"error": f"Finnhub request timed out ({endpoint})."}
+    except httpx.HTTPError as exc:
+        return {"error": f"Finnhub request failed ({endpoint}): {exc}"}
+
+    if response.status_code == 200:
+        return response.json()
+    return _finnhub_error(response, url)
 
 # ---------------------------
 # 7. MCP WebSocket server
 # ---------------------------
-async def handler(websocket):
-    async for message in websocket:
-        try:
-            data = json.loads(message)
-            user_text = data.get("text", "")
+def resolve_request(data):
+    """Fill in intent, stock and time_text from the message (CPU-bound: may run spaCy)."""
+    user_text = data.get("text", "")
+
+    intent = data.get("intent")
+    stock = data.get("stock")
+    time_text = data.get("time_text")
+
+    # The financial agent already ran analyze_query(); trust its fields as-is.
+    if data.get("parsed"):
+        return intent, stock, time_text
+
+    if not time_text and user_text:
+        time_text = extract_time_text(user_text)
+
+    if (not intent or not stock) and user_text:
+        parsed = parse_query(user_text)
+        stock = stock or parsed.get("stock")
+        intent = intent or parsed.get("intent")
+
+    # Guardrail: recommendation/rating language should route to recommendations endpoint.
+    lower_text = (user_text or "").lower()
+    if any(keyword in lower_text for keyword in RECOMMENDATION_KEYWORDS):
+        intent = "RECOMMENDATIONS_QUERY"
 
-            intent = data.get("intent")
-            stock = data.get("stock")
-            time_text = data.get("time_text")
+    return intent, stock, time_text
 
-            if not time_text and user_text:
-                time_text = extract_time_text(user_text)
 
-            if (not intent or not stock) and user_text:
-                parsed = parse_query(user_text)
-                stock = stock or parsed.get("stock")
-                intent = intent or parsed.get("intent")
+async def answer_query(data):
+    loop = asyncio.get_running_loop()
+    intent, stock, time_text = await loop.run_in_executor(_parse_executor, resolve_request, data)
 
-            # Guardrail: recommendation/rating language should route to recommendations endpoint.
-            lower_text = (user_text or "").lower()
-            recommendation_keywords = ("recommendation", "recommendations", "rating", "ratings", "analyst", "analysts", "sentiment")
-            if any(keyword in lower_text for keyword in recommendation_keywords):
-                intent = "RECOMMENDATIONS_QUERY"
+    if intent and stock:
+        finn_data = await query_finnhub(intent, stock, time_text=time_text)
+        return {"intent": intent, "stock": stock, "data": finn_data}
+    return {"error": "Could not parse both intent and stock"}
 
-            if intent and stock:
-                finn_data = query_finnhub(intent, stock, time_text=time_text)
-                response = {"intent": intent, "stock": stock, "data": finn_data}
-            else:
-                response = {"error": "Could not parse both intent and stock"}
 
-        except Exception as exc:
-            logger.exception("Error handling MCP websocket message")
-            response = {"error": f"MCP handler error: {exc}"}
+async def answer_batch(data):
+    """Fetch every (intent, stock) task at once; the cache's quota guard and the upstream bound still apply."""
+    tasks = [task for task in data.get("tasks") or [] if isinstance(task, dict) and task.get("intent") and task.get("stock")]
+    if not tasks:
+        return {"error": "Batch request has no valid intent/stock tasks"}
+    if len(tasks) > MCP_MAX_BATCH_TASKS:
+        logger.warning("Batch of %d tasks truncated to %d", len(tasks), MCP_MAX_BATCH_TASKS)
+        tasks = tasks[:MCP_MAX_BATCH_TASKS]
+
+    time_text = data.get("time_text")
+    results = await asyncio.gather(*(
+        query_finnhub(task["intent"], task["stock"], time_text=task.get("time_text", time_text))
+        for task in tasks
+    ))
+    return {
+        "results": [
+            {"intent": task["intent"], "stock": task["stock"], "data": result}
+            for task, result in zip(tasks, results)
+        ]
+    }
+
+
+async def handle_message(message):
+    request_id = None
+    try:
+        data = json.loads(message)
+        # Clients multiplex requests on one connection; echo the id so replies can be matched.
+        request_id = data.get("id")
+
+        if data.get("action") == "stats":
+            response = {"stats": {"finnhub_cache": _finnhub_cache.stats()}}
+        elif "tasks" in data:
+            response = await answer_batch(data)
+        else:
+            response = await answer_query(data)
+
+    except Exception as exc:
+        logger.exception("Error handling MCP websocket message")
+        response = {"error": f"MCP handler error: {exc}"}
+
+    if request_id is not None:
+        response["id"] = request_id
+    return response
+
+
+async def handler(websocket):
+    slots = asyncio.Semaphore(MCP_MAX_MESSAGES_PER_CLIENT)
+    tasks = set()
+
+    async def _answer(message):
+        try:
+            response = await handle_message(message)
+            await websocket.send(json.dumps(response))
+        except websockets.exceptions.ConnectionClosed:
+            pass
+        finally:
+            slots.release()
 
-        await websocket.send(json.dumps(response))
+    try:
+        async for message in websocket:
+            await slots.acquire()
+            task = asyncio.create_task(_answer(message))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+    finally:
+        for task in tasks:
+            task.cancel()
 
 # ---------------------------
 # 8. Run server
 # ---------------------------
 async def main():
+    global _http_client, _upstream_slots
     if not FINNHUB_API_KEY:
         logger.warning("FINNHUB_API_KEY is not set. Requests to Finnhub will fail until it is configured.")
-    async with websockets.serve(handler, "0.0.0.0", 8765):
-        print("MCP Stock Server running on ws://0.0.0.0:8765")
-        await asyncio.Future()  # run forever
+    _upstream_slots = asyncio.Semaphore(FINNHUB_MAX_IN_FLIGHT)
+    limits = httpx.Limits(max_connections=FINNHUB_MAX_IN_FLIGHT, max_keepalive_connections=FINNHUB_MAX_IN_FLIGHT)
+    async with httpx.AsyncClient(timeout=FINNHUB_TIMEOUT_SECONDS, limits=limits) as client:
+        _http_client = client
+        await asyncio.get_running_loop().run_in_executor(_parse_executor, warm_up_nlp)
+        async with websockets.serve(handler, "0.0.0.0", 8765):
+            print("MCP Stock Server running on ws://0.0.0.0:8765")
+            await asyncio.Future()  # run forever
 
 if __name__ == "__main__":
-    asyncio.run(main())
\ No newline at end of file
+    asyncio.run(main())
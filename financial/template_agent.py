@@ -39,6 +39,7 @@ from openfloor.dialog_event import DialogEvent, TextFeature
 
 # Import envelope handling (separated from event handling)
 import envelope_handler
+import globals
 
 # Import the utterance handler (custom logic)
 import utterance_handler
@@ -111,7 +112,8 @@ class BotAgent:
             conversation=Conversation(id=conversation_id),
             sender=Sender(speakerUri=self.speakerUri, serviceUrl=self.serviceUrl),
         )
-        self.on_envelope(in_envelope, out_envelope)
+        with globals.conversation_scope(conversation_id):
+            self.on_envelope(in_envelope, out_envelope)
         return out_envelope
 
     @staticmethod
@@ -400,14 +402,16 @@ class TemplateAgent(BotAgent):
 
             logger.debug("[UTTERANCE] Received: %s", user_text)
 
-            parsed = utterance_handler.parse_query(user_text)
-            parsed_stock = parsed.get("stock")
-            parsed_intent = parsed.get("intent")
+            # Parsed once here and handed down, so neither the handler nor the MCP server re-parses.
+            parsed = utterance_handler.analyze_query(user_text)
+            parsed_stock = parsed.stock
+            parsed_intent = parsed.matched_intent
             
             # Call utterance handler with just text + plain context - returns text response
             response_text = utterance_handler.process_utterance(
                 user_text,
                 agent_name=self._manifest.identification.conversationalName,
+                parsed=parsed,
             )
             
             if not response_text:
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Ticker Matcher - Aho-Corasick automaton over Finn's symbol and company aliases
+
+Finds every ticker, company name and synonym from utterance_handler's lookup
+tables in one left-to-right pass over the text, whatever the number of
+patterns. Matching is case-insensitive and only accepts matches on word
+boundaries ("Apple" in "Applebee's" does not count). Overlaps are resolved
+the way spaCy's entity ruler resolves them: longest match first, then the
+earliest.
+
+Usage:
+    matcher = TickerMatcher({"apple": "AAPL", "aapl": "AAPL", "s&p 500": "^GSPC"})
+    matcher.find("Apple vs the S&P 500")   # [(0, 5, "AAPL"), (13, 20, "^GSPC")]
+"""
+
+from collections import deque
+from typing import Dict, List, Tuple
+
+
+def _is_word_char(char: str) -> bool:
+    return char.isalnum()
+
+
+class TickerMatcher:
+    """Compiled multi-pattern matcher: lowercase pattern -> symbol."""
+
+    def __init__(self, patterns: Dict[str, str]):
+        # Trie as parallel lists: transitions, failure link, and (length, symbol) outputs per state.
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[Tuple[int, str]]] = [[]]
+
+        for pattern, symbol in patterns.items():
+            key = " ".join(pattern.split()).lower()
+            if key:
+                self._add(key, symbol)
+        self._link()
+
+    def _add(self, pattern: str, symbol: str) -> None:
+        state = 0
+        for char in pattern:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+                self._goto[state][char] = next_state
+            state = next_state
+        self._out[state].append((len(pattern), symbol))
+
+    def _link(self) -> None:
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                link = self._goto[fallback].get(char, 0)
+                self._fail[next_state] = link if link != next_state else 0
+                self._out[next_state] = self._out[next_state] + self._out[self._fail[next_state]]
+
+    def find_all(self, text: str) -> List[Tuple[int, int, str]]:
+        """Every word-bounded match as (start, end, symbol), overlaps included."""
+        lowered = text.lower()
+        size = len(lowered)
+        goto = self._goto
+        fail = self._fail
+        out = self._out
+        matches = []
+        state = 0
+        for index, char in enumerate(lowered):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if not out[state]:
+                continue
+            end = index + 1
+            if end < size and _is_word_char(lowered[end]):
+                continue
+            for length, symbol in out[state]:
+                start = end - length
+                if start == 0 or not _is_word_char(lowered[start - 1]):
+                    matches.append((start, end, symbol))
+        return matches
+
+    def find(self, text: str) -> List[Tuple[int, int, str]]:
+        """Non-overlapping matches in text order (longest first, then leftmost)."""
+        chosen = []
+        taken = set()
+        for start, end, symbol in sorted(self.find_all(text), key=lambda match: (match[0] - match[1], match[0])):
+            if taken.isdisjoint(range(start, end)):
+                chosen.append((start, end, symbol))
+                taken.update(range(start, end))
+        chosen.sort()
+        return chosen
+
+    def symbols(self, text: str) -> List[str]:
+        """Matched symbols in text order, without duplicates."""
+        return list(dict.fromkeys(symbol for _start, _end, symbol in self.find(text)))
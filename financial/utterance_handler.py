@@ -9,18 +9,32 @@ MCP server must be running:
     python mcp_server.py   (starts on ws://127.0.0.1:8765)
 """
 
+import os
 import re
+import calendar
+import time
 import logging
-import asyncio
-import json
 import importlib
-from datetime import datetime, timedelta
-import websockets
+import threading
+from dataclasses import dataclass
+from datetime import date, datetime, timedelta
+from functools import lru_cache
+
+from mcp_client import MCPClient
+from ticker_matcher import TickerMatcher
 
 logger = logging.getLogger(__name__)
 
 MCP_WS_URL = "ws://127.0.0.1:8765"
 
+# Shared by all requests: connections stay open and requests are multiplexed.
+_mcp_client = MCPClient(MCP_WS_URL)
+
+# Distinct normalized utterances whose analysis is memoized.
+FINANCIAL_PARSE_CACHE_SIZE = int(os.environ.get("FINANCIAL_PARSE_CACHE_SIZE", 1024))
+# Most symbols looked up for one utterance ("compare Apple, Microsoft and Nvidia").
+FINANCIAL_MAX_BATCH_SYMBOLS = int(os.environ.get("FINANCIAL_MAX_BATCH_SYMBOLS", 8))
+
 
 # ---------------------------
 # NLP extraction (shared with mcp_server)
@@ -256,20 +270,12 @@ TICKER_LOOKUP.update({v.lower(): k for k, v in INDEX_TRACKING_ETFS.items()})
 TICKER_LOOKUP.update({alias.lower(): ticker for alias, ticker in INDEX_ETF_SYNONYMS.items()})
 
 _NLP_CONTEXT = None
+_NLP_LOCK = threading.Lock()
 
+NLP_BATCH_SIZE = 64
 
-def _get_nlp_context():
-    global _NLP_CONTEXT
-    if _NLP_CONTEXT is not None:
-        return _NLP_CONTEXT
 
-    spacy = importlib.import_module("spacy")
-    matcher_module = importlib.import_module("spacy.matcher")
-    Matcher = matcher_module.Matcher
-
-    # Use a lightweight blank English pipeline and rule-based extraction only.
-    nlp = spacy.blank("en")
-    ruler = nlp.add_pipe("entity_ruler", config={"phrase_matcher_attr": "LOWER"})
+def _ruler_patterns() -> list[dict]:
     ruler_patterns = []
     for ticker, name in FORTUNE_100_STOCKS.items():
         ruler_patterns.append({"label": "STOCK", "pattern": ticker})
@@ -286,8 +292,19 @@ def _get_nlp_context():
         ruler_patterns.append({"label": "STOCK", "pattern": alias})
     for alias in INDEX_ETF_SYNONYMS:
         ruler_patterns.append({"label": "STOCK", "pattern": alias})
-    ruler.add_patterns(ruler_patterns)
+    return ruler_patterns
+
+
+def _build_nlp(spacy):
+    # Use a lightweight blank English pipeline and rule-based extraction only.
+    nlp = spacy.blank("en")
+    ruler = nlp.add_pipe("entity_ruler", config={"phrase_matcher_attr": "LOWER"})
+    ruler.add_patterns(_ruler_patterns())
+    return nlp
+
 
+def _build_matcher(nlp):
+    Matcher = importlib.import_module("spacy.matcher").Matcher
     matcher = Matcher(nlp.vocab)
     stock_entity = [{"ENT_TYPE": "STOCK"}]
 
@@ -325,37 +342,153 @@ def _get_nlp_context():
         [{"LOWER": {"IN": ["financial", "revenue", "profit"]}}, {"LOWER": {"IN": ["history", "performance", "trend"]}}] + stock_entity,
     ])
 
-    _NLP_CONTEXT = {
-        "nlp": nlp,
-        "matcher": matcher,
-    }
+    return matcher
+
+
+def _get_nlp_context():
+    global _NLP_CONTEXT
+    if _NLP_CONTEXT is not None:
+        return _NLP_CONTEXT
+
+    with _NLP_LOCK:
+        if _NLP_CONTEXT is not None:
+            return _NLP_CONTEXT
+
+        started = time.perf_counter()
+        nlp = _build_nlp(importlib.import_module("spacy"))
+        _NLP_CONTEXT = {
+            "nlp": nlp,
+            "matcher": _build_matcher(nlp),
+        }
+        logger.info("NLP pipeline ready in %.2fs", time.perf_counter() - started)
     return _NLP_CONTEXT
 
-TIME_PHRASE_RE = re.compile(r"(from .+ to .+|last \d+ (days|months|years)|this month|this year|yesterday|today|on [a-z0-9,\-/ ]+)", re.IGNORECASE)
 
+def warm_up_nlp() -> None:
+    """Build the NLP pipeline now (at server start) rather than on the first query."""
+    _get_nlp_context()
+
+
+TIME_PHRASE_RE = re.compile(r"(from .+ to .+|last \d+ (days|months|years)|this month|this year|yesterday|today|on [a-z0-9,\-/ ]+)", re.IGNORECASE)
 
-def parse_query(text: str) -> dict:
-    context = _get_nlp_context()
-    nlp = context["nlp"]
-    matcher = context["matcher"]
 
-    doc = nlp(text)
+def _doc_to_result(doc, matcher, vocab) -> dict:
     matches = matcher(doc)
-    result = {"intent": None, "stock": None}
+    result = {"intent": None, "stock": None, "symbols": []}
 
     for ent in doc.ents:
         if ent.label_ == "STOCK":
             ent_text = ent.text.strip()
             mapped_symbol = TICKER_LOOKUP.get(ent_text.lower())
             result["stock"] = mapped_symbol or ent_text.upper()
+            if result["stock"] not in result["symbols"]:
+                result["symbols"].append(result["stock"])
 
     if matches:
         match_id, _start, _end = matches[0]
-        result["intent"] = nlp.vocab.strings[match_id]
+        result["intent"] = vocab.strings[match_id]
 
     return result
 
 
+# ---------------------------
+# Fast path: Aho-Corasick symbol scan + keyword intent, spaCy only when ambiguous
+# ---------------------------
+FINANCIAL_FAST_PARSE = os.environ.get("FINANCIAL_FAST_PARSE", "true").strip().lower() not in {"0", "false", "no", "off"}
+
+# Words that only the spaCy Matcher rules act on (profile, financials, news, history).
+# Their presence means word order matters, so the fast path defers to spaCy.
+_MATCHER_ONLY_WORDS = frozenset({
+    "company", "corporate", "profile", "overview", "details", "about", "tell",
+    "financial", "financials", "statements", "statement", "balance", "sheet", "income", "cash", "flow",
+    "news", "headlines", "articles", "updates",
+    "revenue", "profit", "history", "performance", "trend",
+})
+_WORD_RE = re.compile(r"[a-z]+")
+
+_TICKER_MATCHER = None
+
+
+def _get_ticker_matcher() -> TickerMatcher:
+    global _TICKER_MATCHER
+    if _TICKER_MATCHER is None:
+        # Same patterns as the entity ruler, each mapped to the symbol parse_query would report.
+        _TICKER_MATCHER = TickerMatcher({
+            entry["pattern"]: TICKER_LOOKUP.get(entry["pattern"].lower()) or entry["pattern"].upper()
+            for entry in _ruler_patterns()
+        })
+    return _TICKER_MATCHER
+
+
+def extract_symbols(text: str) -> list[str]:
+    """Every ticker/company/index mentioned in text, as symbols in order of appearance."""
+    return _get_ticker_matcher().symbols(" ".join((text or "").split()))
+
+
+def _fast_parse(text: str) -> dict | None:
+    """
+    parse_query without spaCy, or None when only the spaCy Matcher can decide.
+
+    Every Matcher rule needs a stock plus one of its trigger words, and each
+    trigger word belongs to one keyword family (_has_*_intent) or to
+    _MATCHER_ONLY_WORDS. So with no stock, or with at most one keyword family
+    and no matcher-only word, the Matcher's answer either equals the keyword
+    intent or is None, and _resolve_intent ends up with the same intent.
+    """
+    normalized = " ".join((text or "").split())
+    matches = _get_ticker_matcher().find(normalized)
+    if not matches:
+        return {"intent": None, "stock": None, "symbols": []}
+
+    lower = normalized.lower()
+    if not _MATCHER_ONLY_WORDS.isdisjoint(_WORD_RE.findall(lower)):
+        return None
+    families = [
+        intent
+        for intent, has_intent in (
+            ("RECOMMENDATIONS_QUERY", _has_recommendations_intent),
+            ("DIVIDEND_QUERY", _has_dividend_intent),
+            ("EARNINGS_QUERY", _has_earnings_intent),
+            ("PRICE_QUERY", _has_price_intent),
+        )
+        if has_intent(lower)
+    ]
+    if len(families) > 1:
+        return None
+
+    symbols = list(dict.fromkeys(symbol for _start, _end, symbol in matches))
+    return {"intent": families[0] if families else None, "stock": matches[-1][2], "symbols": symbols}
+
+
+def parse_query(text: str) -> dict:
+    if FINANCIAL_FAST_PARSE:
+        result = _fast_parse(text)
+        if result is not None:
+            return result
+    return _spacy_parse_query(text)
+
+
+def _spacy_parse_query(text: str) -> dict:
+    context = _get_nlp_context()
+    nlp = context["nlp"]
+    return _doc_to_result(nlp(text), context["matcher"], nlp.vocab)
+
+
+def parse_queries(texts, batch_size: int = NLP_BATCH_SIZE) -> list[dict]:
+    """Batch version of parse_query for bulk and offline evaluation (uses nlp.pipe)."""
+    texts = list(texts)
+    results = [_fast_parse(text) if FINANCIAL_FAST_PARSE else None for text in texts]
+    pending = [index for index, result in enumerate(results) if result is None]
+    if pending:
+        context = _get_nlp_context()
+        nlp = context["nlp"]
+        matcher = context["matcher"]
+        docs = nlp.pipe((texts[index] for index in pending), batch_size=batch_size)
+        for index, doc in zip(pending, docs):
+            results[index] = _doc_to_result(doc, matcher, nlp.vocab)
+    return results
+
+
 def get_stock_display_name(symbol: str) -> str:
     """Return a human-readable stock/index name for prompts."""
     if not symbol:
@@ -372,31 +505,108 @@ def get_stock_display_name(symbol: str) -> str:
     return normalized
 
 
-def parse_time_range(text: str) -> tuple[int, int]:
+# Absolute date spellings tried before falling back to dateparser (commas removed first).
+_DATE_FORMATS = ("%Y-%m-%d", "%m/%d/%Y", "%m-%d-%Y", "%B %d %Y", "%b %d %Y", "%d %B %Y", "%d %b %Y")
+_RELATIVE_UNITS = {"day": "days", "days": "days", "month": "months", "months": "months", "year": "years", "years": "years"}
+DATEPARSER_CACHE_SIZE = int(os.environ.get("DATEPARSER_CACHE_SIZE", 256))
+
+
+def _shift_months(moment: datetime, months: int) -> datetime:
+    """moment moved back by months, clamping the day (Mar 31 - 1 month = Feb 28/29)."""
+    month_index = moment.year * 12 + moment.month - 1 - months
+    year, month = divmod(month_index, 12)
+    day = min(moment.day, calendar.monthrange(year, month + 1)[1])
+    return moment.replace(year=year, month=month + 1, day=day)
+
+
+def _day_bounds(day: datetime) -> tuple[int, int]:
+    day_start = datetime(day.year, day.month, day.day)
+    day_end = day_start + timedelta(days=1) - timedelta(seconds=1)
+    return int(day_start.timestamp()), int(day_end.timestamp())
+
+
+def _fast_parse_date(text: str) -> datetime | None:
+    cleaned = " ".join(text.replace(",", " ").split())
+    for date_format in _DATE_FORMATS:
+        try:
+            return datetime.strptime(cleaned, date_format)
+        except ValueError:
+            continue
+    return None
+
+
+def _fast_time_range(text: str, now: datetime) -> tuple[int, int] | None:
+    """Deterministic handling of the phrases TIME_PHRASE_RE extracts; None if unsure."""
+    words = text.split()
+    if not words:
+        return None
+
+    if text == "today":
+        return int(datetime(now.year, now.month, now.day).timestamp()), int(now.timestamp())
+    if text == "yesterday":
+        return _day_bounds(now - timedelta(days=1))
+    if text == "this month":
+        return int(datetime(now.year, now.month, 1).timestamp()), int(now.timestamp())
+    if text == "this year":
+        return int(datetime(now.year, 1, 1).timestamp()), int(now.timestamp())
+
+    if len(words) == 3 and words[0] == "last" and words[1].isdigit() and words[2] in _RELATIVE_UNITS:
+        amount = int(words[1])
+        unit = _RELATIVE_UNITS[words[2]]
+        if unit == "days":
+            start = now - timedelta(days=amount)
+        else:
+            start = _shift_months(now, amount * (12 if unit == "years" else 1))
+        return int(start.timestamp()), int(now.timestamp())
+
+    if words[0] == "on":
+        day = _fast_parse_date(text[3:])
+        return _day_bounds(day) if day else None
+
+    if words[0] == "from" and " to " in text:
+        start_text, end_text = text[5:].split(" to ", 1)
+        start = _fast_parse_date(start_text)
+        end = _fast_parse_date(end_text)
+        if start and end:
+            return int(start.timestamp()), int(end.timestamp())
+    return None
+
+
+@lru_cache(maxsize=DATEPARSER_CACHE_SIZE)
+def _dateparser_parse(text: str, day: date, relative: bool) -> datetime | None:
+    """dateparser, memoized per (phrase, day); relative phrases resolve against the first call's clock."""
+    # Imported here so mcp_server and the agent only pay dateparser's import cost when a phrase needs it.
     dateparser = importlib.import_module("dateparser")
+    settings = {"RELATIVE_BASE": datetime.utcnow()} if relative else None
+    return dateparser.parse(text, settings=settings)
+
+
+def parse_time_range(text: str) -> tuple[int, int]:
     now = datetime.utcnow()
-    default_from = now.replace(year=now.year - 1)
-    default_to = now
+    lower = " ".join(text.lower().split())
+
+    fast = _fast_time_range(lower, now)
+    if fast is not None:
+        return fast
 
-    if text.lower().startswith("on "):
-        specific_date = dateparser.parse(text[3:].strip(), settings={"RELATIVE_BASE": now})
+    today = now.date()
+    if lower.startswith("on "):
+        specific_date = _dateparser_parse(lower[3:].strip(), today, True)
         if specific_date:
-            day_start = datetime(specific_date.year, specific_date.month, specific_date.day)
-            day_end = day_start + timedelta(days=1) - timedelta(seconds=1)
-            return int(day_start.timestamp()), int(day_end.timestamp())
-
-    if "from" in text.lower() and "to" in text.lower():
-        parts = text.lower().split("to")
-        start = dateparser.parse(parts[0].replace("from", "").strip())
-        end = dateparser.parse(parts[1].strip())
+            return _day_bounds(specific_date)
+
+    if lower.startswith("from ") and " to " in lower:
+        start_text, end_text = lower[5:].split(" to ", 1)
+        start = _dateparser_parse(start_text.strip(), today, False)
+        end = _dateparser_parse(end_text.strip(), today, False)
         if start and end:
             return int(start.timestamp()), int(end.timestamp())
 
-    relative = dateparser.parse(text, settings={"RELATIVE_BASE": now})
+    relative = _dateparser_parse(lower, today, True)
     if relative:
         return int(relative.timestamp()), int(now.timestamp())
 
-    return int(default_from.timestamp()), int(default_to.timestamp())
+    return int(_shift_months(now, 12).timestamp()), int(now.timestamp())
 
 
 def extract_time_text(text: str) -> str | None:
@@ -451,25 +661,88 @@ def _resolve_intent(user_text: str, parsed_intent: str | None) -> str | None:
     return intent
 
 
-async def _call_mcp_server_async(payload: dict) -> dict:
-    try:
-        async with websockets.connect(MCP_WS_URL) as websocket:
-            await websocket.send(json.dumps(payload))
-            response = await websocket.recv()
-            return json.loads(response)
-    except ConnectionRefusedError:
-        logger.error("Cannot reach MCP websocket server at %s", MCP_WS_URL)
-        return {"error": "MCP server is not running. Please start mcp_server.py first."}
-    except OSError:
-        logger.error("Cannot reach MCP websocket server at %s", MCP_WS_URL)
-        return {"error": "MCP server is not running. Please start mcp_server.py first."}
-    except Exception as e:
-        logger.exception("Unexpected error calling MCP websocket server")
-        return {"error": str(e)}
+_HISTORY_HINT_WORDS = ("was", "on", "historical", "history", "closed")
+
+
+@dataclass(frozen=True)
+class ParsedQuery:
+    """Everything Finn needs from one utterance, computed once by analyze_query()."""
+
+    text: str
+    stock: str | None
+    matched_intent: str | None
+    intent: str | None
+    symbol: str | None
+    time_text: str | None
+    symbols: tuple[str, ...] = ()
+
+    @property
+    def is_actionable(self) -> bool:
+        return bool(self.intent and self.symbol)
+
+    @property
+    def is_batch(self) -> bool:
+        return len(self.symbols) > 1
+
+    def time_range(self) -> tuple[int, int] | None:
+        """Resolve time_text to timestamps (not memoized: relative phrases move with the clock)."""
+        return parse_time_range(self.time_text) if self.time_text else None
+
+    def to_mcp_payload(self, user_text: str) -> dict:
+        # "parsed" tells mcp_server the fields are final, so it does not parse the text again.
+        if self.is_batch:
+            return {
+                "tasks": [{"intent": self.intent, "stock": symbol} for symbol in self.symbols],
+                "time_text": self.time_text,
+                "text": user_text,
+                "parsed": True,
+            }
+        return {
+            "intent": self.intent,
+            "stock": self.symbol,
+            "time_text": self.time_text,
+            "text": user_text,
+            "parsed": True,
+        }
+
+
+def normalize_query_text(text: str) -> str:
+    """Collapse whitespace and lowercase; parsing is case-insensitive, so this is the memo key."""
+    return " ".join((text or "").split()).lower()
+
+
+def analyze_query(user_text: str) -> ParsedQuery:
+    """Parse an utterance once: spaCy match, keyword intents, time phrase and proxy ETF."""
+    return _analyze_normalized(normalize_query_text(user_text))
+
+
+@lru_cache(maxsize=FINANCIAL_PARSE_CACHE_SIZE)
+def _analyze_normalized(text: str) -> ParsedQuery:
+    parsed = parse_query(text) if text else {"intent": None, "stock": None}
+    stock = parsed.get("stock")
+    intent = _resolve_intent(text, parsed.get("intent"))
+    time_text = extract_time_text(text)
+
+    if intent == "PRICE_QUERY" and time_text and any(word in text for word in _HISTORY_HINT_WORDS):
+        intent = "HISTORY_QUERY"
+
+    # Free-tier fallback: map direct index symbols to liquid proxy ETFs.
+    symbol = INDEX_SYMBOL_TO_PROXY_ETF.get(stock, stock) if stock else None
+    symbols = tuple(dict.fromkeys(INDEX_SYMBOL_TO_PROXY_ETF.get(item, item) for item in parsed.get("symbols") or ()))
+
+    return ParsedQuery(
+        text=text,
+        stock=stock,
+        matched_intent=parsed.get("intent"),
+        intent=intent,
+        symbol=symbol,
+        time_text=time_text,
+        symbols=symbols[:FINANCIAL_MAX_BATCH_SYMBOLS],
+    )
 
 
 def _call_mcp_server(payload: dict) -> dict:
-    return asyncio.run(_call_mcp_server_async(payload))
+    return _mcp_client.call(payload)
 
 
 def _format_quote_response(result: dict, symbol: str = "?") -> str:
@@ -534,8 +807,26 @@ def _format_history_response(result: dict, symbol: str = "?", time_text: str | N
     date_str = datetime.utcfromtimestamp(ts).strftime("%Y-%m-%d")
 
     if time_text:
-        return f"{symbol} closed at ${close_price:,.2f} on {date_str} ({time_text})."
-    return f"{symbol} closed at ${close_price:,.2f} on {date_str}."
+        reply = f"{symbol} closed at ${close_price:,.2f} on {date_str} ({time_text})."
+    else:
+        reply = f"{symbol} closed at ${close_price:,.2f} on {date_str}."
+
+    summary = _format_history_stats(result.get("stats") or {})
+    return f"{reply} {summary}" if summary else reply
+
+
+def _format_history_stats(stats: dict) -> str:
+    """Describe the period analytics mcp_server attaches to candle replies."""
+    if stats.get("return_pct") is None:
+        return ""
+    parts = [f"over {stats['days']} trading days it returned {stats['return_pct']:+.2f}%"]
+    if stats.get("volatility_pct") is not None:
+        parts.append(f"annualized volatility was {stats['volatility_pct']:.1f}%")
+    parts.append(f"max drawdown was {stats['max_drawdown_pct']:.1f}%")
+    moving_averages = [f"{window}-day ${stats[f'ma{window}']:,.2f}" for window in (20, 50, 200) if f"ma{window}" in stats]
+    if moving_averages:
+        parts.append("moving averages: " + ", ".join(moving_averages))
+    return parts[0][0].upper() + "; ".join(parts)[1:] + "."
 
 
 def _format_profile_response(result: dict, symbol: str = "?") -> str:
@@ -727,6 +1018,74 @@ def _format_recommendations_response(result, symbol: str = "?") -> str:
     )
 
 
+def _format_result(intent: str, result, symbol: str = "?", time_text: str | None = None) -> str:
+    if intent == "EARNINGS_QUERY":
+        return _format_earnings_response(result, symbol=symbol)
+    if intent == "HISTORY_QUERY":
+        return _format_history_response(result, symbol=symbol, time_text=time_text)
+    if intent == "PROFILE_QUERY":
+        return _format_profile_response(result, symbol=symbol)
+    if intent == "FINANCIAL_QUERY":
+        return _format_financial_response(result, symbol=symbol)
+    if intent == "NEWS_QUERY":
+        return _format_news_response(result, symbol=symbol)
+    if intent == "DIVIDEND_QUERY":
+        return _format_dividend_response(result, symbol=symbol)
+    if intent == "RECOMMENDATIONS_QUERY":
+        return _format_recommendations_response(result, symbol=symbol)
+    return _format_quote_response(result, symbol=symbol)
+
+
+def _format_quote_comparison(results: list[dict]) -> str:
+    """Compare several quotes in one line: symbol, price and daily change, plus the best performer."""
+    quotes = []
+    failed = []
+    for item in results:
+        symbol = item.get("stock") or "?"
+        data = item.get("data")
+        price = data.get("c") if isinstance(data, dict) and "error" not in data else None
+        if not price:
+            failed.append(symbol)
+            continue
+        change = data.get("dp")
+        if change is None:
+            quotes.append((symbol, price, None, f"{symbol} ${price:,.2f}"))
+        else:
+            direction = "up" if change >= 0 else "down"
+            quotes.append((symbol, price, change, f"{symbol} ${price:,.2f} ({direction} {abs(change):.2f}%)"))
+
+    if not quotes:
+        return f"Sorry, I couldn't retrieve prices for {', '.join(failed)}."
+
+    reply = ", ".join(quote[3] for quote in quotes) + "."
+    changes = [quote for quote in quotes if quote[2] is not None]
+    if len(changes) > 1:
+        best = max(changes, key=lambda quote: quote[2])
+        if best[2] >= 0:
+            reply += f" {best[0]} is up the most today."
+        else:
+            reply += f" All are down today; {best[0]} fell the least."
+    if failed:
+        reply += f" I couldn't get a price for {', '.join(failed)}."
+    return reply
+
+
+def _format_batch_response(intent: str, results: list[dict], time_text: str | None = None) -> str:
+    """Summarize a multi-symbol MCP reply in one message."""
+    if intent == "PRICE_QUERY":
+        return _format_quote_comparison(results)
+
+    lines = []
+    for item in results:
+        symbol = item.get("stock") or "?"
+        data = item.get("data")
+        if data is None:
+            lines.append(f"I couldn't understand the stock response for {symbol}.")
+        else:
+            lines.append(_format_result(intent, data, symbol=symbol, time_text=time_text))
+    return "\n".join(lines)
+
+
 _HELP_TEXT = (
     "I can look up stock prices, earnings, and dividend data for publicly traded companies. "
     "Try asking something like: 'What is the price of NVDA?' or "
@@ -734,13 +1093,14 @@ _HELP_TEXT = (
 )
 
 
-def process_utterance(user_text: str, agent_name: str = "FinancialAgent") -> str:
+def process_utterance(user_text: str, agent_name: str = "FinancialAgent", parsed: ParsedQuery | None = None) -> str:
     """
     Main entry point called by template_agent.py.
 
     Args:
         user_text: The text input from the user.
         agent_name: This agent's conversational name (unused here, kept for interface parity).
+        parsed: The utterance's analyze_query() result, if the caller already has it.
 
     Returns:
         A plain-text response string.
@@ -754,31 +1114,27 @@ def process_utterance(user_text: str, agent_name: str = "FinancialAgent") -> str
     if any(w in lower for w in ["help", "hello", "hi ", "hey", "what can you"]):
         return ""
 
-    parsed = parse_query(user_text)
-    intent = _resolve_intent(user_text, parsed.get("intent"))
-    stock = parsed.get("stock")
-    time_text = extract_time_text(user_text)
+    query = parsed or analyze_query(user_text)
+    intent = query.intent
+    stock = query.symbol
+    time_text = query.time_text
 
-    if not intent or not stock:
+    if not query.is_actionable:
         logger.info("Ignoring Finn query without both intent and stock/index: intent=%s stock=%s", intent, stock)
         return ""
 
-    lower_text = user_text.lower()
-    if intent == "PRICE_QUERY" and time_text and any(word in lower_text for word in ["was", "on", "historical", "history", "closed"]):
-        intent = "HISTORY_QUERY"
-
-    # Free-tier fallback: map direct index symbols to liquid proxy ETFs.
-    stock = INDEX_SYMBOL_TO_PROXY_ETF.get(stock, stock)
-
-    mcp_payload = {
-        "intent": intent,
-        "stock": stock,
-        "time_text": time_text,
-        "text": user_text,
-    }
+    if query.is_batch:
+        logger.info("Parsed batch query intent=%s stocks=%s", intent, ",".join(query.symbols))
+        mcp_response = _call_mcp_server(query.to_mcp_payload(user_text))
+        if "error" in mcp_response:
+            return f"Sorry, I couldn't retrieve stock data: {mcp_response['error']}"
+        results = mcp_response.get("results")
+        if not isinstance(results, list):
+            return "I couldn't understand the stock response from the data service."
+        return _format_batch_response(intent, results, time_text=time_text)
 
     logger.info("Parsed query intent=%s stock=%s", intent, stock)
-    mcp_response = _call_mcp_server(mcp_payload)
+    mcp_response = _call_mcp_server(query.to_mcp_payload(user_text))
 
     if "error" in mcp_response:
         return f"Sorry, I couldn't retrieve stock data: {mcp_response['error']}"
@@ -788,18 +1144,4 @@ def process_utterance(user_text: str, agent_name: str = "FinancialAgent") -> str
     if result is None:
         return "I couldn't understand the stock response from the data service."
 
-    if intent == "EARNINGS_QUERY":
-        return _format_earnings_response(result, symbol=symbol)
-    if intent == "HISTORY_QUERY":
-        return _format_history_response(result, symbol=symbol, time_text=time_text)
-    if intent == "PROFILE_QUERY":
-        return _format_profile_response(result, symbol=symbol)
-    if intent == "FINANCIAL_QUERY":
-        return _format_financial_response(result, symbol=symbol)
-    if intent == "NEWS_QUERY":
-        return _format_news_response(result, symbol=symbol)
-    if intent == "DIVIDEND_QUERY":
-        return _format_dividend_response(result, symbol=symbol)
-    if intent == "RECOMMENDATIONS_QUERY":
-        return _format_recommendations_response(result, symbol=symbol)
-    return _format_quote_response(result, symbol=symbol)
+    return _format_result(intent, result, symbol=symbol, time_text=time_text)
@@ -0,0 +1,202 @@
+#!/usr/bin/env python3
+"""
+LLM Response Cache
+
+Caches LLM completion text so repeated prompts are answered from memory
+instead of another model call. Keys are built from the normalized prompt, the
+model and the request parameters. Entries expire after a TTL, the cache is
+bounded by entry count and by memory (least recently used entries are dropped
+first), and an optional SQLite file keeps entries across restarts.
+
+Only deterministic calls are cached by default: a call is cacheable when its
+temperature is at or below LLM_CACHE_MAX_TEMPERATURE, or when the caller passes
+cache=True explicitly.
+
+Configuration (environment variables):
+    LLM_CACHE_ENABLED          - "false" disables caching (default "true")
+    LLM_CACHE_TTL_SECONDS      - entry lifetime (default 3600)
+    LLM_CACHE_MAX_ENTRIES      - max in-memory entries (default 1024)
+    LLM_CACHE_MAX_BYTES        - max in-memory size of cached text (default 8 MB)
+    LLM_CACHE_MAX_TEMPERATURE  - hottest temperature cached by default (default 0.3)
+    LLM_CACHE_PATH             - SQLite file for a persistent second tier (optional)
+"""
+
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+LLM_CACHE_ENABLED = os.environ.get("LLM_CACHE_ENABLED", "true").strip().lower() not in {"0", "false", "no", "off"}
+LLM_CACHE_TTL_SECONDS = float(os.environ.get("LLM_CACHE_TTL_SECONDS", 3600))
+LLM_CACHE_MAX_ENTRIES = int(os.environ.get("LLM_CACHE_MAX_ENTRIES", 1024))
+LLM_CACHE_MAX_BYTES = int(os.environ.get("LLM_CACHE_MAX_BYTES", 8 * 1024 * 1024))
+LLM_CACHE_MAX_TEMPERATURE = float(os.environ.get("LLM_CACHE_MAX_TEMPERATURE", 0.3))
+LLM_CACHE_PATH = (os.environ.get("LLM_CACHE_PATH") or "").strip()
+
+# OpenAI's default when no temperature is sent.
+_DEFAULT_TEMPERATURE = 1.0
+
+
+def normalize_prompt(text: Any) -> str:
+    """Lowercase and collapse whitespace so trivially different prompts share a key."""
+    return " ".join(str(text or "").split()).lower()
+
+
+def cache_key(messages: List[Dict[str, Any]], model: str, params: Optional[Dict[str, Any]] = None) -> str:
+    """Build a stable key from the normalized messages, model and request parameters."""
+    payload = {
+        "model": model,
+        "messages": [[message.get("role", ""), normalize_prompt(message.get("content", ""))] for message in messages],
+        "params": params or {},
+    }
+    encoded = json.dumps(payload, sort_keys=True, default=str).encode("utf-8")
+    return hashlib.sha256(encoded).hexdigest()
+
+
+def should_cache(params: Dict[str, Any], cache: Optional[bool] = None) -> bool:
+    """Decide whether a call with these parameters may be served from the cache."""
+    if not LLM_CACHE_ENABLED:
+        return False
+    if cache is not None:
+        return cache
+    temperature = params.get("temperature", _DEFAULT_TEMPERATURE)
+    try:
+        return float(temperature) <= LLM_CACHE_MAX_TEMPERATURE
+    except (TypeError, ValueError):
+        return False
+
+
+def cached_completion(text: str) -> SimpleNamespace:
+    """Wrap cached text so callers can keep using response.choices[0].message.content."""
+    return SimpleNamespace(
+        choices=[SimpleNamespace(message=SimpleNamespace(content=text))],
+        cached=True,
+    )
+
+
+def completion_text(response: Any) -> Optional[str]:
+    try:
+        return response.choices[0].message.content
+    except (AttributeError, IndexError, TypeError):
+        return None
+
+
+class LLMCache:
+    """Thread-safe LRU + TTL cache of completion text with an optional SQLite tier."""
+
+    def __init__(
+        self,
+        ttl_seconds: float = LLM_CACHE_TTL_SECONDS,
+        max_entries: int = LLM_CACHE_MAX_ENTRIES,
+        max_bytes: int = LLM_CACHE_MAX_BYTES,
+        path: str = "",
+    ):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries: "OrderedDict[str, tuple[str, float]]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "misses": 0, "stores": 0, "evictions": 0, "expirations": 0, "disk_hits": 0}
+
+        self._db = None
+        if path:
+            try:
+                self._db = sqlite3.connect(path, check_same_thread=False)
+                self._db.execute(
+                    "CREATE TABLE IF NOT EXISTS llm_cache (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+                )
+                self._db.execute("DELETE FROM llm_cache WHERE expires_at <= ?", (time.time(),))
+                self._db.commit()
+            except sqlite3.Error as exc:
+                logger.warning("LLM cache: could not open %s, using memory only: %s", path, exc)
+                self._db = None
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, expires_at = entry
+                if expires_at > time.time():
+                    self._entries.move_to_end(key)
+                    self._counters["hits"] += 1
+                    return value
+                self._remove(key)
+                self._counters["expirations"] += 1
+
+            if self._db is not None:
+                row = self._db.execute(
+                    "SELECT value, expires_at FROM llm_cache WHERE key = ? AND expires_at > ?",
+                    (key, time.time()),
+                ).fetchone()
+                if row is not None:
+                    self._insert(key, row[0], row[1])
+                    self._counters["hits"] += 1
+                    self._counters["disk_hits"] += 1
+                    return row[0]
+
+            self._counters["misses"] += 1
+            return None
+
+    def set(self, key: str, value: str, ttl_seconds: Optional[float] = None) -> None:
+        if value is None:
+            return
+        expires_at = time.time() + (self.ttl_seconds if ttl_seconds is None else ttl_seconds)
+        with self._lock:
+            self._insert(key, value, expires_at)
+            self._counters["stores"] += 1
+            if self._db is not None:
+                try:
+                    self._db.execute(
+                        "INSERT OR REPLACE INTO llm_cache (key, value, expires_at) VALUES (?, ?, ?)",
+                        (key, value, expires_at),
+                    )
+                    self._db.commit()
+                except sqlite3.Error as exc:
+                    logger.warning("LLM cache: failed to persist entry: %s", exc)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            if self._db is not None:
+                self._db.execute("DELETE FROM llm_cache")
+                self._db.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._counters["hits"] + self._counters["misses"]
+            return dict(
+                self._counters,
+                entries=len(self._entries),
+                bytes=self._bytes,
+                hit_rate=round(self._counters["hits"] / lookups, 3) if lookups else 0.0,
+            )
+
+    def _insert(self, key: str, value: str, expires_at: float) -> None:
+        if key in self._entries:
+            self._remove(key)
+        size = len(key) + len(value.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        self._entries[key] = (value, expires_at)
+        self._bytes += size
+        while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+            oldest_key = next(iter(self._entries))
+            self._remove(oldest_key)
+            self._counters["evictions"] += 1
+
+    def _remove(self, key: str) -> None:
+        value, _expires_at = self._entries.pop(key)
+        self._bytes -= len(key) + len(value.encode("utf-8"))
+
+
+response_cache = LLMCache(path=LLM_CACHE_PATH)
@@ -21,6 +21,7 @@ from openfloor.manifest import Manifest, Identification, Capability, SupportedLa
 from openfloor.dialog_event import DialogEvent, TextFeature
 
 import envelope_handler
+import globals
 import utterance_handler
 
 
@@ -91,7 +92,8 @@ class BotAgent:
             conversation=Conversation(id=conversation_id),
             sender=Sender(speakerUri=self.speakerUri, serviceUrl=self.serviceUrl),
         )
-        self.on_envelope(in_envelope, out_envelope)
+        with globals.conversation_scope(conversation_id):
+            self.on_envelope(in_envelope, out_envelope)
         return out_envelope
 
     @staticmethod
@@ -12,6 +12,7 @@ from typing import Optional
 
 from google import genai
 import globals
+import llm_cache
 
 DEFAULT_MODEL = "models/gemini-2.0-flash-lite"
 FALLBACK_MODELS = (
@@ -29,7 +30,6 @@ SYSTEM_PROMPT = (
 
 logger = logging.getLogger(__name__)
 
-_RESPONSE_CACHE: dict[str, str] = {}
 _GEO_KEYWORDS = {
     "map", "maps", "geography", "geo", "country", "countries", "capital",
     "capitals", "continent", "continents", "ocean", "oceans", "sea", "seas",
@@ -128,17 +128,24 @@ def _is_geo_question(text: str) -> bool:
 
 
 def process_utterance(user_text: str, agent_name: str = "Agent") -> str:
-    normalized_query = _normalize_query(user_text)
-    cached = _RESPONSE_CACHE.get(normalized_query)
+    # Multi-agent floors suppress off-topic replies, so that choice is part of the key.
+    multi_party = globals.current_conversation().number_conversants > 1
+    model_candidates = _get_model_candidates()
+    cache_key = llm_cache.cache_key(
+        [{"role": "user", "content": user_text}],
+        ",".join(model_candidates),
+        {"multi_party": multi_party},
+    )
+    cached = llm_cache.response_cache.get(cache_key)
     if cached is not None:
         return cached
 
     if not _is_geo_question(user_text):
-        if globals.number_conversants > 1:
-            _RESPONSE_CACHE[normalized_query] = ""
+        if multi_party:
+            llm_cache.response_cache.set(cache_key, "")
             return ""
         response = "That question is not about geography."
-        _RESPONSE_CACHE[normalized_query] = response
+        llm_cache.response_cache.set(cache_key, response)
         return response
 
     try:
@@ -149,9 +156,8 @@ def process_utterance(user_text: str, agent_name: str = "Agent") -> str:
             "Set it in your environment and try again."
         )
 
-    model_candidates = _get_model_candidates()
     logger.info("Gemini model candidates: %s", ", ".join(model_candidates))
-    logger.info("Conversants count: %s", globals.number_conversants)
+    logger.info("Conversants count: %s", globals.current_conversation().number_conversants)
 
     last_error: Optional[Exception] = None
     last_model_name: Optional[str] = None
@@ -200,15 +206,15 @@ def process_utterance(user_text: str, agent_name: str = "Agent") -> str:
 
     is_geo, content = _parse_geo_response(response_text)
     if not is_geo:
-        if globals.number_conversants > 1:
-            _RESPONSE_CACHE[normalized_query] = ""
+        if multi_party:
+            llm_cache.response_cache.set(cache_key, "")
             return ""
         response = "That question is not about geography."
-        _RESPONSE_CACHE[normalized_query] = response
+        llm_cache.response_cache.set(cache_key, response)
         return response
 
     final_response = content.strip()
-    _RESPONSE_CACHE[normalized_query] = final_response
+    llm_cache.response_cache.set(cache_key, final_response)
     return final_response
 
 
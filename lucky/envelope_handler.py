@@ -11,23 +11,181 @@ Separation of concerns:
 - utterance_handler.py: Custom conversation logic
 """
 
+import hashlib
+import json
 import logging
-from typing import Optional
+import os
+import queue
+import threading
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
 from openfloor.envelope import Envelope, Conversation, Sender, Schema, To
 from openfloor.manifest import Manifest
 import globals
 
+try:
+    import orjson
+except ImportError:  # optional speed-up; the standard library parser works too
+    orjson = None
+
 logger = logging.getLogger(__name__)
 
+_STREAM_DONE = object()
+
+# How long clients may reuse GET /manifest without revalidating (they revalidate with If-None-Match).
+MANIFEST_MAX_AGE_SECONDS = int(os.environ.get("MANIFEST_MAX_AGE_SECONDS", 60))
+
+
+class ManifestSnapshot:
+    """One serialized version of a manifest."""
+
+    def __init__(self, identity: Tuple[Any, Any], version: int, text: str):
+        self.identity = identity
+        self.version = version
+        self.text = text
+        self.body = text.encode("utf-8")
+        self.etag = f'"{hashlib.sha1(self.body).hexdigest()[:20]}"'
+        # Plain-dict copy for outgoing envelopes: serializing it skips the Manifest
+        # object graph. Shared between replies, so never modify it.
+        self.data = json.loads(text)
+
+    def matches(self, if_none_match: Optional[str]) -> bool:
+        """True if an If-None-Match header names this version (answer 304)."""
+        if not if_none_match:
+            return False
+        tags = [tag.strip() for tag in if_none_match.split(",")]
+        return "*" in tags or any(tag.removeprefix("W/") == self.etag for tag in tags)
+
+    def cache_headers(self) -> Dict[str, str]:
+        return {"ETag": self.etag, "Cache-Control": f"public, max-age={MANIFEST_MAX_AGE_SECONDS}"}
+
+
+class ManifestCache:
+    """
+    A manifest serialized once and re-serialized only when it changes.
+
+    The manifest's identity (speakerUri, serviceUrl) is compared on every
+    call, since servers rewrite it at runtime; call invalidate() after
+    changing any other field.
+    """
+
+    def __init__(self, manifest: Manifest):
+        self._manifest = manifest
+        self._snapshot: Optional[ManifestSnapshot] = None
+        self._version = 0
+        self._lock = threading.Lock()
+
+    def _identity(self) -> Tuple[Any, Any]:
+        identification = self._manifest.identification
+        return (identification.speakerUri, identification.serviceUrl)
+
+    def current(self) -> ManifestSnapshot:
+        snapshot = self._snapshot
+        identity = self._identity()
+        if snapshot is not None and snapshot.identity == identity:
+            return snapshot
+        with self._lock:
+            snapshot = self._snapshot
+            if snapshot is None or snapshot.identity != identity:
+                self._version += 1
+                snapshot = ManifestSnapshot(identity, self._version, self._manifest.to_json())
+                self._snapshot = snapshot
+                logger.info("Manifest version %d serialized (%d bytes)", snapshot.version, len(snapshot.body))
+            return snapshot
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._snapshot = None
+
 
 def _update_conversant_count(envelope: Envelope) -> None:
+    conversation = getattr(envelope, "conversation", None) if envelope else None
+    context = globals.conversations.get(getattr(conversation, "id", None))
     try:
-        conversants = None
-        if envelope and getattr(envelope, "conversation", None):
-            conversants = getattr(envelope.conversation, "conversants", None)
-        globals.number_conversants = len(conversants) if conversants else 0
+        conversants = getattr(conversation, "conversants", None) if conversation else None
+        context.number_conversants = len(conversants) if conversants else 0
     except Exception:
-        globals.number_conversants = 0
+        context.number_conversants = 0
+
+
+def _record_conversant_count(envelope_dict: Dict[str, Any]) -> None:
+    conversation = envelope_dict.get("conversation")
+    if not isinstance(conversation, dict):
+        conversation = {}
+    context = globals.conversations.get(conversation.get("id"))
+    conversants = conversation.get("conversants")
+    context.number_conversants = len(conversants) if isinstance(conversants, list) else 0
+
+
+def decode_payload(payload: Union[bytes, str]) -> Dict[str, Any]:
+    """
+    Decode a request body into the envelope dictionary (the "openFloor" member).
+
+    Uses orjson when it is installed.
+
+    Raises:
+        ValueError: If the body is not JSON or has no "openFloor" object
+    """
+    try:
+        data = orjson.loads(payload) if orjson is not None else json.loads(payload)
+    except ValueError as e:
+        raise ValueError(f"Failed to parse incoming envelope: {e}")
+    envelope_dict = data.get("openFloor") if isinstance(data, dict) else None
+    if not isinstance(envelope_dict, dict):
+        raise ValueError("Failed to parse incoming envelope: missing 'openFloor' object")
+    return envelope_dict
+
+
+def prefilter_envelope(payload: Union[bytes, str], agent) -> Tuple[Dict[str, Any], Optional[List[Dict[str, Any]]]]:
+    """
+    Decode a request body and keep only the events addressed to `agent`.
+
+    Checks each event's "to" against the agent's identity before any openfloor
+    object is built. Events addressed to the agent are kept even if no handler
+    takes them (an invite handler looks at its sibling joinFloor event).
+
+    Returns:
+        (envelope_dict, events): `events` is None when no kept event has a
+        handler, i.e. the envelope can be answered with skipped_response_json().
+
+    Raises:
+        ValueError: If the body is not a valid envelope
+    """
+    envelope_dict = decode_payload(payload)
+    events = envelope_dict.get("events") or []
+    if not isinstance(events, list):
+        raise ValueError("Failed to parse incoming envelope: 'events' is not a list")
+
+    mine = [event for event in events if isinstance(event, dict) and agent._is_addressed_to_me(event)]
+    if not any(agent.handles_event_type(event.get("eventType")) for event in mine):
+        return envelope_dict, None
+    return envelope_dict, mine
+
+
+def build_envelope(envelope_dict: Dict[str, Any], events: List[Dict[str, Any]]) -> Envelope:
+    """Build the openfloor Envelope for a prefiltered envelope, with only `events`."""
+    try:
+        envelope = Envelope.from_dict(dict(envelope_dict, events=events))
+        _update_conversant_count(envelope)
+        return envelope
+    except Exception as e:
+        raise ValueError(f"Failed to parse incoming envelope: {e}")
+
+
+def skipped_response_json(envelope_dict: Dict[str, Any], agent) -> str:
+    """
+    The reply to an envelope with nothing for this agent.
+
+    Same content as processing it would give (no events), without building the
+    incoming envelope.
+    """
+    _record_conversant_count(envelope_dict)
+    conversation = envelope_dict.get("conversation")
+    conversation_id = conversation.get("id") if isinstance(conversation, dict) else None
+    out_envelope = Envelope(
+        conversation=Conversation(id=conversation_id),
+        sender=Sender(speakerUri=agent.speakerUri, serviceUrl=agent.serviceUrl),
+    )
+    return serialize_envelope(out_envelope)
 
 
 def parse_incoming_envelope(json_payload: str) -> Envelope:
@@ -137,8 +295,7 @@ def serialize_envelope(envelope: Envelope) -> str:
         
         # Use openfloor library's to_json method
         # as_payload=True wraps it in the OpenFloor payload structure
-        json_str = envelope.to_json(as_payload=True)
-        return json_str
+        return envelope.to_json(as_payload=True)
     except Exception as e:
         logger.exception("[SERIALIZE ERROR] Failed to serialize envelope")
         raise ValueError(f"Failed to serialize envelope: {e}")
@@ -212,7 +369,7 @@ def process_request(json_payload: str, agent) -> str:
     High-level function to process a complete request.
     
     This is a convenience function that:
-    1. Parses incoming JSON
+    1. Parses incoming JSON (events for other agents are dropped first)
     2. Creates response envelope
     3. Processes with agent
     4. Serializes response
@@ -224,8 +381,11 @@ def process_request(json_payload: str, agent) -> str:
     Returns:
         JSON string response
     """
-    # Parse incoming envelope
-    in_envelope = parse_incoming_envelope(json_payload)
+    # Decode and drop events for other agents; skip processing if nothing is left
+    envelope_dict, events = prefilter_envelope(json_payload, agent)
+    if events is None:
+        return skipped_response_json(envelope_dict, agent)
+    in_envelope = build_envelope(envelope_dict, events)
     
     # Process with agent (agent handles all event routing)
     out_envelope = agent.process_envelope(in_envelope)
@@ -234,3 +394,59 @@ def process_request(json_payload: str, agent) -> str:
     response_json = serialize_envelope(out_envelope)
     
     return response_json
+
+
+# =============================================================================
+# STREAMED RESPONSES (server-sent events)
+# =============================================================================
+
+def wants_event_stream(accept_header: Optional[str]) -> bool:
+    """Return True if the client asked for a text/event-stream response."""
+    return "text/event-stream" in (accept_header or "").lower()
+
+
+def format_sse(event: str, data: str) -> str:
+    """Frame one server-sent event."""
+    lines = "".join(f"data: {line}\n" for line in (data.splitlines() or [""]))
+    return f"event: {event}\n{lines}\n"
+
+
+def stream_envelope_events(in_envelope: Envelope, agent) -> Iterator[str]:
+    """
+    Process an envelope and yield the response as server-sent events.
+
+    While the agent works, each piece of generated utterance text is sent as an
+    "utterance" event ({"speakerUri": ..., "text": ...}). The complete response
+    envelope follows as a single "envelope" event and is authoritative: clients
+    should replace any partial text with it.
+
+    Args:
+        in_envelope: The parsed incoming envelope
+        agent: The agent instance (with process_envelope method)
+
+    Yields:
+        SSE-framed strings
+    """
+    frames: "queue.Queue" = queue.Queue()
+    speaker_uri = agent.speakerUri
+
+    def _on_partial(text: str) -> None:
+        if text:
+            frames.put(format_sse("utterance", json.dumps({"speakerUri": speaker_uri, "text": text})))
+
+    def _run() -> None:
+        try:
+            out_envelope = agent.process_envelope(in_envelope, on_partial=_on_partial)
+            frames.put(format_sse("envelope", serialize_envelope(out_envelope)))
+        except Exception as e:
+            logger.exception("[STREAM] Error processing envelope")
+            frames.put(format_sse("error", json.dumps({"error": "Internal server error", "detail": str(e)})))
+        finally:
+            frames.put(_STREAM_DONE)
+
+    threading.Thread(target=_run, name="envelope-stream", daemon=True).start()
+    while True:
+        frame = frames.get()
+        if frame is _STREAM_DONE:
+            return
+        yield frame
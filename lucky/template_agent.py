@@ -25,7 +25,7 @@ import json
 import logging
 import os
 import re
-from typing import Any, Callable, Dict, List
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 # Import OpenFloor components
 from openfloor.envelope import Envelope, Parameters, Conversation, Sender
@@ -39,6 +39,7 @@ from openfloor.dialog_event import DialogEvent, TextFeature
 
 # Import envelope handling (separated from event handling)
 import envelope_handler
+import globals
 
 # Import the utterance handler (custom logic)
 import utterance_handler
@@ -60,6 +61,9 @@ class _EventHook:
         for handler in list(self._handlers):
             handler(*args, **kwargs)
 
+    def has_handlers(self) -> bool:
+        return bool(self._handlers)
+
 
 class BotAgent:
     def __init__(self, manifest: Manifest):
@@ -93,6 +97,12 @@ class BotAgent:
             "yieldFloor": self.on_yield_floor,
         }
 
+        # (speakerUri, serviceUrl) as configured -> normalized; the manifest may change at runtime.
+        self._identity: Tuple[Tuple[Any, Any], Tuple[str, str]] = ((None, None), ("", ""))
+
+        # Serialized once per manifest version; publishManifests replies reuse it
+        self.manifest_cache = envelope_handler.ManifestCache(manifest)
+
         self.on_envelope += self.bot_on_envelope
         self.on_utterance += self.bot_on_utterance
         self.on_get_manifests += self.bot_on_get_manifests
@@ -105,13 +115,15 @@ class BotAgent:
     def serviceUrl(self) -> str:
         return self._manifest.identification.serviceUrl
 
-    def process_envelope(self, in_envelope: Envelope) -> Envelope:
+    def process_envelope(self, in_envelope: Envelope, on_partial: Optional[Callable[[str], None]] = None) -> Envelope:
+        """Handle an envelope; `on_partial` receives utterance text as it is generated."""
         conversation_id = getattr(getattr(in_envelope, "conversation", None), "id", None)
         out_envelope = Envelope(
             conversation=Conversation(id=conversation_id),
             sender=Sender(speakerUri=self.speakerUri, serviceUrl=self.serviceUrl),
         )
-        self.on_envelope(in_envelope, out_envelope)
+        with globals.conversation_scope(conversation_id), globals.streaming_partials(on_partial):
+            self.on_envelope(in_envelope, out_envelope)
         return out_envelope
 
     @staticmethod
@@ -123,6 +135,18 @@ class BotAgent:
             normalized = normalized[6:]
         return normalized.rstrip("/")
 
+    def _normalized_identity(self) -> Tuple[str, str]:
+        configured = (self.speakerUri, self.serviceUrl)
+        source, normalized = self._identity
+        if configured != source:
+            normalized = (self._normalize_endpoint_id(configured[0]), self._normalize_endpoint_id(configured[1]))
+            self._identity = (configured, normalized)
+        return normalized
+
+    def handles_event_type(self, event_type: Any) -> bool:
+        handler = self._event_type_to_handler.get(event_type)
+        return handler is not None and handler.has_handlers()
+
     def _is_addressed_to_me(self, event: Any) -> bool:
         to_value = getattr(event, "to", None)
         if to_value is None and isinstance(event, dict):
@@ -130,8 +154,7 @@ class BotAgent:
         if to_value is None:
             return True
 
-        my_speaker_normalized = self._normalize_endpoint_id(self.speakerUri)
-        my_service_normalized = self._normalize_endpoint_id(self.serviceUrl)
+        my_speaker_normalized, my_service_normalized = self._normalized_identity()
 
         recipients = to_value if isinstance(to_value, (list, tuple, set)) else [to_value]
         if not recipients:
@@ -175,7 +198,7 @@ class BotAgent:
     def bot_on_get_manifests(self, event: GetManifestsEvent, in_envelope: Envelope, out_envelope: Envelope) -> None:
         out_envelope.events.append(
             PublishManifestsEvent(parameters=Parameters({
-                "servicingManifests": [self._manifest],
+                "servicingManifests": [self.manifest_cache.current().data],
                 "discoveryManifests": []
             }))
         )
@@ -654,11 +677,11 @@ class TemplateAgent(BotAgent):
         """
         logger.info("[GET_MANIFESTS] Manifest requested, publishing capabilities")
         
-        # Respond with the manifest we were constructed with
-        # The manifest object will be serialized automatically by JsonSerializable
+        # Respond with the manifest we were constructed with, as the cached
+        # plain dict rather than the Manifest object
         out_envelope.events.append(
             PublishManifestsEvent(parameters=Parameters({
-                "servicingManifests": [self._manifest],
+                "servicingManifests": [self.manifest_cache.current().data],
                 "discoveryManifests": []
             }))
         )
@@ -6,11 +6,18 @@ import logging
 import os
 import random
 import re
+import time
 from pathlib import Path
+from typing import Callable
 
 from dotenv import load_dotenv
 from openai import OpenAI
 
+import conversation_memory
+import globals
+import llm_cache
+import llm_providers
+
 _preexisting_openai_api_key = os.environ.get("OPENAI_API_KEY")
 load_dotenv(dotenv_path=Path(__file__).parent / ".env", override=True)
 if _preexisting_openai_api_key is None:
@@ -50,9 +57,6 @@ GUIDANCE_TEMPERATURE_RANGE = (0.85, 1.15)
 RESPONSE_TOP_P = 0.95
 RESPONSE_PRESENCE_PENALTY = 0.35
 RESPONSE_FREQUENCY_PENALTY = 0.25
-_peer_rebuttal_used = False
-_peer_reaction_count = 0
-_responded_to_user_in_cycle = False
 _last_llm_provider = ""
 _last_llm_model = ""
 
@@ -99,29 +103,19 @@ def _provider_label() -> str:
     return ""
 
 
-def _llm_targets() -> list[tuple[str, OpenAI, str]]:
-    targets: list[tuple[str, OpenAI, str]] = []
-    api_key = (os.environ.get("OPENAI_API_KEY") or "").strip()
-
-    if LLM_PROVIDER in {"auto", "ollama"}:
-        targets.append(
-            (
-                "ollama",
-                OpenAI(
-                    base_url=_ollama_base_url(),
-                    api_key=(os.environ.get("OLLAMA_API_KEY") or "ollama"),
-                ),
-                OLLAMA_MODEL,
-            )
-        )
+_llm_providers = llm_providers.ProviderRegistry(LLM_PROVIDER, _ollama_base_url(), OLLAMA_MODEL, OPENAI_MODEL)
 
-    if api_key and LLM_PROVIDER in {"auto", "openai", "ollama"}:
-        targets.append(("openai", OpenAI(api_key=api_key), OPENAI_MODEL))
 
-    return targets
+def _llm_targets() -> list[tuple[str, OpenAI, str]]:
+    return _llm_providers.targets()
 
 
-def _create_chat_completion(messages: list[dict[str, str]], **kwargs):
+def _create_chat_completion(
+    messages: list[dict[str, str]],
+    cache: bool | None = None,
+    on_delta: Callable[[str], None] | None = None,
+    **kwargs,
+):
     global _last_llm_provider, _last_llm_model
     last_error = None
     query_text = ""
@@ -130,13 +124,38 @@ def _create_chat_completion(messages: list[dict[str, str]], **kwargs):
             query_text = (message.get("content") or "").replace("\n", " ").strip()
             break
 
+    cache_key = None
+    if llm_cache.should_cache(kwargs, cache):
+        cache_key = llm_cache.cache_key(messages, f"{LLM_PROVIDER}:{OLLAMA_MODEL}|{OPENAI_MODEL}", kwargs)
+        cached_text = llm_cache.response_cache.get(cache_key)
+        if cached_text is not None:
+            logger.info("LLM cache hit query=%s", query_text[:120])
+            return llm_cache.cached_completion(cached_text)
+
     for provider, llm_client, model in _llm_targets():
+        started = time.perf_counter()
         try:
-            response = llm_client.chat.completions.create(
-                model=model,
-                messages=messages,
-                **kwargs,
-            )
+            if on_delta is not None:
+                response = llm_providers.collect_stream(
+                    llm_client.chat.completions.create(
+                        model=model,
+                        messages=messages,
+                        stream=True,
+                        **kwargs,
+                    ),
+                    on_delta,
+                )
+            else:
+                response = llm_client.chat.completions.create(
+                    model=model,
+                    messages=messages,
+                    **kwargs,
+                )
+            _llm_providers.record_success(provider, time.perf_counter() - started)
+            if cache_key is not None:
+                response_text = llm_cache.completion_text(response)
+                if response_text:
+                    llm_cache.response_cache.set(cache_key, response_text)
             _last_llm_provider = provider
             _last_llm_model = model
             logger.info(
@@ -147,6 +166,7 @@ def _create_chat_completion(messages: list[dict[str, str]], **kwargs):
             )
             return response
         except Exception as exc:
+            _llm_providers.record_failure(provider, time.perf_counter() - started, exc)
             last_error = exc
             logger.warning("%s request failed: %s", provider, exc)
 
@@ -173,7 +193,9 @@ def _classify_query(user_text: str, client: OpenAI | None) -> dict:
         "Limit response to 50 words max in total. If no company is mentioned, company_or_ticker should be empty string."
     )
 
+    # Classification is a pure function of the message, so it is safe to cache.
     response = _create_chat_completion(
+        cache=True,
         response_format={"type": "json_object"},
         messages=[
             {"role": "system", "content": prompt},
@@ -320,6 +342,15 @@ def _generate_reaction_to_peer_advice(user_text: str, client: OpenAI | None) ->
     return _shorten_response(f"{_provider_label()}{response.choices[0].message.content or ''}")
 
 
+def _summarize_turns(previous_summary: str, dropped: list[dict[str, str]]) -> str | None:
+    response = _create_chat_completion(
+        messages=conversation_memory.summary_prompt(previous_summary, dropped),
+        max_tokens=150,
+        temperature=0.0,
+    )
+    return llm_cache.completion_text(response) if response is not None else None
+
+
 def _generate_conservative_guidance(user_text: str, user_goal: str, client: OpenAI | None) -> str:
     if client is None:
         return _shorten_response(
@@ -345,13 +376,16 @@ def _generate_conservative_guidance(user_text: str, user_goal: str, client: Open
         "Provide 2-3 conservative suggestions only, phrased as direct recommendations."
     )
 
+    memory = conversation_memory.memory_for(globals.current_conversation(), summarizer=_summarize_turns)
     response = _create_chat_completion(
+        on_delta=globals.partial_sink(),
         temperature=round(random.uniform(*GUIDANCE_TEMPERATURE_RANGE), 2),
         top_p=RESPONSE_TOP_P,
         presence_penalty=RESPONSE_PRESENCE_PENALTY,
         frequency_penalty=RESPONSE_FREQUENCY_PENALTY,
         messages=[
             {"role": "system", "content": system},
+            *memory.messages(),
             {"role": "user", "content": user},
         ],
     )
@@ -361,7 +395,9 @@ def _generate_conservative_guidance(user_text: str, user_goal: str, client: Open
             "to generate tailored suggestions. Prioritize emergency savings, diversification, low-cost funds, "
             "and smaller position sizes before taking any additional risk."
         )
-    return _shorten_response(f"{_provider_label()}{response.choices[0].message.content or ''}")
+    reply = response.choices[0].message.content or ""
+    memory.add_exchange(user_text, reply)
+    return _shorten_response(f"{_provider_label()}{reply}")
 
 
 def _looks_like_agent_greeting(text: str) -> bool:
@@ -375,7 +411,11 @@ def _looks_like_agent_greeting(text: str) -> bool:
 
 
 def process_utterance(user_text: str, agent_name: str = "Prudence", speaker_name: str = "") -> str:
-    global _peer_rebuttal_used, _peer_reaction_count, _responded_to_user_in_cycle
+    # Turn-taking budget is tracked per conversation so concurrent floors don't interfere.
+    cycle = globals.current_conversation().state.setdefault(
+        "peer_cycle",
+        {"rebuttal_used": False, "reaction_count": 0, "responded_to_user": False},
+    )
 
     if not user_text or not user_text.strip():
         return "Share your financial question, and I will give brief conservative guidance."
@@ -385,8 +425,8 @@ def process_utterance(user_text: str, agent_name: str = "Prudence", speaker_name
         return ""
 
     if _is_agent_speaker(speaker_name):
-        max_peer_reactions = 1 if _responded_to_user_in_cycle else 2
-        if _peer_reaction_count >= max_peer_reactions or not _should_react_to_other_agent(user_text, agent_name, speaker_name):
+        max_peer_reactions = 1 if cycle["responded_to_user"] else 2
+        if cycle["reaction_count"] >= max_peer_reactions or not _should_react_to_other_agent(user_text, agent_name, speaker_name):
             return ""
 
         target_name = _canonical_agent_name(speaker_name) or (speaker_name or "").strip()
@@ -395,8 +435,8 @@ def process_utterance(user_text: str, agent_name: str = "Prudence", speaker_name
             reaction_text = _strip_leading_addressee_prefixes(_generate_reaction_to_peer_advice(user_text, client))
             if not reaction_text:
                 return ""
-            _peer_reaction_count += 1
-            _peer_rebuttal_used = True
+            cycle["reaction_count"] += 1
+            cycle["rebuttal_used"] = True
             return f"{target_name}: {reaction_text}" if target_name else reaction_text
         except Exception:
             logger.exception("Failed to generate reaction to another advisor")
@@ -405,19 +445,19 @@ def process_utterance(user_text: str, agent_name: str = "Prudence", speaker_name
             ))
             if not fallback:
                 return ""
-            _peer_reaction_count += 1
-            _peer_rebuttal_used = True
+            cycle["reaction_count"] += 1
+            cycle["rebuttal_used"] = True
             return f"{target_name}: {fallback}" if target_name else fallback
 
     # A fresh user question resets peer-reaction budget for this turn.
-    _peer_rebuttal_used = False
-    _peer_reaction_count = 0
-    _responded_to_user_in_cycle = False
+    cycle["rebuttal_used"] = False
+    cycle["reaction_count"] = 0
+    cycle["responded_to_user"] = False
 
     if not _is_user_finance_question(user_text):
         return ""
 
-    _responded_to_user_in_cycle = True
+    cycle["responded_to_user"] = True
 
     client = _build_client()
 
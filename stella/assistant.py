@@ -6,6 +6,7 @@ import os
 import globals
 
 import sys
+import intent_index
 import nasa_api 
 import openfloor 
 from openfloor import OpenFloorEvents, OpenFloorAgent, BotAgent
@@ -43,21 +44,13 @@ def extract_location(input_text):
         return None
 
 def search_intent(input_text):
-    my_dir = os.path.dirname(__file__)
-    json_file_path = os.path.join(my_dir, 'intentConcepts.json')
-    with open(json_file_path, 'r') as f:
-        concepts_data = json.load(f)
-
     matched_intents = []
     input_text_lower = input_text.lower()
 
     if "astronomy" in input_text_lower or "space" in input_text_lower:
         intent = "intent"
         matched_intents.append({intent:"nasa"})
-    for concept in concepts_data["concepts"]:
-        matched_words = [word for word in concept["examples"] if word in input_text.lower()]
-        if matched_words:
-            matched_intents.append({"intent": concept["name"], "matched_words": matched_words})
+    matched_intents.extend(intent_index.search_intent(input_text))
     return matched_intents if matched_intents else None
 
 server_info = ""
@@ -114,13 +107,13 @@ def generate_response(inputOpenFloor, sender_from):
     include_manifest_request = False
 
     envelope = Envelope.from_json(inputOpenFloor,as_payload=True)
+    conversation = getattr(envelope, "conversation", None) if envelope else None
+    conversation_context = globals.conversations.get(getattr(conversation, "id", None))
     try:
-        conversants = None
-        if envelope and getattr(envelope, "conversation", None):
-            conversants = getattr(envelope.conversation, "conversants", None)
-        globals.number_conversants = len(conversants) if conversants else 0
+        conversants = getattr(conversation, "conversants", None) if conversation else None
+        conversation_context.number_conversants = len(conversants) if conversants else 0
     except Exception:
-        globals.number_conversants = 0
+        conversation_context.number_conversants = 0
     event_list  = envelope.events
     print(f"Received event to {to_url} from {sender_from}")
 
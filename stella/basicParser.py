@@ -1,15 +1,10 @@
 import json
 from datetime import datetime
 
+import intent_index
+
 def search_intent(input_text):
-    with open('../../../Support/intentConcepts.json', 'r') as f:
-        concepts_data = json.load(f)
-    
-    matched_intents = []
-    for concept in concepts_data["concepts"]:
-        matched_words = [word for word in concept["examples"] if word in input_text.lower()]
-        if matched_words:
-            matched_intents.append({"intent": concept["name"], "matched_words": matched_words})
+    matched_intents = intent_index.search_intent(input_text)
     return matched_intents if matched_intents else None
 
 server_info = ""
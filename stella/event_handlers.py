@@ -153,10 +153,8 @@ def bot_on_utterance(agent, event: UtteranceEvent, in_envelope: Envelope, out_en
     if user_text is None:
         user_text = ""
 
-    # Maintain conversation state keyed by conversation id
+    # Conversation history is kept per conversation id (see conversation_memory)
     conv_id = in_envelope.conversation.id if in_envelope and in_envelope.conversation else None
-    if conv_id is not None and conv_id not in agent._conversation_state:
-        agent._conversation_state[conv_id] = {}
 
     reply_text = agent.generate_openai_response(user_text, conv_id)
 
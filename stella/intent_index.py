@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Intent Concept Index
+
+Loads intentConcepts.json once and compiles every concept example into one
+Aho-Corasick automaton, so an utterance is matched against all examples in a
+single pass instead of a substring scan per example. Matching keeps the
+original semantics: an example matches anywhere in the lowercased text, and
+results list concepts in file order with their matched examples.
+
+The file is reloaded when its modification time changes. The mtime is
+checked at most every INTENT_INDEX_CHECK_SECONDS, so the hot path does no
+disk I/O in between.
+
+Usage:
+    import intent_index
+    intent_index.search_intent("are you still there?")
+    # [{"intent": "stillThere", "matched_words": ["are you still there", "are you there"]}]
+
+Configuration (environment variables):
+    INTENT_INDEX_CHECK_SECONDS  - how often to look for a changed file (default 2)
+"""
+
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+INTENT_CONCEPTS_PATH = os.path.join(os.path.dirname(__file__), "intentConcepts.json")
+INTENT_INDEX_CHECK_SECONDS = float(os.environ.get("INTENT_INDEX_CHECK_SECONDS", 2))
+
+
+class _Automaton:
+    """Aho-Corasick over lowercase examples; reports every example id found, overlaps included."""
+
+    def __init__(self, patterns: List[str]):
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[Tuple[int, ...]] = [()]
+        for pattern_id, pattern in enumerate(patterns):
+            if pattern:
+                self._add(pattern, pattern_id)
+        self._link()
+
+    def _add(self, pattern: str, pattern_id: int) -> None:
+        state = 0
+        for char in pattern:
+            next_state = self._goto[state].get(char)
+            if next_state is None:
+                next_state = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append(())
+                self._goto[state][char] = next_state
+            state = next_state
+        self._out[state] = self._out[state] + (pattern_id,)
+
+    def _link(self) -> None:
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, next_state in self._goto[state].items():
+                queue.append(next_state)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                link = self._goto[fallback].get(char, 0)
+                self._fail[next_state] = link if link != next_state else 0
+                self._out[next_state] = self._out[next_state] + self._out[self._fail[next_state]]
+
+    def find(self, text: str) -> set:
+        goto = self._goto
+        fail = self._fail
+        out = self._out
+        found = set()
+        state = 0
+        for char in text:
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            if out[state]:
+                found.update(out[state])
+        return found
+
+
+class IntentIndex:
+    """intentConcepts.json compiled for single-pass matching, reloaded when the file changes."""
+
+    def __init__(self, path: str = INTENT_CONCEPTS_PATH, check_seconds: float = INTENT_INDEX_CHECK_SECONDS):
+        self.path = path
+        self.check_seconds = check_seconds
+        self._lock = threading.Lock()
+        self._mtime: Optional[float] = None
+        self._next_check = 0.0
+        # (automaton, examples) published together so a search never pairs one load's
+        # automaton with another's examples. Examples per id: (concept position, name, example as written).
+        self._compiled: Tuple[_Automaton, Tuple[Tuple[int, str, str], ...]] = (_Automaton([]), ())
+
+    def _refresh(self) -> None:
+        now = time.monotonic()
+        if now < self._next_check:
+            return
+        with self._lock:
+            if now < self._next_check:
+                return
+            self._next_check = now + self.check_seconds
+            try:
+                mtime = os.stat(self.path).st_mtime
+            except OSError as exc:
+                if self._mtime is None:
+                    logger.warning("Intent concepts file %s not readable: %s", self.path, exc)
+                    self._mtime = -1.0
+                return
+            if mtime == self._mtime:
+                return
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    concepts = json.load(f).get("concepts", [])
+            except (OSError, ValueError) as exc:
+                logger.warning("Keeping previous intent concepts; could not load %s: %s", self.path, exc)
+                return
+            examples = tuple(
+                (position, concept.get("name", ""), str(example))
+                for position, concept in enumerate(concepts)
+                for example in concept.get("examples", [])
+            )
+            self._compiled = (_Automaton([example.lower() for _position, _name, example in examples]), examples)
+            self._mtime = mtime
+            logger.info("Loaded %d intent examples from %s", len(examples), self.path)
+
+    def search(self, input_text: str) -> List[Dict[str, object]]:
+        """[{"intent": name, "matched_words": [examples]}, ...] in file order; [] if nothing matched."""
+        self._refresh()
+        automaton, examples = self._compiled
+        found = automaton.find((input_text or "").lower())
+
+        matched: List[Dict[str, object]] = []
+        last_position = None
+        for example_id in sorted(found):
+            position, name, example = examples[example_id]
+            if position != last_position:
+                matched.append({"intent": name, "matched_words": []})
+                last_position = position
+            matched[-1]["matched_words"].append(example)
+        return matched
+
+
+default_index = IntentIndex()
+
+
+def search_intent(input_text: str) -> List[Dict[str, object]]:
+    return default_index.search(input_text)
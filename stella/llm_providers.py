@@ -0,0 +1,177 @@
+#!/usr/bin/env python3
+"""
+LLM Provider Registry
+
+Builds each LLM client (Ollama via its OpenAI-compatible endpoint, OpenAI)
+once and reuses it, so HTTP connection pools survive between requests. Tracks
+provider health with a simple circuit breaker: after a provider fails it is
+skipped for a cooldown window, so failover to the next provider costs nothing
+until the cooldown expires and the provider is tried again. Only errors that
+say the provider is unhealthy (connection errors, timeouts, 429 and 5xx)
+open the breaker; client errors such as a 404 for a missing model are
+recorded but leave it closed. Per-provider latency is recorded for diagnostics.
+
+Configuration (environment variables):
+    LLM_PROVIDER_FAILURE_THRESHOLD  - consecutive failures before skipping a provider (default 1)
+    LLM_PROVIDER_COOLDOWN_SECONDS   - how long a failed provider is skipped (default 60)
+"""
+
+import logging
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import httpx
+import openai
+from openai import OpenAI
+
+logger = logging.getLogger(__name__)
+
+LLM_PROVIDER_FAILURE_THRESHOLD = int(os.environ.get("LLM_PROVIDER_FAILURE_THRESHOLD", 1))
+LLM_PROVIDER_COOLDOWN_SECONDS = float(os.environ.get("LLM_PROVIDER_COOLDOWN_SECONDS", 60))
+
+# Smoothing factor for the latency moving average.
+_LATENCY_ALPHA = 0.3
+
+
+def is_provider_failure(error: Exception) -> bool:
+    """True for errors that say the provider is unhealthy rather than the request being wrong."""
+    if isinstance(error, openai.APIStatusError):
+        return error.status_code == 429 or error.status_code >= 500
+    # Connection errors, timeouts and broken streams.
+    return isinstance(error, (openai.APIError, httpx.TransportError, ConnectionError, TimeoutError))
+
+
+class ProviderHealth:
+    """Health and latency bookkeeping for one provider."""
+
+    def __init__(self) -> None:
+        self.consecutive_failures = 0
+        self.open_until = 0.0
+        self.successes = 0
+        self.failures = 0
+        self.latency_ewma: Optional[float] = None
+        self.last_latency: Optional[float] = None
+        self.last_error = ""
+
+    def is_available(self, now: float) -> bool:
+        return now >= self.open_until
+
+    def to_dict(self, now: float) -> Dict[str, Any]:
+        return {
+            "available": self.is_available(now),
+            "cooldown_remaining": round(max(0.0, self.open_until - now), 1),
+            "successes": self.successes,
+            "failures": self.failures,
+            "consecutive_failures": self.consecutive_failures,
+            "latency_ewma": None if self.latency_ewma is None else round(self.latency_ewma, 3),
+            "last_latency": None if self.last_latency is None else round(self.last_latency, 3),
+            "last_error": self.last_error,
+        }
+
+
+class ProviderRegistry:
+    """Cached LLM clients plus a per-provider circuit breaker."""
+
+    def __init__(
+        self,
+        provider_mode: str,
+        ollama_base_url: str,
+        ollama_model: str,
+        openai_model: str,
+        failure_threshold: int = LLM_PROVIDER_FAILURE_THRESHOLD,
+        cooldown_seconds: float = LLM_PROVIDER_COOLDOWN_SECONDS,
+    ):
+        self.provider_mode = provider_mode
+        self.ollama_base_url = ollama_base_url
+        self.ollama_model = ollama_model
+        self.openai_model = openai_model
+        self.failure_threshold = max(1, failure_threshold)
+        self.cooldown_seconds = cooldown_seconds
+        self._clients: Dict[str, Tuple[Tuple[str, str], OpenAI]] = {}
+        self._health: Dict[str, ProviderHealth] = {}
+        self._lock = threading.Lock()
+
+    def _client(self, provider: str, base_url: str, api_key: str) -> OpenAI:
+        # Rebuild only if the endpoint or key changed (e.g. .env reloaded).
+        signature = (base_url, api_key)
+        cached = self._clients.get(provider)
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+        client = OpenAI(base_url=base_url, api_key=api_key) if base_url else OpenAI(api_key=api_key)
+        self._clients[provider] = (signature, client)
+        return client
+
+    def targets(self) -> List[Tuple[str, OpenAI, str]]:
+        """
+        Return (provider, client, model) tuples in preference order.
+
+        Providers in their cooldown window are left out, unless every provider
+        is cooling down, in which case all are returned (soonest to recover
+        first) rather than failing outright.
+        """
+        configured: List[Tuple[str, OpenAI, str]] = []
+        api_key = (os.environ.get("OPENAI_API_KEY") or "").strip()
+        with self._lock:
+            if self.provider_mode in {"auto", "ollama"}:
+                configured.append((
+                    "ollama",
+                    self._client("ollama", self.ollama_base_url, os.environ.get("OLLAMA_API_KEY") or "ollama"),
+                    self.ollama_model,
+                ))
+            if api_key and self.provider_mode in {"auto", "openai", "ollama"}:
+                configured.append(("openai", self._client("openai", "", api_key), self.openai_model))
+
+            now = time.monotonic()
+            available = [target for target in configured if self._health_for(target[0]).is_available(now)]
+            if available:
+                return available
+            return sorted(configured, key=lambda target: self._health_for(target[0]).open_until)
+
+    def record_success(self, provider: str, latency: float) -> None:
+        with self._lock:
+            health = self._health_for(provider)
+            health.successes += 1
+            health.consecutive_failures = 0
+            health.open_until = 0.0
+            self._record_latency(health, latency)
+
+    def record_failure(self, provider: str, latency: float, error: Exception) -> None:
+        """Record a failed call; only provider failures (see is_provider_failure) can open the breaker."""
+        with self._lock:
+            health = self._health_for(provider)
+            health.failures += 1
+            health.last_error = str(error)[:200]
+            self._record_latency(health, latency)
+            if not is_provider_failure(error):
+                return
+            health.consecutive_failures += 1
+            if health.consecutive_failures >= self.failure_threshold:
+                health.open_until = time.monotonic() + self.cooldown_seconds
+                logger.warning(
+                    "LLM provider %s marked unavailable for %.0fs after %d failure(s)",
+                    provider,
+                    self.cooldown_seconds,
+                    health.consecutive_failures,
+                )
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        with self._lock:
+            now = time.monotonic()
+            return {provider: health.to_dict(now) for provider, health in self._health.items()}
+
+    def _health_for(self, provider: str) -> ProviderHealth:
+        health = self._health.get(provider)
+        if health is None:
+            health = ProviderHealth()
+            self._health[provider] = health
+        return health
+
+    @staticmethod
+    def _record_latency(health: ProviderHealth, latency: float) -> None:
+        health.last_latency = latency
+        if health.latency_ewma is None:
+            health.latency_ewma = latency
+        else:
+            health.latency_ewma = _LATENCY_ALPHA * latency + (1 - _LATENCY_ALPHA) * health.latency_ewma
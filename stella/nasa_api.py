@@ -1,7 +1,71 @@
-import requests
-import re
+#!/usr/bin/env python3
+"""
+NASA API Client
+
+One pooled HTTP session with explicit connect/read timeouts, in front of a
+small TTL cache:
+
+- APOD responses are keyed by date: today's picture is kept for
+  NASA_APOD_TTL_SECONDS, an explicitly dated one for NASA_ARCHIVE_TTL_SECONDS.
+- Image searches are keyed by the normalized query, so "Mars Rover" and
+  "mars  rover" share one entry; other URLs are keyed by the URL itself.
+- Stale-while-revalidate: an expired entry younger than its TTL plus
+  NASA_STALE_SECONDS is returned at once and refreshed in the background
+  (one refresh per key at a time).
+- Quota awareness: api.nasa.gov reports X-RateLimit-Remaining (DEMO_KEY allows
+  30 requests an hour). Background refreshes stop once only
+  NASA_QUOTA_RESERVE requests are left, and after a 429 or an empty quota
+  metered calls are only answered from the cache until the window passes.
+
+Usage:
+    nasa_api.get_apod()                          # today's Astronomy Picture of the Day
+    nasa_api.search_images("mars rover")         # images-api.nasa.gov search
+    nasa_api.get_nasa("GET https://...")         # any NASA URL, e.g. LLM-generated
+
+Configuration (environment variables):
+    NASA_API_KEY                  - api.nasa.gov key (default DEMO_KEY)
+    NASA_CONNECT_TIMEOUT_SECONDS  - connect timeout (default 3.05)
+    NASA_TIMEOUT_SECONDS          - read timeout (default 10)
+    NASA_POOL_SIZE                - pooled connections per host (default 10)
+    NASA_CACHE_ENABLED            - "false" disables caching (default "true")
+    NASA_CACHE_MAX_ENTRIES        - max cached responses (default 256)
+    NASA_APOD_TTL_SECONDS         - freshness of today's APOD (default 3600)
+    NASA_ARCHIVE_TTL_SECONDS      - freshness of a dated APOD (default 30 days)
+    NASA_SEARCH_TTL_SECONDS       - freshness of image searches (default 3600)
+    NASA_DEFAULT_TTL_SECONDS      - freshness of any other URL (default 600)
+    NASA_STALE_SECONDS            - how long past its TTL an entry may be served (default 86400)
+    NASA_QUOTA_RESERVE            - requests kept back from background refreshes (default 3)
+    NASA_QUOTA_WINDOW_SECONDS     - how long an exhausted quota blocks metered calls (default 3600)
+"""
+
+import datetime
+import logging
 import os
-from typing import Optional
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional, Tuple
+from urllib.parse import parse_qsl, urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+logger = logging.getLogger(__name__)
+
+NASA_CONNECT_TIMEOUT_SECONDS = float(os.environ.get("NASA_CONNECT_TIMEOUT_SECONDS", 3.05))
+NASA_TIMEOUT_SECONDS = float(os.environ.get("NASA_TIMEOUT_SECONDS", 10))
+NASA_POOL_SIZE = int(os.environ.get("NASA_POOL_SIZE", 10))
+NASA_CACHE_ENABLED = os.environ.get("NASA_CACHE_ENABLED", "true").strip().lower() not in {"0", "false", "no", "off"}
+NASA_CACHE_MAX_ENTRIES = int(os.environ.get("NASA_CACHE_MAX_ENTRIES", 256))
+NASA_APOD_TTL_SECONDS = float(os.environ.get("NASA_APOD_TTL_SECONDS", 3600))
+NASA_ARCHIVE_TTL_SECONDS = float(os.environ.get("NASA_ARCHIVE_TTL_SECONDS", 30 * 86400))
+NASA_SEARCH_TTL_SECONDS = float(os.environ.get("NASA_SEARCH_TTL_SECONDS", 3600))
+NASA_DEFAULT_TTL_SECONDS = float(os.environ.get("NASA_DEFAULT_TTL_SECONDS", 600))
+NASA_STALE_SECONDS = float(os.environ.get("NASA_STALE_SECONDS", 86400))
+NASA_QUOTA_RESERVE = int(os.environ.get("NASA_QUOTA_RESERVE", 3))
+NASA_QUOTA_WINDOW_SECONDS = float(os.environ.get("NASA_QUOTA_WINDOW_SECONDS", 3600))
 
 # Parameters for the request
 params = {
@@ -13,6 +77,18 @@ params = {
 # NASA APOD API endpoint
 url = "https://api.nasa.gov/planetary/apod"
 
+# NASA Image and Video Library search endpoint (no API key, not metered)
+search_url = "https://images-api.nasa.gov/search"
+
+# Host whose requests count against the api_key quota.
+_METERED_HOST = "api.nasa.gov"
+
+_TIMEOUT = (NASA_CONNECT_TIMEOUT_SECONDS, NASA_TIMEOUT_SECONDS)
+
+
+class NasaQuotaExceeded(requests.HTTPError):
+    """The api.nasa.gov quota is used up and nothing usable is cached."""
+
 
 def _extract_url_from_text(text: str) -> Optional[str]:
     """Return the first https?:// URL found in text, or None."""
@@ -43,6 +119,239 @@ def _extract_url_from_text(text: str) -> Optional[str]:
     return None
 
 
+def normalize_query(query: str) -> str:
+    """Lowercase and collapse whitespace so equivalent searches share a cache entry."""
+    return " ".join(str(query or "").split()).lower()
+
+
+def _build_session() -> requests.Session:
+    session = requests.Session()
+    retry = Retry(total=2, backoff_factor=0.3, status_forcelist=(502, 503, 504), allowed_methods=("GET",))
+    adapter = HTTPAdapter(pool_connections=4, pool_maxsize=NASA_POOL_SIZE, max_retries=retry)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+_session = _build_session()
+
+
+class _Quota:
+    """What api.nasa.gov last said about the remaining hourly quota."""
+
+    def __init__(self, reserve: int = NASA_QUOTA_RESERVE, window_seconds: float = NASA_QUOTA_WINDOW_SECONDS):
+        self.reserve = reserve
+        self.window_seconds = window_seconds
+        self.limit: Optional[int] = None
+        self.remaining: Optional[int] = None
+        self.blocked_until = 0.0
+        self._lock = threading.Lock()
+
+    def allows(self, background: bool = False) -> bool:
+        with self._lock:
+            if time.monotonic() < self.blocked_until:
+                return False
+            if background and self.remaining is not None:
+                return self.remaining > self.reserve
+            return True
+
+    def update(self, status_code: int, headers: Any) -> None:
+        with self._lock:
+            try:
+                self.limit = int(headers.get("X-RateLimit-Limit"))
+            except (TypeError, ValueError):
+                pass
+            try:
+                self.remaining = int(headers.get("X-RateLimit-Remaining"))
+            except (TypeError, ValueError):
+                pass
+
+            if status_code == 429 or self.remaining == 0:
+                try:
+                    wait = float(headers.get("Retry-After"))
+                except (TypeError, ValueError):
+                    wait = self.window_seconds
+                self.blocked_until = time.monotonic() + wait
+                # Unknown again once the window has passed.
+                self.remaining = None
+                logger.warning("NASA API quota exhausted; serving cached responses for %.0fs", wait)
+
+    def to_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "limit": self.limit,
+                "remaining": self.remaining,
+                "blocked_for": round(max(0.0, self.blocked_until - time.monotonic()), 1),
+            }
+
+
+class NasaCache:
+    """Thread-safe TTL + LRU cache that also hands out stale entries for revalidation."""
+
+    def __init__(
+        self,
+        max_entries: int = NASA_CACHE_MAX_ENTRIES,
+        stale_seconds: float = NASA_STALE_SECONDS,
+        enabled: bool = NASA_CACHE_ENABLED,
+    ):
+        self.max_entries = max_entries
+        self.stale_seconds = stale_seconds
+        self.enabled = enabled
+        # key -> (value, fresh_until, usable_until)
+        self._entries: "OrderedDict[Hashable, tuple[Any, float, float]]" = OrderedDict()
+        self._refreshing: set = set()
+        self._lock = threading.Lock()
+        self._counters = {"hits": 0, "misses": 0, "stale": 0, "refreshes": 0, "throttled": 0, "errors": 0}
+
+    def lookup(self, key: Hashable) -> Tuple[Optional[Any], bool]:
+        """(value, is_fresh); value is None when nothing usable is cached."""
+        if not self.enabled:
+            return None, False
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None, False
+            if entry[2] <= now:
+                del self._entries[key]
+                return None, False
+            self._entries.move_to_end(key)
+            return entry[0], entry[1] > now
+
+    def store(self, key: Hashable, value: Any, ttl: float) -> None:
+        if not self.enabled:
+            return
+        now = time.monotonic()
+        with self._lock:
+            self._entries[key] = (value, now + ttl, now + ttl + self.stale_seconds)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def begin_refresh(self, key: Hashable) -> bool:
+        """Claim the background refresh of key; False if one is already running."""
+        with self._lock:
+            if key in self._refreshing:
+                return False
+            self._refreshing.add(key)
+            self._counters["refreshes"] += 1
+            return True
+
+    def end_refresh(self, key: Hashable) -> None:
+        with self._lock:
+            self._refreshing.discard(key)
+
+    def count(self, counter: str) -> None:
+        with self._lock:
+            self._counters[counter] += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._counters["hits"] + self._counters["misses"] + self._counters["stale"]
+            served = self._counters["hits"] + self._counters["stale"]
+            return dict(
+                self._counters,
+                entries=len(self._entries),
+                refreshing=len(self._refreshing),
+                hit_rate=round(served / lookups, 3) if lookups else 0.0,
+            )
+
+
+response_cache = NasaCache()
+quota = _Quota()
+
+
+def _request_policy(target: str, query: Optional[Dict[str, Any]] = None) -> Tuple[Hashable, float, bool]:
+    """Cache key, TTL and whether the call is metered, for a URL plus query parameters."""
+    parts = urlsplit(target)
+    merged = dict(parse_qsl(parts.query))
+    merged.update({name: str(value) for name, value in (query or {}).items()})
+    metered = parts.hostname == _METERED_HOST
+    path = parts.path.rstrip("/")
+
+    if metered and path == "/planetary/apod":
+        day = merged.get("date")
+        if day:
+            return ("apod", day, merged.get("hd", "")), NASA_ARCHIVE_TTL_SECONDS, True
+        today = datetime.date.today().isoformat()
+        return ("apod", today, merged.get("hd", "")), NASA_APOD_TTL_SECONDS, True
+
+    if parts.hostname == "images-api.nasa.gov" and path == "/search" and "q" in merged:
+        extra = tuple(sorted((name, value) for name, value in merged.items() if name != "q"))
+        return ("search", normalize_query(merged["q"]), extra), NASA_SEARCH_TTL_SECONDS, False
+
+    # Never keep the API key in a cache key.
+    merged.pop("api_key", None)
+    base = f"{parts.scheme}://{parts.netloc}{parts.path}"
+    return ("url", base, tuple(sorted(merged.items()))), NASA_DEFAULT_TTL_SECONDS, metered
+
+
+def _fetch(target: str, query: Optional[Dict[str, Any]], metered: bool) -> Any:
+    response = _session.get(target, params=query, timeout=_TIMEOUT)
+    if metered:
+        quota.update(response.status_code, response.headers)
+    if response.status_code == 429:
+        raise NasaQuotaExceeded("NASA API rate limit reached (HTTP 429)")
+    response.raise_for_status()
+    return response.json()
+
+
+def _refresh_in_background(key: Hashable, ttl: float, load: Callable[[], Any]) -> None:
+    def run() -> None:
+        try:
+            response_cache.store(key, load(), ttl)
+        except Exception as exc:
+            response_cache.count("errors")
+            logger.info("Background NASA refresh of %s failed, keeping stale copy: %s", key, exc)
+        finally:
+            response_cache.end_refresh(key)
+
+    threading.Thread(target=run, name="nasa-refresh", daemon=True).start()
+
+
+def _cached_get(target: str, query: Optional[Dict[str, Any]] = None) -> Any:
+    key, ttl, metered = _request_policy(target, query)
+    value, fresh = response_cache.lookup(key)
+    if value is not None:
+        if fresh:
+            response_cache.count("hits")
+            return value
+        response_cache.count("stale")
+        if (not metered or quota.allows(background=True)) and response_cache.begin_refresh(key):
+            _refresh_in_background(key, ttl, lambda: _fetch(target, query, metered))
+        return value
+
+    if metered and not quota.allows():
+        response_cache.count("throttled")
+        raise NasaQuotaExceeded("NASA API quota exhausted; try again later")
+    response_cache.count("misses")
+    try:
+        value = _fetch(target, query, metered)
+    except Exception:
+        response_cache.count("errors")
+        raise
+    response_cache.store(key, value, ttl)
+    return value
+
+
+def _resolve_call(api_call: Optional[str]) -> Tuple[str, Optional[Dict[str, Any]]]:
+    """URL and query parameters for get_nasa()'s argument."""
+    if api_call is None:
+        return url, params
+    # If caller passed a string that contains a URL or begins with 'GET ', extract the URL;
+    # otherwise try the string as-is (the request will raise a helpful error).
+    target = _extract_url_from_text(str(api_call))
+    return (target if target is not None else str(api_call)), None
+
+
+def _search_params(query: str, media_type: str) -> Dict[str, str]:
+    return {"q": normalize_query(query), "media_type": media_type}
+
+
 def get_nasa(api_call: Optional[str] = None):
     """Fetch NASA data.
 
@@ -50,21 +359,27 @@ def get_nasa(api_call: Optional[str] = None):
     - If api_call is a string that includes a URL (for example, "GET https://..." or
       a code-fenced block returned by an LLM), extract the URL and call it.
     """
-    if api_call is None:
-        response = requests.get(url, params=params)
-        response.raise_for_status()
-        return response.json()
+    target, query = _resolve_call(api_call)
+    return _cached_get(target, query)
 
-    # If caller passed a string that contains a URL or begins with 'GET ', extract the URL
-    target = _extract_url_from_text(str(api_call))
-    if target is None:
-        # If we couldn't find a URL, try to call the string as-is (will raise helpful error)
-        response = requests.get(str(api_call))
-    else:
-        response = requests.get(target)
 
-    response.raise_for_status()
-    return response.json()
+def get_apod(date: Optional[str] = None):
+    """Astronomy Picture of the Day, for today or a YYYY-MM-DD date."""
+    return _cached_get(url, dict(params, date=date) if date else params)
+
+
+def search_images(query: str, media_type: str = "image"):
+    """Search the NASA Image and Video Library."""
+    return _cached_get(search_url, _search_params(query, media_type))
+
+
+def search_nasa_content(text: str):
+    """Image search for free text, as used by StellaCore."""
+    return search_images(text)
+
+
+def stats() -> Dict[str, Any]:
+    return dict(response_cache.stats(), quota=quota.to_dict())
 
 
 def parse_nasa_data(nasa_data):
@@ -29,6 +29,9 @@ import json
 import openai
 from openai import OpenAI
 import nasa_api
+import conversation_memory
+import globals
+import intent_index
 from typing import Dict, Any
 import re
 import event_handlers
@@ -159,18 +162,6 @@ class StellaAgent(BotAgent):
         except Exception:
             self._openai_client = None
 
-        # conversation state stored per-conversation id
-        self._conversation_state: Dict[str, Dict[str, Any]] = {}
-
-        # load intent concepts from repo file
-        self._intent_concepts = None
-        try:
-            ic_path = os.path.join(os.path.dirname(__file__), 'intentConcepts.json')
-            with open(ic_path, 'r', encoding='utf-8') as f:
-                self._intent_concepts = json.load(f)
-        except Exception:
-            self._intent_concepts = {"concepts": []}
-
     def search_intent(self, input_text: str):
         """Simple intent matcher using intentConcepts.json and keyword rules."""
         matched_intents = []
@@ -180,12 +171,8 @@ class StellaAgent(BotAgent):
         if "astronomy" in input_text_lower or "space" in input_text_lower:
             matched_intents.append({"intent": "nasa"})
 
-        # Match configured concepts
-        for concept in self._intent_concepts.get("concepts", []):
-            examples = concept.get("examples", [])
-            matched_words = [word for word in examples if word in input_text_lower]
-            if matched_words:
-                matched_intents.append({"intent": concept.get("name"), "matched_words": matched_words})
+        # Match configured concepts (shared index, reloaded when the file changes)
+        matched_intents.extend(intent_index.search_intent(input_text))
 
         return matched_intents if matched_intents else None
 
@@ -205,9 +192,10 @@ class StellaAgent(BotAgent):
                 {"role": "system", "content": content}
             ]
 
-            # Add prior conversation messages if available for this conversation
-            if conv_id and conv_id in self._conversation_state and "messages" in self._conversation_state[conv_id]:
-                messages.extend(self._conversation_state[conv_id]["messages"])
+            # Add the token-budgeted history of this conversation
+            memory = conversation_memory.memory_for(globals.conversations.get(conv_id)) if conv_id else None
+            if memory is not None:
+                messages.extend(memory.messages())
 
             messages.append({"role": "user", "content": prompt})
 
@@ -297,14 +285,9 @@ class StellaAgent(BotAgent):
 
             assistant_reply = assistant_reply.strip()
 
-            # store messages in conversation state
-            if conv_id:
-                if conv_id not in self._conversation_state:
-                    self._conversation_state[conv_id] = {}
-                if "messages" not in self._conversation_state[conv_id]:
-                    self._conversation_state[conv_id]["messages"] = []
-                self._conversation_state[conv_id]["messages"].append({"role": "user", "content": prompt})
-                self._conversation_state[conv_id]["messages"].append({"role": "assistant", "content": assistant_reply})
+            # store messages in conversation memory
+            if memory is not None:
+                memory.add_exchange(prompt, assistant_reply)
 
             return assistant_reply
         except Exception as e:
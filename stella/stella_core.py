@@ -12,6 +12,9 @@ from typing import Dict, Any, Optional
 from openai import OpenAI
 import nasa_api
 import generate_nasa_gallery
+import conversation_memory
+import globals
+import intent_index
 
 
 class StellaCore:
@@ -21,8 +24,6 @@ class StellaCore:
         """Initialize the core processing components."""
         self._config = self._load_config()
         self._openai_client = self._init_openai_client()
-        self._intent_concepts = self._load_intent_concepts()
-        self._conversation_state: Dict[str, Dict[str, Any]] = {}
     
     def _load_config(self) -> dict:
         """Load assistant configuration."""
@@ -43,44 +44,19 @@ class StellaCore:
             pass
         return None
     
-    def _load_intent_concepts(self) -> dict:
-        """Load intent concepts for processing."""
-        try:
-            ic_path = os.path.join(os.path.dirname(__file__), 'intentConcepts.json')
-            with open(ic_path, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except Exception:
-            return {"concepts": []}
-    
     def search_intent(self, input_text: str) -> list:
-        """Simple intent matcher using intentConcepts.json and keyword rules."""
-        matched_intents = []
-        input_text_lower = (input_text or "").lower()
-        
-        for concept in self._intent_concepts.get("concepts", []):
-            concept_name = concept.get("name", "")
-            keywords = concept.get("keywords", [])
-            
-            for keyword in keywords:
-                if keyword.lower() in input_text_lower:
-                    if concept_name not in matched_intents:
-                        matched_intents.append(concept_name)
-                    break
-        
-        return matched_intents
+        """Names of the intentConcepts.json concepts whose examples occur in the input."""
+        return [match["intent"] for match in intent_index.search_intent(input_text or "")]
     
     def generate_response(self, user_input: str, conversation_id: str = "default") -> str:
         """Generate response to user input using AI and intent matching."""
         print(f"Processing input: {user_input}")
         
-        # Initialize conversation state if needed
-        if conversation_id not in self._conversation_state:
-            self._conversation_state[conversation_id] = {
-                "messages": [],
-                "context": {}
-            }
-        
-        state = self._conversation_state[conversation_id]
+        # Per-conversation state lives in the shared store, which evicts idle conversations
+        context = globals.conversations.get(conversation_id)
+        with context.lock:
+            state = context.state.setdefault("core", {"context": {}})
+        state["memory"] = conversation_memory.memory_for(context)
         
         # Check for NASA-related intents
         intents = self.search_intent(user_input)
@@ -120,22 +96,22 @@ class StellaCore:
     def _handle_openai_request(self, user_input: str, state: dict) -> str:
         """Handle general requests using OpenAI."""
         try:
-            # Add user message to conversation history
-            state["messages"].append({"role": "user", "content": user_input})
+            memory = state["memory"]
             
-            # Generate response
+            # Generate response with the token-budgeted history for context
             response = self._openai_client.chat.completions.create(
                 model="gpt-3.5-turbo",
                 messages=[
                     {"role": "system", "content": "You are Stella, a helpful AI assistant with expertise in space and astronomy."},
-                    *state["messages"][-10:]  # Keep last 10 messages for context
+                    *memory.messages(),
+                    {"role": "user", "content": user_input}
                 ],
                 max_tokens=500,
                 temperature=0.7
             )
             
             assistant_message = response.choices[0].message.content
-            state["messages"].append({"role": "assistant", "content": assistant_message})
+            memory.add_exchange(user_input, assistant_message)
             
             return assistant_message
             
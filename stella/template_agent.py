@@ -19,6 +19,7 @@ from openfloor.manifest import Manifest, Identification, Capability, SupportedLa
 from openfloor.dialog_event import DialogEvent, Feature, TextFeature, Token
 
 import envelope_handler
+import globals
 import utterance_handler
 
 
@@ -89,7 +90,8 @@ class BotAgent:
             conversation=Conversation(id=conversation_id),
             sender=Sender(speakerUri=self.speakerUri, serviceUrl=self.serviceUrl),
         )
-        self.on_envelope(in_envelope, out_envelope)
+        with globals.conversation_scope(conversation_id):
+            self.on_envelope(in_envelope, out_envelope)
         return out_envelope
 
     def _is_addressed_to_me(self, event: Any) -> bool:
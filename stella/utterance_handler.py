@@ -9,15 +9,18 @@ import json
 import logging
 import os
 import re
+import time
 from typing import Dict, List, Optional
-from urllib.parse import quote_plus
 
 from openai import OpenAI
 import generate_nasa_gallery
 import nasa_api
+import conversation_memory
 import globals
+import intent_index
+import llm_cache
+import llm_providers
 
-conversation_state = {}
 logger = logging.getLogger(__name__)
 
 _CONFIG_PATH = os.path.join(os.path.dirname(__file__), "assistant_config.json")
@@ -49,26 +52,11 @@ def _ollama_base_url() -> str:
     return base_url
 
 
-def _llm_targets() -> List[tuple[str, OpenAI, str]]:
-    targets: List[tuple[str, OpenAI, str]] = []
-    openai_api_key = (os.environ.get("OPENAI_API_KEY") or "").strip()
-
-    if LLM_PROVIDER in {"auto", "ollama"}:
-        targets.append(
-            (
-                "ollama",
-                OpenAI(
-                    base_url=_ollama_base_url(),
-                    api_key=(os.environ.get("OLLAMA_API_KEY") or "ollama"),
-                ),
-                OLLAMA_MODEL,
-            )
-        )
+_llm_providers = llm_providers.ProviderRegistry(LLM_PROVIDER, _ollama_base_url(), OLLAMA_MODEL, OPENAI_MODEL)
 
-    if openai_api_key and LLM_PROVIDER in {"auto", "openai", "ollama"}:
-        targets.append(("openai", OpenAI(api_key=openai_api_key), OPENAI_MODEL))
 
-    return targets
+def _llm_targets() -> List[tuple[str, OpenAI, str]]:
+    return _llm_providers.targets()
 
 
 def _build_client() -> OpenAI | None:
@@ -82,7 +70,7 @@ def _provider_label() -> str:
     return ""
 
 
-def _create_chat_completion(messages: List[Dict[str, str]], **kwargs):
+def _create_chat_completion(messages: List[Dict[str, str]], cache: bool | None = None, **kwargs):
     global _last_llm_provider, _last_llm_model
     last_error = None
     query_text = ""
@@ -91,13 +79,27 @@ def _create_chat_completion(messages: List[Dict[str, str]], **kwargs):
             query_text = (message.get("content") or "").replace("\n", " ").strip()
             break
 
+    cache_key = None
+    if llm_cache.should_cache(kwargs, cache):
+        cache_key = llm_cache.cache_key(messages, f"{LLM_PROVIDER}:{OLLAMA_MODEL}|{OPENAI_MODEL}", kwargs)
+        cached_text = llm_cache.response_cache.get(cache_key)
+        if cached_text is not None:
+            logger.info("LLM cache hit query=%s", query_text[:120])
+            return llm_cache.cached_completion(cached_text)
+
     for provider, llm_client, model in _llm_targets():
+        started = time.perf_counter()
         try:
             response = llm_client.chat.completions.create(
                 model=model,
                 messages=messages,
                 **kwargs,
             )
+            _llm_providers.record_success(provider, time.perf_counter() - started)
+            if cache_key is not None:
+                response_text = llm_cache.completion_text(response)
+                if response_text:
+                    llm_cache.response_cache.set(cache_key, response_text)
             _last_llm_provider = provider
             _last_llm_model = model
             logger.info(
@@ -108,6 +110,7 @@ def _create_chat_completion(messages: List[Dict[str, str]], **kwargs):
             )
             return response
         except Exception as exc:
+            _llm_providers.record_failure(provider, time.perf_counter() - started, exc)
             last_error = exc
             logger.warning("%s request failed: %s", provider, exc)
 
@@ -117,24 +120,25 @@ def _create_chat_completion(messages: List[Dict[str, str]], **kwargs):
 
 
 def _search_intent(input_text: str) -> Optional[List[Dict[str, object]]]:
-    json_file_path = os.path.join(os.path.dirname(__file__), "intentConcepts.json")
-    with open(json_file_path, "r", encoding="utf-8") as f:
-        concepts_data = json.load(f)
-
     matched_intents = []
     input_text_lower = input_text.lower()
 
     if "astronomy" in input_text_lower or "space" in input_text_lower:
         matched_intents.append({"intent": "nasa"})
 
-    for concept in concepts_data.get("concepts", []):
-        matched_words = [word for word in concept.get("examples", []) if word in input_text_lower]
-        if matched_words:
-            matched_intents.append({"intent": concept.get("name", ""), "matched_words": matched_words})
-
+    matched_intents.extend(intent_index.search_intent(input_text))
     return matched_intents if matched_intents else None
 
 
+def _summarize_turns(previous_summary: str, dropped: List[Dict[str, str]]) -> Optional[str]:
+    response = _create_chat_completion(
+        messages=conversation_memory.summary_prompt(previous_summary, dropped),
+        max_tokens=150,
+        temperature=0.0,
+    )
+    return llm_cache.completion_text(response) if response is not None else None
+
+
 def _generate_openai_response(prompt: str) -> str:
     if _build_client() is None:
         return (
@@ -147,8 +151,8 @@ def _generate_openai_response(prompt: str) -> str:
         {"role": "system", "content": agent_config.get("functionPrompt", "")},
     ]
 
-    if "messages" in conversation_state:
-        message_history.extend(conversation_state["messages"])
+    memory = conversation_memory.memory_for(globals.current_conversation(), summarizer=_summarize_turns)
+    message_history.extend(memory.messages())
 
     message_history.append({"role": "user", "content": prompt})
 
@@ -173,8 +177,7 @@ def _generate_openai_response(prompt: str) -> str:
         else:
             assistant_reply = str(message).strip()
         assistant_reply = f"{_provider_label()}{assistant_reply}" if assistant_reply else assistant_reply
-        conversation_state.setdefault("messages", []).append({"role": "user", "content": prompt})
-        conversation_state["messages"].append({"role": "assistant", "content": assistant_reply})
+        memory.add_exchange(prompt, assistant_reply)
         return assistant_reply
 
     return "Error: No valid response received."
@@ -248,16 +251,15 @@ def _handle_nasa_image_search(user_text: str) -> str:
     query = _extract_nasa_search_query(user_text)
     if not query:
         return "What NASA images are you looking for?"
-    api_url = f"https://images-api.nasa.gov/search?q={quote_plus(query)}&media_type=image"
     try:
-        nasa_data = nasa_api.get_nasa(api_url)
+        nasa_data = nasa_api.search_images(query)
     except Exception:
         return "I couldn't reach the NASA image service right now."
     return _format_nasa_search_results(nasa_data)
 
 
 def process_utterance(user_text: str, agent_name: str = "Stella") -> str:
-    if globals.number_conversants > 1 and not _is_space_question(user_text):
+    if globals.current_conversation().number_conversants > 1 and not _is_space_question(user_text):
         return ""
 
     if _is_nasa_image_request(user_text):
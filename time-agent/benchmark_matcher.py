@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Benchmark: compiled TimeQueryMatcher vs the previous per-call regex code.
+
+The "before" functions below are the intent and city helpers as they were
+before the matcher: they rebuild and re-run one regex per timezone term,
+intent pattern and city (cities re-sorted) on every query.
+
+Usage:
+    python benchmark_matcher.py [--rounds 2000]
+"""
+
+import argparse
+import re
+import time
+
+import utterance_handler
+from utterance_handler import CITY_TIMEZONES
+
+QUERIES = [
+    "what time is it in san francisco?",
+    "what timezone is tokyo in?",
+    "current time in new york",
+    "the moon is smaller than the earth",
+    "what is the utc offset for mumbai",
+    "tell me the time in buenos aires and london",
+    "list cities",
+]
+
+
+def legacy_has_time_intent(user_text):
+    timezone_terms = [
+        "timezone", "time zone", "utc", "gmt", "pst", "pdt", "mst", "mdt",
+        "cst", "cdt", "est", "edt", "cet", "cest", "bst", "ist", "jst", "aest", "acst",
+    ]
+    has_timezone_term = any(re.search(r"\b" + re.escape(term) + r"\b", user_text) for term in timezone_terms)
+    intent_patterns = [
+        r"\bwhat(?:'s| is)?\s+(?:the\s+)?time\b",
+        r"\bwhat(?:'s| is)?\s+(?:the\s+)?time\s*zone\s+(?:in|for)\b",
+        r"\bwhat(?:'s| is)?\s+(?:the\s+)?timezone\s+(?:in|for)\b",
+        r"\bwhen\s+is\s+it\b",
+        r"\b(?:tell|show|give)\s+me\s+(?:the\s+)?(?:current\s+)?time\b",
+        r"\bcan\s+you\s+(?:tell|show|give)\s+me\s+(?:the\s+)?time\b",
+        r"^\s*(?:time|timezone|time zone)\s+(?:in|for)\b",
+        r"^\s*(?:current|local)\s+time\s+(?:in|at|for)\b",
+        r"\b(?:utc|gmt)\s*offset\b",
+    ]
+    matches_intent_pattern = any(re.search(pattern, user_text) for pattern in intent_patterns)
+    has_question_form = user_text.endswith("?") and ("time" in user_text or has_timezone_term)
+    request_words = ["what", "when", "tell", "show", "give", "can you", "could you", "please", "in", "for", "offset"]
+    has_request_context = any(word in user_text for word in request_words)
+    return matches_intent_pattern or has_question_form or (has_timezone_term and has_request_context)
+
+
+def legacy_extract_city(user_text):
+    for city in sorted(CITY_TIMEZONES.keys(), key=len, reverse=True):
+        if re.search(r"\b" + re.escape(city) + r"\b", user_text):
+            return city
+    return ""
+
+
+def before(text):
+    legacy_has_time_intent(text)
+    legacy_extract_city(text)
+
+
+def after(text):
+    utterance_handler._has_time_intent(text)
+    utterance_handler._extract_city_from_query(text)
+
+
+def measure(label, fn, rounds):
+    started = time.perf_counter()
+    for _ in range(rounds):
+        for text in QUERIES:
+            fn(text)
+    per_query_us = (time.perf_counter() - started) / (rounds * len(QUERIES)) * 1e6
+    print(f"{label:<10} {per_query_us:8.1f} us / query")
+    return per_query_us
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n")[1])
+    parser.add_argument("--rounds", type=int, default=2000)
+    args = parser.parse_args()
+
+    for text in QUERIES:
+        assert legacy_has_time_intent(text) == utterance_handler._has_time_intent(text), text
+        assert legacy_extract_city(text) == utterance_handler._extract_city_from_query(text), text
+
+    legacy_us = measure("before", before, args.rounds)
+    compiled_us = measure("after", after, args.rounds)
+    print(f"speed-up: {legacy_us / compiled_us:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -21,13 +21,13 @@ logger = logging.getLogger(__name__)
 
 
 def _update_conversant_count(envelope: Envelope) -> None:
+    conversation = getattr(envelope, "conversation", None) if envelope else None
+    context = globals.conversations.get(getattr(conversation, "id", None))
     try:
-        conversants = None
-        if envelope and getattr(envelope, "conversation", None):
-            conversants = getattr(envelope.conversation, "conversants", None)
-        globals.number_conversants = len(conversants) if conversants else 0
+        conversants = getattr(conversation, "conversants", None) if conversation else None
+        context.number_conversants = len(conversants) if conversants else 0
     except Exception:
-        globals.number_conversants = 0
+        context.number_conversants = 0
 
 
 def parse_incoming_envelope(json_payload: str) -> Envelope:
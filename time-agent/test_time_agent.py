@@ -20,59 +20,64 @@ def run_local_intent_tests():
     print("Running local intent tests")
     print("=" * 60)
 
-    original_conversants = globals.number_conversants
-    globals.number_conversants = 2
+    with globals.conversation_scope("local-intent-tests") as conversation:
+        conversation.number_conversants = 2
 
-    try:
-        test_cases = [
-            {
-                "name": "Non-time statement should not trigger",
-                "input": "the moon is smaller than the earth",
-                "expect_empty": True,
-            },
-            {
-                "name": "City-only mention should not trigger",
-                "input": "san francisco",
-                "expect_empty": True,
-            },
-            {
-                "name": "Time query should trigger",
-                "input": "what time is it in san francisco?",
-                "expect_contains": "The current time in San Francisco is",
-            },
-            {
-                "name": "Timezone query should trigger",
-                "input": "what timezone is san francisco in?",
-                "expect_contains": "San Francisco is in the America/Los_Angeles time zone",
-            },
-            {
-                "name": "Timezone query with trailing quote should trigger",
-                "input": "what is the time zone for chicago'",
-                "expect_contains": "Chicago is in the America/Chicago time zone",
-            },
-        ]
+        try:
+            test_cases = [
+                {
+                    "name": "Non-time statement should not trigger",
+                    "input": "the moon is smaller than the earth",
+                    "expect_empty": True,
+                },
+                {
+                    "name": "City-only mention should not trigger",
+                    "input": "san francisco",
+                    "expect_empty": True,
+                },
+                {
+                    "name": "Time query should trigger",
+                    "input": "what time is it in san francisco?",
+                    "expect_contains": "The current time in San Francisco is",
+                },
+                {
+                    "name": "Timezone query should trigger",
+                    "input": "what timezone is san francisco in?",
+                    "expect_contains": "San Francisco is in the America/Los_Angeles time zone",
+                },
+                {
+                    "name": "Timezone query with trailing quote should trigger",
+                    "input": "what is the time zone for chicago'",
+                    "expect_contains": "Chicago is in the America/Chicago time zone",
+                },
+                {
+                    "name": "Time query for several cities answers each",
+                    "input": "what time is it in tokyo and london?",
+                    "expect_contains": "The current time in London is",
+                },
+            ]
 
-        for case in test_cases:
-            response = utterance_handler.process_utterance(case["input"])
-            passed = True
+            for case in test_cases:
+                response = utterance_handler.process_utterance(case["input"])
+                passed = True
 
-            if case.get("expect_empty"):
-                passed = (response == "")
-            elif case.get("expect_contains"):
-                expected = case["expect_contains"]
-                passed = isinstance(response, str) and expected in response
+                if case.get("expect_empty"):
+                    passed = (response == "")
+                elif case.get("expect_contains"):
+                    expected = case["expect_contains"]
+                    passed = isinstance(response, str) and expected in response
 
-            status = "PASS" if passed else "FAIL"
-            print(f"[{status}] {case['name']}")
-            print(f"  input: {case['input']}")
-            print(f"  response: {response!r}")
+                status = "PASS" if passed else "FAIL"
+                print(f"[{status}] {case['name']}")
+                print(f"  input: {case['input']}")
+                print(f"  response: {response!r}")
 
-            if not passed:
-                raise AssertionError(f"Test failed: {case['name']}")
+                if not passed:
+                    raise AssertionError(f"Test failed: {case['name']}")
 
-        print("All local intent tests passed.")
-    finally:
-        globals.number_conversants = original_conversants
+            print("All local intent tests passed.")
+        finally:
+            globals.conversations.discard("local-intent-tests")
 
 
 def send_utterance(text: str):
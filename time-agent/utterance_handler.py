@@ -17,6 +17,7 @@ All OpenFloor event parsing and envelope construction is handled by template_age
 import globals
 
 from datetime import datetime
+from functools import lru_cache
 import pytz
 import re
 
@@ -114,7 +115,7 @@ def process_utterance(user_text: str, agent_name: str = "TimeAgent") -> str:
 
     # If query is not time-related, suppress response for multi-agent floors.
     if not (has_time_intent or has_help_keyword or has_list_keyword):
-        if globals.number_conversants > 1:
+        if globals.current_conversation().number_conversants > 1:
             return ""
         return "I am only able to give time information."
     
@@ -126,11 +127,18 @@ def process_utterance(user_text: str, agent_name: str = "TimeAgent") -> str:
     if has_list_keyword:
         return _list_available_cities()
     
-    # Try to extract city name from the query (only when time intent is present)
-    city = _extract_city_from_query(normalized_text) if has_time_intent else ""
+    # Try to extract city names from the query (only when time intent is present)
+    cities = _extract_cities_from_query(normalized_text) if has_time_intent else []
+    wants_timezone = "timezone" in normalized_text or "time zone" in normalized_text
+
+    if len(cities) > 1:
+        describe = _get_timezone_for_city if wants_timezone else _get_time_for_city
+        return "\n".join(describe(city) for city in cities)
+
+    city = cities[0] if cities else ""
     
     if city:
-        if "timezone" in normalized_text or "time zone" in normalized_text:
+        if wants_timezone:
             return _get_timezone_for_city(city)
         return _get_time_for_city(city)
     
@@ -148,36 +156,73 @@ def process_utterance(user_text: str, agent_name: str = "TimeAgent") -> str:
 # HELPER FUNCTIONS
 # =============================================================================
 
+_TIMEZONE_TERMS = [
+    "timezone", "time zone", "utc", "gmt", "pst", "pdt", "mst", "mdt",
+    "cst", "cdt", "est", "edt", "cet", "cest", "bst", "ist", "jst", "aest", "acst",
+]
+
+_INTENT_PATTERNS = [
+    r"\bwhat(?:'s| is)?\s+(?:the\s+)?time\b",
+    r"\bwhat(?:'s| is)?\s+(?:the\s+)?time\s*zone\s+(?:in|for)\b",
+    r"\bwhat(?:'s| is)?\s+(?:the\s+)?timezone\s+(?:in|for)\b",
+    r"\bwhen\s+is\s+it\b",
+    r"\b(?:tell|show|give)\s+me\s+(?:the\s+)?(?:current\s+)?time\b",
+    r"\bcan\s+you\s+(?:tell|show|give)\s+me\s+(?:the\s+)?time\b",
+    r"^\s*(?:time|timezone|time zone)\s+(?:in|for)\b",
+    r"^\s*(?:current|local)\s+time\s+(?:in|at|for)\b",
+    r"\b(?:utc|gmt)\s*offset\b",
+]
+
+_REQUEST_WORDS = ["what", "when", "tell", "show", "give", "can you", "could you", "please", "in", "for", "offset"]
+
+
+class TimeQueryMatcher:
+    """
+    Intent and city matching compiled once at import.
+
+    Cities are one alternation regex, longest name first and bounded by \\b, so
+    a single scan finds every city and short aliases like "la" never match
+    inside words like "smaller".
+    """
+
+    def __init__(self, city_timezones: dict):
+        self._city_rank = {city: rank for rank, city in enumerate(city_timezones)}
+        cities = sorted(city_timezones, key=len, reverse=True)
+        self._city_re = re.compile(r"\b(?:" + "|".join(re.escape(city) for city in cities) + r")\b")
+        self._timezone_term_re = re.compile(r"\b(?:" + "|".join(re.escape(term) for term in _TIMEZONE_TERMS) + r")\b")
+        self._intent_re = re.compile("|".join(f"(?:{pattern})" for pattern in _INTENT_PATTERNS))
+
+    def has_time_intent(self, user_text: str) -> bool:
+        has_timezone_term = self._timezone_term_re.search(user_text) is not None
+        if self._intent_re.search(user_text):
+            return True
+        if user_text.endswith("?") and ("time" in user_text or has_timezone_term):
+            return True
+        return has_timezone_term and any(word in user_text for word in _REQUEST_WORDS)
+
+    def extract_cities(self, user_text: str) -> list:
+        """Every known city in the text, in order of appearance, without duplicates."""
+        return list(dict.fromkeys(match.group(0) for match in self._city_re.finditer(user_text)))
+
+    def extract_city(self, user_text: str) -> str:
+        """The longest city named in the text (ties go to CITY_TIMEZONES order), or ""."""
+        cities = self.extract_cities(user_text)
+        if not cities:
+            return ""
+        return min(cities, key=lambda city: (-len(city), self._city_rank[city]))
+
+
+_MATCHER = TimeQueryMatcher(CITY_TIMEZONES)
+
+
+@lru_cache(maxsize=None)
+def _get_timezone(timezone_str: str):
+    return pytz.timezone(timezone_str)
+
+
 def _has_time_intent(user_text: str) -> bool:
     """Return True when text appears to be an explicit time/timezone request."""
-    timezone_terms = [
-        "timezone", "time zone", "utc", "gmt", "pst", "pdt", "mst", "mdt",
-        "cst", "cdt", "est", "edt", "cet", "cest", "bst", "ist", "jst", "aest", "acst",
-    ]
-
-    has_timezone_term = any(
-        re.search(r"\b" + re.escape(term) + r"\b", user_text)
-        for term in timezone_terms
-    )
-
-    intent_patterns = [
-        r"\bwhat(?:'s| is)?\s+(?:the\s+)?time\b",
-        r"\bwhat(?:'s| is)?\s+(?:the\s+)?time\s*zone\s+(?:in|for)\b",
-        r"\bwhat(?:'s| is)?\s+(?:the\s+)?timezone\s+(?:in|for)\b",
-        r"\bwhen\s+is\s+it\b",
-        r"\b(?:tell|show|give)\s+me\s+(?:the\s+)?(?:current\s+)?time\b",
-        r"\bcan\s+you\s+(?:tell|show|give)\s+me\s+(?:the\s+)?time\b",
-        r"^\s*(?:time|timezone|time zone)\s+(?:in|for)\b",
-        r"^\s*(?:current|local)\s+time\s+(?:in|at|for)\b",
-        r"\b(?:utc|gmt)\s*offset\b",
-    ]
-
-    matches_intent_pattern = any(re.search(pattern, user_text) for pattern in intent_patterns)
-    has_question_form = user_text.endswith("?") and ("time" in user_text or has_timezone_term)
-    request_words = ["what", "when", "tell", "show", "give", "can you", "could you", "please", "in", "for", "offset"]
-    has_request_context = any(word in user_text for word in request_words)
-
-    return matches_intent_pattern or has_question_form or (has_timezone_term and has_request_context)
+    return _MATCHER.has_time_intent(user_text)
 
 
 def _normalize_query_text(user_text: str) -> str:
@@ -197,14 +242,12 @@ def _extract_city_from_query(user_text: str) -> str:
     Returns:
         City name if found, empty string otherwise
     """
-    # Check longest phrases first and require whole-word/phrase matches.
-    # This prevents short aliases like "la" from matching inside words like "smaller".
-    for city in sorted(CITY_TIMEZONES.keys(), key=len, reverse=True):
-        city_pattern = r"\b" + re.escape(city) + r"\b"
-        if re.search(city_pattern, user_text):
-            return city
-    
-    return ""
+    return _MATCHER.extract_city(user_text)
+
+
+def _extract_cities_from_query(user_text: str) -> list:
+    """All city names in the user query (lowercase), in order of appearance."""
+    return _MATCHER.extract_cities(user_text)
 
 
 def _get_time_for_city(city: str) -> str:
@@ -223,7 +266,7 @@ def _get_time_for_city(city: str) -> str:
         return f"Sorry, I don't have time information for '{city}'. Try 'list cities' to see available cities."
     
     try:
-        tz = pytz.timezone(timezone_str)
+        tz = _get_timezone(timezone_str)
         current_time = datetime.now(tz)
         
         # Format: "Monday, January 12, 2026 at 3:45 PM EST"
@@ -250,7 +293,7 @@ def _get_timezone_for_city(city: str) -> str:
         return f"Sorry, I don't have timezone information for '{city}'. Try 'list cities' to see available cities."
 
     try:
-        tz = pytz.timezone(timezone_str)
+        tz = _get_timezone(timezone_str)
         now = datetime.now(tz)
         tz_abbrev = now.strftime("%Z")
         offset = now.utcoffset()
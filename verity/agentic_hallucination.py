@@ -1,4 +1,5 @@
 import os
+import time
 import json
 import ast
 from pathlib import Path
@@ -9,6 +10,9 @@ import openai
 from openai import OpenAI
 from dotenv import load_dotenv
 
+import llm_cache
+import llm_providers
+
 _preexisting_openai_api_key = os.environ.get("OPENAI_API_KEY")
 load_dotenv(dotenv_path=Path(__file__).parent / ".env", override=True)
 if _preexisting_openai_api_key is None:
@@ -45,18 +49,11 @@ def _ollama_base_url() -> str:
     return base_url
 
 
+_llm_providers = llm_providers.ProviderRegistry(LLM_PROVIDER, _ollama_base_url(), OLLAMA_MODEL, OPENAI_MODEL)
+
+
 def _llm_targets() -> list[tuple[str, OpenAI, str]]:
-    targets: list[tuple[str, OpenAI, str]] = []
-    api_key = (os.environ.get("OPENAI_API_KEY") or "").strip()
-    if LLM_PROVIDER in {"auto", "ollama"}:
-        targets.append((
-            "ollama",
-            OpenAI(base_url=_ollama_base_url(), api_key=(os.environ.get("OLLAMA_API_KEY") or "ollama")),
-            OLLAMA_MODEL,
-        ))
-    if api_key and LLM_PROVIDER in {"auto", "openai", "ollama"}:
-        targets.append(("openai", OpenAI(api_key=api_key), OPENAI_MODEL))
-    return targets
+    return _llm_providers.targets()
 
 
 ###############################################################################
@@ -85,19 +82,35 @@ class LLMIntegrationAgent:
             {"role": "system", "content": self.system_message},
             {"role": "user", "content": user_message}
         ]
+        params = {
+            "temperature": self.model_config.get("temperature", 0.0),
+            "max_tokens": self.model_config.get("max_tokens", 200),
+        }
+        cache_key = None
+        if llm_cache.should_cache(params):
+            cache_key = llm_cache.cache_key(messages, f"{LLM_PROVIDER}:{OLLAMA_MODEL}|{OPENAI_MODEL}", params)
+            cached_reply = llm_cache.response_cache.get(cache_key)
+            if cached_reply is not None:
+                _logger.info("LLM cache hit agent=%s", self.name)
+                return cached_reply
+
         last_error = None
         for provider, llm_client, model in _llm_targets():
+            started = time.perf_counter()
             try:
                 response = llm_client.chat.completions.create(
                     model=model,
                     messages=messages,
-                    temperature=self.model_config.get("temperature", 0.0),
-                    max_tokens=self.model_config.get("max_tokens", 200)
+                    **params
                 )
+                _llm_providers.record_success(provider, time.perf_counter() - started)
                 reply = response.choices[0].message.content.strip()
                 _logger.info("LLM provider=%s model=%s agent=%s", provider, model, self.name)
+                if cache_key is not None and reply:
+                    llm_cache.response_cache.set(cache_key, reply)
                 return reply
             except Exception as e:
+                _llm_providers.record_failure(provider, time.perf_counter() - started, e)
                 last_error = e
                 _logger.warning("%s request failed for %s: %s", provider, self.name, e)
         _logger.error("No LLM provider succeeded for %s: %s", self.name, last_error)
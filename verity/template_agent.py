@@ -17,6 +17,7 @@ from openfloor.events import (
 from openfloor.manifest import Manifest, Identification, Capability, SupportedLayers
 from openfloor.dialog_event import DialogEvent, TextFeature
 
+import globals
 import utterance_handler
 
 
@@ -87,7 +88,8 @@ class BotAgent:
             conversation=Conversation(id=conversation_id),
             sender=Sender(speakerUri=self.speakerUri, serviceUrl=self.serviceUrl),
         )
-        self.on_envelope(in_envelope, out_envelope)
+        with globals.conversation_scope(conversation_id):
+            self.on_envelope(in_envelope, out_envelope)
         return out_envelope
 
     @staticmethod
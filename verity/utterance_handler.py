@@ -50,7 +50,7 @@ def review_utterance(user_text: str) -> dict:
 
 
 def _should_suppress_response(response_dict: dict) -> bool:
-    if globals.number_conversants <= 1:
+    if globals.current_conversation().number_conversants <= 1:
         return False
 
     applicable = str(response_dict.get("applicable", "")).strip().lower()